@@ -0,0 +1,61 @@
+"""Benchmarks of the client pipeline against the stub API on localhost."""
+import pytest
+
+from conftest import BANNERS, STUBS, VIEWS
+
+pytest.importorskip('pytest_benchmark')
+
+
+def bench_get_tables(benchmark, datasource):
+    tables = benchmark(datasource.get_tables, STUBS[2], BANNERS[0], VIEWS)
+    assert set(tables) == set(VIEWS)
+
+
+def bench_get_tables_combined(benchmark, datasource):
+    table = benchmark(datasource.get_tables, STUBS[2], BANNERS[0], VIEWS,
+                      combine=True)
+    assert table.shape[1] == 7
+
+
+def bench_deserialize_dataframe(benchmark, datasource, tables_content):
+    view = tables_content['results']['counts']
+    frame = benchmark(datasource.deserialize_dataframe,
+                      data=view['data'],
+                      index=view['index'],
+                      columns=view['columns'])
+    assert frame.shape == (len(view['index']), len(view['columns']))
+
+
+def bench_apply_labels(benchmark, datasource, tables_content):
+    view = tables_content['results']['counts']
+    frame = datasource.deserialize_dataframe(data=view['data'],
+                                             index=view['index'],
+                                             columns=view['columns'])
+    index = benchmark(datasource.apply_labels, frame.index)
+    assert len(index) == len(frame.index)
+
+
+def bench_get_table_set(benchmark, datasource):
+    table_set = benchmark(datasource.get_table_set, STUBS, BANNERS, VIEWS)
+    assert len(table_set) == len(STUBS) * len(BANNERS)
+
+
+def bench_table_set_to_excel(benchmark, datasource, tmp_path):
+    table_set = datasource.get_table_set(STUBS, BANNERS, VIEWS)
+    filename = str(tmp_path / 'tables.xlsx')
+    benchmark(datasource.table_set_to_excel, table_set, filename)
+
+
+def bench_add_charts(benchmark, client, datasource):
+    pairs = [(variable, banner[0]) for stub in STUBS for variable in stub
+             for banner in BANNERS]
+
+    def new_report():
+        return (client.create_report('benchmark'),), {}
+
+    def add_charts(report):
+        report.add_charts(datasource.get_id(), x_y_pairs=pairs,
+                          charts_per_row=2)
+        report.delete()
+
+    benchmark.pedantic(add_charts, setup=new_report, rounds=5)
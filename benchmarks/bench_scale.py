@@ -0,0 +1,66 @@
+"""How the client scales with the number of rows and variables.
+
+Besides time, each benchmark records the peak memory allocated by one call
+in extra_info['peak_memory_mb']. Sizes are set with --scale, e.g.
+--scale=1000x100,1000000x3000.
+"""
+import json
+import tracemalloc
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+
+def peak_memory(benchmark, function, *args, **kwargs):
+    """Run function once under tracemalloc and record its peak memory."""
+    tracemalloc.start()
+    try:
+        function(*args, **kwargs)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    benchmark.extra_info['peak_memory_mb'] = round(peak / 2 ** 20, 2)
+
+
+def bench_get_meta_and_data(benchmark, synthetic_datasource):
+    peak_memory(benchmark, synthetic_datasource.get_meta_and_data)
+    resp = benchmark(synthetic_datasource.get_meta_and_data)
+    assert 'data' in resp
+
+
+def bench_update_meta_and_data(benchmark, synthetic_datasource):
+    resp = synthetic_datasource.get_meta_and_data()
+    peak_memory(benchmark, synthetic_datasource.update_meta_and_data,
+                resp['meta'], resp['data'])
+    resp = benchmark(synthetic_datasource.update_meta_and_data,
+                     resp['meta'], resp['data'])
+    assert resp.status_code == 200
+
+
+def bench_meta_lookups(benchmark, synthetic_datasource):
+    variables = synthetic_datasource.get_variables('single')
+
+    def lookups():
+        for variable in variables:
+            synthetic_datasource.text(variable)
+            synthetic_datasource.get_values(variable)
+
+    peak_memory(benchmark, lookups)
+    benchmark(lookups)
+
+
+def bench_deserialize_tables(benchmark, synthetic_datasource):
+    stub = synthetic_datasource.get_variables('single')[:200]
+    resp = synthetic_datasource._client.post_request(
+        resource='datasource/{}'.format(synthetic_datasource.get_id()),
+        action='tables',
+        data={'stub': stub, 'banner': stub[:5], 'views': ['counts']})
+    content = json.loads(resp.content)['results']['counts']
+
+    def deserialize():
+        return synthetic_datasource.deserialize_dataframe(**content)
+
+    peak_memory(benchmark, deserialize)
+    frame = benchmark(deserialize)
+    assert frame.shape[0] == len(content['index'])
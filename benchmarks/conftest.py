@@ -0,0 +1,83 @@
+import json
+import os
+
+import pytest
+
+from datasmoothie import Client
+from datasmoothie import synthetic
+from datasmoothie.testing import FakeServer
+from datasmoothie.testing import StubHTTPServer
+from datasmoothie.transport import FakeTransport
+
+FIXTURES = os.path.join(os.path.dirname(__file__), '..', 'tests', 'fixtures')
+
+STUBS = [
+    ['distance', 'store', 'contact'],
+    ['reason1', 'reason2', 'dept'],
+    ['price', 'numitems', 'org', 'service', 'quality', 'overall']
+]
+BANNERS = [['gender', 'agecat'], ['regular', 'purchase']]
+VIEWS = ['cbase', 'counts', 'c%', 'stddev']
+
+
+def pytest_addoption(parser):
+    parser.addoption("--scale", action="store", default="1000x100,10000x1000",
+                     help="Comma separated survey sizes for the scale "
+                          "benchmarks, as ROWSxVARIABLES.")
+
+
+def pytest_generate_tests(metafunc):
+    if 'scale' in metafunc.fixturenames:
+        sizes = [tuple(int(i) for i in size.split('x'))
+                 for size in metafunc.config.option.scale.split(',')]
+        metafunc.parametrize('scale', sizes, ids=[
+            "{}x{}".format(*size) for size in sizes], scope='module')
+
+
+@pytest.fixture(scope="session")
+def stub_server():
+    """The fake API served over HTTP on localhost."""
+    server = FakeServer.from_fixtures(os.path.join(FIXTURES, 'sample_meta.json'),
+                                      os.path.join(FIXTURES, 'sample_data.csv'))
+    with StubHTTPServer(server) as stub:
+        yield stub
+
+
+@pytest.fixture(scope="session")
+def client(stub_server):
+    return Client(api_key='', host=stub_server.host, ssl=False)
+
+
+@pytest.fixture(scope="session")
+def datasource(client):
+    return client.get_datasource(client.list_datasources()['results'][0]['pk'])
+
+
+@pytest.fixture(scope="session")
+def tables_content(stub_server, datasource):
+    """A raw JSON tables response, for benchmarking the client side only."""
+    client = Client(api_key='', host=stub_server.host, ssl=False,
+                    binary=False)
+    resp = client.post_request(resource='datasource/{}'.format(datasource.get_id()),
+                               action='tables',
+                               data={'stub': STUBS[2],
+                                     'banner': BANNERS[0],
+                                     'views': VIEWS})
+    return json.loads(resp.content)
+
+
+@pytest.fixture(scope="module")
+def synthetic_datasource(scale):
+    """A datasource with a synthetic survey of the requested size."""
+    rows, variables = scale
+    meta = synthetic.generate_meta(singles=int(variables * 0.8),
+                                   delimited_sets=int(variables * 0.1),
+                                   ints=int(variables * 0.05),
+                                   floats=int(variables * 0.05),
+                                   languages=3)
+    data = synthetic.generate_data(meta, rows).to_csv(index=False)
+    server = FakeServer()
+    pk = server.add_datasource('Synthetic', meta=meta, data=data)
+    # JSON responses, as bench_deserialize_tables times the JSON decoding
+    client = Client(api_key='', transport=FakeTransport(server), binary=False)
+    return client.get_datasource(pk)
@@ -0,0 +1,129 @@
+"""Assemble the views of a table into one combined DataFrame.
+
+``get_tables(combine=True)`` stacks its views on top of each other in the
+order they were asked for. Counts and column percentages are interleaved
+row by row into a single block, labelled "{code}" and "{code} (%)", which
+takes the place of the c% view; its rows are sorted by variable name and
+then by label as text.
+
+The final row order is worked out first and the values are then copied
+into one preallocated array, instead of concatenating frame by frame.
+"""
+import numpy as np
+import pandas as pd
+
+
+def _interleaved(counts, percentages):
+    """Rows of the counts and c% block as (frame, position, row) sorted."""
+    rows = [(variable, "{}".format(code), counts, position)
+            for position, (variable, code) in enumerate(counts.index)]
+    rows += [(variable, "{} (%)".format(code), percentages, position)
+             for position, (variable, code) in enumerate(percentages.index)]
+    rows.sort(key=lambda row: (row[0], row[1]))
+    return [(frame, position, (variable, label))
+            for variable, label, frame, position in rows]
+
+
+def row_order(results, views):
+    """The rows of the combined table, in order.
+
+    Parameters
+    ----------
+    results : dict
+        A DataFrame for each view.
+    views : list
+        The views in the order they should appear.
+
+    Returns
+    -------
+    list
+        (frame, position, row) for every row: the frame and the position in
+        it the values come from, and the row's index tuple.
+
+    """
+    interleave = 'counts' in views and 'c%' in views
+    order = []
+    for view in views:
+        if interleave and view == 'counts':
+            continue
+        if interleave and view == 'c%':
+            order += _interleaved(results['counts'], results['c%'])
+        else:
+            frame = results[view]
+            order += [(frame, position, tuple(row))
+                      for position, row in enumerate(frame.index)]
+    return order
+
+
+def _column_types(frames, width):
+    types = []
+    for column in range(width):
+        dtypes = [frame.dtypes.iloc[column] for frame in frames]
+        if not all(isinstance(dtype, np.dtype) and dtype.kind in 'biuf'
+                   for dtype in dtypes):
+            return None
+        types.append(np.result_type(*dtypes))
+    return types
+
+
+def _runs(order):
+    """Split the rows into runs taken from the same frame.
+
+    Yields (frame, start, stop, positions) for each run.
+    """
+    start = 0
+    while start < len(order):
+        frame = order[start][0]
+        stop = start
+        while stop < len(order) and order[stop][0] is frame:
+            stop += 1
+        yield frame, start, stop, [row[1] for row in order[start:stop]]
+        start = stop
+
+
+def combine_views(results, views):
+    """Stack the views of a table into one DataFrame.
+
+    Parameters
+    ----------
+    results : dict
+        A DataFrame for each view, normally all with the same columns.
+    views : list
+        The views to include, in order. Counts and c% are interleaved
+        when both are included.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The combined table, with the same columns and dtypes
+        ``pd.concat`` would give.
+
+    """
+    order = row_order(results, views)
+    frames = list({id(results[view]): results[view] for view in views}
+                  .values())
+    columns = frames[0].columns
+    index = pd.MultiIndex.from_tuples([row[2] for row in order])
+    types = None
+    if all(frame.columns.equals(columns) for frame in frames):
+        types = _column_types(frames, len(columns))
+    if types is None:
+        # differing columns or non-numeric values: let pandas align them
+        combined = pd.concat([frame.iloc[positions] for frame, start, stop,
+                              positions in _runs(order)])
+        combined.index = index
+        return combined
+    if len(set(types)) == 1:
+        values = np.empty((len(order), len(columns)), dtype=types[0])
+        for frame, start, stop, positions in _runs(order):
+            values[start:stop] = frame.to_numpy()[positions]
+        return pd.DataFrame(values, index=index, columns=columns)
+    data = {}
+    for column, dtype in enumerate(types):
+        values = np.empty(len(order), dtype=dtype)
+        for frame, start, stop, positions in _runs(order):
+            values[start:stop] = frame.iloc[:, column].to_numpy()[positions]
+        data[column] = values
+    combined = pd.DataFrame(data, index=index)
+    combined.columns = columns
+    return combined
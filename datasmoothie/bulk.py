@@ -0,0 +1,87 @@
+"""Run many independent API calls concurrently, collecting per-item results.
+
+Unlike ``deadline.run_all``, a failing item doesn't stop the others: every
+item gets a ``BulkResult`` holding either its result or its error.
+"""
+import concurrent.futures
+import contextvars
+
+from . import deadline as deadlines
+
+
+class BulkResult:
+    """The outcome of one item of a bulk operation.
+
+    Attributes
+    ----------
+    key : object
+        The item, e.g. the primary key of a report.
+    result : object
+        What the call returned, None if it failed.
+    error : Exception
+        The exception the call raised, None if it succeeded.
+
+    """
+
+    __slots__ = ('key', 'result', 'error')
+
+    def __init__(self, key, result=None, error=None):
+        self.key = key
+        self.result = result
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        if self.ok:
+            return "BulkResult({!r}, result={!r})".format(self.key, self.result)
+        return "BulkResult({!r}, error={!r})".format(self.key, self.error)
+
+
+def run_bulk(function, keys, max_workers=8):
+    """Call ``function`` for each key with bounded parallelism.
+
+    If a deadline is in effect (see deadline.within), items that haven't
+    finished when it passes get a DeadlineExceeded error.
+
+    Parameters
+    ----------
+    function : callable
+        Called with a single key.
+    keys : list
+        The items to process.
+    max_workers : int
+        Maximum number of calls running at the same time.
+
+    Returns
+    -------
+    list
+        A BulkResult for each key, in the same order as ``keys``.
+
+    """
+    keys = list(keys)
+    if not keys:
+        return []
+    deadline = deadlines.current()
+    pool = concurrent.futures.ThreadPoolExecutor(
+        max_workers=min(max_workers, len(keys)),
+        thread_name_prefix='datasmoothie-bulk')
+    futures = [pool.submit(contextvars.copy_context().run, function, key)
+               for key in keys]
+    timeout = None if deadline is None else deadline.remaining()
+    done, not_done = concurrent.futures.wait(futures, timeout=timeout)
+    for future in not_done:
+        future.cancel()
+    pool.shutdown(wait=not not_done)
+    results = []
+    for key, future in zip(keys, futures):
+        if future in not_done:
+            results.append(BulkResult(key, error=deadlines.DeadlineExceeded(
+                "Deadline of {}s exceeded.".format(deadline.seconds))))
+        elif future.exception() is not None:
+            results.append(BulkResult(key, error=future.exception()))
+        else:
+            results.append(BulkResult(key, result=future.result()))
+    return results
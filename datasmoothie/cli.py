@@ -0,0 +1,234 @@
+"""Run tab plans and report builds from a plan file.
+
+Installing the package adds a ``datasmoothie`` command::
+
+    datasmoothie run plan.yaml
+
+A plan is a YAML file (requires PyYAML) or a JSON file with the same
+structure. Every section is optional::
+
+    client:
+      host: www.datasmoothie.com/api2
+      max_workers: 8          # tables fetched at a time
+      retries: 3              # retries of failed requests
+      compression: auto       # compress uploads
+      deadline: 600           # seconds each job may take
+    tables:
+      - datasource: 12
+        stubs: [[price, quality]]
+        banners: [[gender], [agecat]]
+        views: [cbase, counts, c%]
+        language: en-GB
+        output: tables.xlsx   # or .csv
+    reports:
+      - title: Brand tracker
+        datasource: 12
+        charts: [[price, gender], [quality, '@']]
+        charts_per_row: 2
+        user_filters: [gender]
+
+The API key is taken from --api-key or the DATASMOOTHIE_API_KEY
+environment variable. Tables are streamed into the output file as they
+arrive and the charts of a report are uploaded in one request. Progress
+goes to stderr, and --timings adds a summary of the requests made.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from .client import Client
+from .instrumentation import MetricsAggregator
+from .retry import RetryPolicy
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+CLIENT_SETTINGS = ('host', 'ssl', 'max_workers', 'retries', 'compression',
+                   'timeout', 'deadline')
+TABLE_SETTINGS = ('datasource', 'stubs', 'banners', 'views', 'language',
+                  'output')
+REPORT_SETTINGS = ('title', 'datasource', 'charts', 'chart_type',
+                   'charts_per_row', 'filter', 'user_filters',
+                   'comparison_variables', 'global_filter', 'template')
+
+
+def load_plan(path):
+    """Read a plan from a YAML or JSON file and check its structure.
+
+    Raises
+    ------
+    ValueError
+        If the plan has unknown settings or jobs with missing ones.
+
+    """
+    with open(path) as plan_file:
+        if path.endswith(('.yaml', '.yml')):
+            if yaml is None:
+                raise ImportError("YAML plans require PyYAML, "
+                                  "or write the plan as JSON.")
+            plan = yaml.safe_load(plan_file) or {}
+        else:
+            plan = json.load(plan_file)
+    if not isinstance(plan, dict):
+        raise ValueError("A plan is a mapping of client, tables and reports.")
+    _check(plan, ('client', 'tables', 'reports'), (), 'The plan')
+    _check(plan.get('client', {}), CLIENT_SETTINGS, (), 'client')
+    for number, job in enumerate(plan.get('tables', []), 1):
+        _check(job, TABLE_SETTINGS,
+               ('datasource', 'stubs', 'banners', 'views', 'output'),
+               'Tab plan {}'.format(number))
+        if not job['output'].endswith(('.xlsx', '.csv')):
+            raise ValueError("Tab plan {} output must be an .xlsx or .csv "
+                             "file.".format(number))
+    for number, job in enumerate(plan.get('reports', []), 1):
+        _check(job, REPORT_SETTINGS, ('title', 'datasource', 'charts'),
+               'Report {}'.format(number))
+    return plan
+
+
+def _check(section, known, required, name):
+    unknown = sorted(set(section) - set(known))
+    if unknown:
+        raise ValueError("{} has unknown settings: {}.".format(
+            name, ", ".join(unknown)))
+    missing = [i for i in required if i not in section]
+    if missing:
+        raise ValueError("{} is missing {}.".format(name, ", ".join(missing)))
+
+
+def build_client(settings, api_key, hooks=None):
+    """Create the Client for a plan's client settings."""
+    kwargs = {}
+    if 'host' in settings:
+        kwargs['host'] = settings['host']
+    if 'retries' in settings:
+        kwargs['retry'] = RetryPolicy(total=settings['retries'])
+    return Client(api_key,
+                  ssl=settings.get('ssl', True),
+                  timeout=settings.get('timeout', 60),
+                  compression=settings.get('compression'),
+                  hooks=hooks,
+                  **kwargs)
+
+
+def run_tables(client, job, settings, progress):
+    """Fetch a tab plan and write it to its output file.
+
+    Returns the number of tables written.
+    """
+    datasource = client.get_datasource(job['datasource'])
+    total = len(job['stubs']) * len(job['banners'])
+    written = [0]
+
+    def tables():
+        for stub, banner, table in datasource.iter_table_set(
+                job['stubs'], job['banners'], job['views'],
+                language=job.get('language'),
+                max_workers=settings.get('max_workers', 8),
+                deadline=settings.get('deadline')):
+            written[0] += 1
+            progress("  table {}/{}".format(written[0], total))
+            yield stub, banner, table
+
+    if job['output'].endswith('.csv'):
+        datasource.table_set_to_csv(tables(), job['output'])
+    else:
+        datasource.table_set_to_excel(tables(), job['output'])
+    return written[0]
+
+
+def run_report(client, job, settings):
+    """Create a report and add its charts. Returns the report."""
+    report = client.create_report(
+        job['title'],
+        global_filter=job.get('global_filter', 'default'),
+        template=job.get('template', 'none'))
+    report.add_charts(job['datasource'],
+                      x_y_pairs=[tuple(i) for i in job['charts']],
+                      user_filters=job.get('user_filters', []),
+                      filter=job.get('filter'),
+                      comparison_variables=job.get('comparison_variables',
+                                                   []),
+                      chart_type=job.get('chart_type', 'StackedBarChart'),
+                      charts_per_row=job.get('charts_per_row', 1),
+                      deadline=settings.get('deadline'))
+    return report
+
+
+def run(plan, api_key, quiet=False, timings=False, stream=None):
+    """Run every job of a plan, tab plans first.
+
+    Progress and timings are written to ``stream``, by default stderr.
+    Stops at the first job that fails.
+    """
+    stream = stream if stream is not None else sys.stderr
+
+    def progress(message):
+        if not quiet:
+            print(message, file=stream, flush=True)
+
+    settings = plan.get('client', {})
+    metrics = MetricsAggregator()
+    client = build_client(settings, api_key, hooks=[metrics])
+    for job in plan.get('tables', []):
+        start = time.perf_counter()
+        progress("Tables from datasource {} to {}".format(
+            job['datasource'], job['output']))
+        count = run_tables(client, job, settings, progress)
+        progress("  wrote {} tables in {:.1f}s".format(
+            count, time.perf_counter() - start))
+    for job in plan.get('reports', []):
+        start = time.perf_counter()
+        progress("Report {!r}".format(job['title']))
+        report = run_report(client, job, settings)
+        progress("  added {} charts to {} in {:.1f}s".format(
+            len(job['charts']), report.get_url(),
+            time.perf_counter() - start))
+    if timings:
+        for name, summary in sorted(metrics.summary().items()):
+            total = summary['phases'].get('total', {})
+            print("{}: {} requests, {} retries, mean {:.3f}s, p95 {:.3f}s"
+                  .format(name, summary['requests'], summary['retries'],
+                          total.get('mean', 0), total.get('p95', 0)),
+                  file=stream)
+
+
+def main(argv=None):
+    """Entry point of the datasmoothie command. Returns the exit code."""
+    parser = argparse.ArgumentParser(
+        prog='datasmoothie',
+        description="Run Datasmoothie tab plans and report builds.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser(
+        'run', help="Run the jobs in a YAML or JSON plan file.")
+    run_parser.add_argument('plan', help="Path of the plan file.")
+    run_parser.add_argument(
+        '--api-key', default=os.environ.get('DATASMOOTHIE_API_KEY'),
+        help="API key, by default $DATASMOOTHIE_API_KEY.")
+    run_parser.add_argument('--max-workers', type=int,
+                            help="Tables fetched at a time, overriding "
+                                 "the plan.")
+    run_parser.add_argument('--quiet', action='store_true',
+                            help="Don't report progress.")
+    run_parser.add_argument('--timings', action='store_true',
+                            help="Summarize the requests made at the end.")
+    args = parser.parse_args(argv)
+    if args.api_key is None:
+        parser.error("Pass --api-key or set DATASMOOTHIE_API_KEY.")
+    try:
+        plan = load_plan(args.plan)
+        if args.max_workers is not None:
+            plan.setdefault('client', {})['max_workers'] = args.max_workers
+        run(plan, args.api_key, quiet=args.quiet, timings=args.timings)
+    except Exception as e:
+        print("datasmoothie: error: {}".format(e), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,37 @@
+import concurrent.futures
+import collections
+import contextvars
 import json
+import threading
+import time
+import urllib.parse
+import pandas as pd
 import requests
-from .datasource import Datasource
+from . import compression as compressions
+from . import deadline as deadlines
+from . import instrumentation
+from . import wire
+from .bulk import BulkResult, run_bulk
+from .datasource import Datasource, has_variable, merge_meta, select_meta
 from .report import Report
+from .retry import RetryPolicy, parse_retry_after
+from .singleflight import SingleFlight
+from .transport import RequestsTransport
+
+# POST actions that only calculate results and can safely be sent twice
+IDEMPOTENT_ACTIONS = ('tables', 'table', 'crosstab', 'sig_diff')
+
+# POST actions whose tables can be sent in Arrow IPC instead of JSON
+BINARY_ACTIONS = ('tables', 'table', 'crosstab', 'sig_diff')
+
+# datasources whose meta data is kept, the least recently used dropped first
+META_CACHE_SIZE = 32
+
+
+def _close_response(future):
+    """Close the response of a request whose result isn't used."""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
 
 
 class Client:
@@ -19,9 +49,20 @@ class Client:
     __headers : type
         The headers used for http requests.
 
+    Notes
+    -----
+    One Client can be shared by all the threads of a server. Requests from
+    different threads share its connection pool, rate limiter and circuit
+    breaker, and identical requests in flight at the same time are sent
+    once (see the coalesce argument).
+
     """
 
-    def __init__(self, api_key, host="www.datasmoothie.com/api2", ssl=True):
+    def __init__(self, api_key, host="www.datasmoothie.com/api2", ssl=True,
+                 retry=None, rate_limiter=None, circuit_breaker=None,
+                 timeout=60, hedge_after=None, hooks=None, transport=None,
+                 snapshot_store=None, coalesce=True, binary=True,
+                 compression=None, compression_level=None):
         """Initialise the client with an API key.
 
         Parameters
@@ -33,6 +74,46 @@ class Client:
         ssl : boolean
             Datasmoothie does not support non ssl communication, but this is
             useful for development and local unit testing.
+        retry : datasmoothie.retry.RetryPolicy
+            When to retry failed requests. Defaults to RetryPolicy(), use
+            RetryPolicy(total=0) to send every request only once.
+        rate_limiter : datasmoothie.retry.RateLimiter
+            Token bucket limiting how fast requests are sent. Pass the same
+            limiter to several clients to share one budget between them.
+        circuit_breaker : datasmoothie.retry.CircuitBreaker
+            Fails requests fast after repeated server errors.
+        timeout : float
+            Seconds to wait for the server to respond to a request. Inside
+            a deadline.within() block, the time left is used if shorter.
+        hedge_after : float
+            If an idempotent request hasn't returned after this many
+            seconds, send it again and use whichever response comes first.
+        hooks : list
+            Callables that are passed a datasmoothie.instrumentation.RequestEvent
+            with timings, sizes and status after every call, e.g. a
+            MetricsAggregator.
+        transport : datasmoothie.transport.Transport
+            What sends the requests. Defaults to a RequestsTransport, use
+            a FakeTransport to run against an in-process stand-in server.
+        snapshot_store : datasmoothie.snapshot.SnapshotStore
+            Local copies of datasources. Datasource.get_dataframe loads
+            from it while the remote datasource hasn't changed, instead of
+            downloading it again.
+        coalesce : boolean
+            Let concurrent identical GET requests and idempotent POST
+            requests (tables, crosstabs, ...) share one HTTP request and
+            response. Each caller still decodes the response itself.
+        binary : boolean
+            Ask for tables, crosstabs and significance tests in Arrow IPC
+            when pyarrow is installed (see datasmoothie.wire). Responses the
+            server sends as JSON are decoded as before.
+        compression : string
+            Compress request bodies of 1KB or more with gzip, zstd
+            (requires zstandard) or auto, which picks zstd when it's
+            installed. Compressed responses are accepted either way.
+        compression_level : int
+            Compression level, higher is smaller but slower. Defaults to a
+            fast level, see datasmoothie.compression.LEVELS.
 
         """
         self.host = host
@@ -44,13 +125,223 @@ class Client:
         self.__headers = {
             "Authorization": "Token {}".format(self.__api_key),
             "Content-Type": "application/json",
-            "Accept": "application/json"
+            "Accept": "application/json",
+            "Accept-Encoding": compressions.accept_encoding()
             }
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.rate_limiter = rate_limiter
+        self.circuit_breaker = circuit_breaker
+        self.timeout = timeout
+        self.hedge_after = hedge_after
+        self._hedge_pool = None
+        self._lock = threading.Lock()
+        self._hooks = list(hooks or [])
+        self._transport = transport if transport is not None \
+            else RequestsTransport()
+        self.snapshot_store = snapshot_store
+        self._meta_cache = collections.OrderedDict()
+        self._single_flight = SingleFlight() if coalesce else None
+        self.binary = binary
+        self.compression = compressions.resolve(compression)
+        self.compression_level = compression_level
 
     def _get_headers(self):
         return self.__headers
 
-    def get_request(self, resource, action=None):
+    def add_hook(self, hook):
+        """Register a callable to receive a RequestEvent after every call.
+
+        Parameters
+        ----------
+        hook : callable
+            Called with a datasmoothie.instrumentation.RequestEvent.
+
+        """
+        self._hooks.append(hook)
+
+    def instrument(self, method, resource, action=''):
+        """Record a RequestEvent for a block of code.
+
+        Used by Datasource and Report to time the phases of a call (decode,
+        deserialize, labels) together with the request it makes. When no
+        hooks are registered this returns a no-op event.
+        """
+        return instrumentation.record(self._hooks, method, resource, action)
+
+    def _send(self, method, request_path, idempotent=True, **kwargs):
+        """Send a request, or join an identical one already in flight.
+
+        Takes the same arguments as _send_with_retries. Streamed
+        responses can only be read once, so they are never shared.
+        """
+        if self._single_flight is None or not idempotent or \
+                method not in ('GET', 'POST') or kwargs.get('stream'):
+            return self._send_with_retries(method, request_path,
+                                           idempotent, **kwargs)
+
+        def send():
+            result = self._send_with_retries(method, request_path,
+                                             idempotent, **kwargs)
+            # load the body before other threads get the response
+            result.content
+            return result
+
+        result, shared = self._single_flight.do(
+            (method, request_path, kwargs.get('data')), send)
+        if shared:
+            event = instrumentation.current_event()
+            if event:
+                event.cache_hit = True
+                event.status_code = result.status_code
+        return result
+
+    def _send_with_retries(self, method, request_path, idempotent=True,
+                           **kwargs):
+        """Send a request, retrying it according to the retry policy.
+
+        Parameters
+        ----------
+        method : string
+            HTTP method, e.g. GET or POST.
+        request_path : string
+            Full url of the request.
+        idempotent : boolean
+            Whether the request can safely be repeated after a server error.
+        **kwargs
+            Passed on to requests.request. Headers are added to the
+            client's own.
+
+        Returns
+        -------
+        requests.Response
+            The last response received from the server.
+
+        """
+        event = instrumentation.current_event()
+        kwargs['headers'] = dict(self._get_headers(),
+                                 **kwargs.get('headers', {}))
+        attempt = 0
+        while True:
+            # before the breaker lets a trial through, so an expired
+            # deadline can't leave the trial running
+            current_deadline = deadlines.current()
+            if current_deadline is None:
+                timeout = self.timeout
+            else:
+                timeout = current_deadline.timeout(self.timeout)
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.before_request()
+            try:
+                result = self._send_once(method, request_path, idempotent,
+                                         timeout, attempt, event, **kwargs)
+            except (requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout):
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.record_failure()
+                if not self.retry.should_retry(attempt, idempotent=idempotent):
+                    raise
+                self._sleep(self.retry.get_backoff(attempt))
+                attempt += 1
+                continue
+            except BaseException:
+                # e.g. a broken chunked response, which must not leave a
+                # trial request of the breaker running forever
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.record_failure()
+                raise
+            if self.circuit_breaker is not None:
+                if result.status_code >= 500:
+                    self.circuit_breaker.record_failure()
+                else:
+                    self.circuit_breaker.record_success()
+            if not self.retry.should_retry(attempt, result.status_code,
+                                           idempotent=idempotent):
+                return result
+            result.close()
+            retry_after = parse_retry_after(result.headers.get('Retry-After'))
+            if result.status_code == 429 and self.rate_limiter is not None:
+                # the limiter holds back every thread sharing it
+                self.rate_limiter.pause(
+                    self.retry.get_backoff(attempt, retry_after))
+            else:
+                self._sleep(self.retry.get_backoff(attempt, retry_after))
+            attempt += 1
+
+    def _send_once(self, method, request_path, idempotent, timeout, attempt,
+                   event, **kwargs):
+        """Send one attempt of a request and record it on the event."""
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        if event:
+            event.retries = attempt
+            event.bytes_sent += len(kwargs.get('data') or '')
+        with event.phase('network'):
+            if idempotent and self.hedge_after is not None:
+                result = self._hedged_request(method, request_path,
+                                              timeout=timeout, **kwargs)
+            else:
+                result = self._transport.request(method, request_path,
+                                                 timeout=timeout, **kwargs)
+        if event:
+            event.status_code = result.status_code
+            if kwargs.get('stream'):
+                # reading the body here would defeat streaming
+                event.bytes_received += int(
+                    result.headers.get('Content-Length') or 0)
+            else:
+                event.bytes_received += len(result.content)
+        return result
+
+    def _sleep(self, seconds):
+        """Wait before a retry, unless the deadline passes first."""
+        current_deadline = deadlines.current()
+        if current_deadline is not None and \
+                current_deadline.remaining() <= seconds:
+            raise deadlines.DeadlineExceeded(
+                "Deadline of {}s exceeded while waiting to retry."
+                .format(current_deadline.seconds))
+        time.sleep(seconds)
+
+    def _hedged_request(self, method, request_path, timeout, **kwargs):
+        """Send a request, and a second copy if the first one is slow.
+
+        The first response to arrive is returned. If one copy fails the
+        other is still waited for; the slower copy is left to finish in the
+        background since requests can't be cancelled once sent, and its
+        response is closed when it arrives. The copy takes a token from
+        the rate limiter like any request, and isn't sent while the
+        circuit breaker is open.
+        """
+        with self._lock:
+            if self._hedge_pool is None:
+                self._hedge_pool = concurrent.futures.ThreadPoolExecutor(
+                    thread_name_prefix='datasmoothie-hedge')
+        def send(hedge=False):
+            if hedge and self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            return self._transport.request(method, request_path,
+                                           timeout=timeout,
+                                           **kwargs)
+
+        futures = [self._hedge_pool.submit(send)]
+        done, _ = concurrent.futures.wait(futures, timeout=self.hedge_after)
+        if not done and not (self.circuit_breaker is not None and
+                             self.circuit_breaker.is_open):
+            futures.append(self._hedge_pool.submit(send, hedge=True))
+        error = None
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                result = future.result()
+            except requests.exceptions.RequestException as e:
+                error = e
+                continue
+            for other in futures:
+                if other is not future:
+                    other.add_done_callback(_close_response)
+            return result
+        raise error
+
+    def get_request(self, resource, action=None, params=None):
         """Send a get request to the API with a convenient wrapper.
 
         Parameters
@@ -61,6 +352,8 @@ class Client:
         action : type
             Name of the action to take on the resouce,
             e.g. datasource/1/meta_data
+        params : dict
+            Query string parameters. List values are joined with commas.
 
         Returns
         -------
@@ -71,11 +364,25 @@ class Client:
         if action is None:
             action = ""
         request_path = "{}/{}/{}".format(self.base_url, resource, action)
-        result = requests.get(request_path, headers=self._get_headers())
-        result = json.loads(result.content)
+        if params:
+            request_path = "{}?{}".format(request_path, urllib.parse.urlencode(
+                {key: ",".join(str(i) for i in value)
+                 if isinstance(value, (list, tuple)) else value
+                 for key, value in params.items()}))
+        return self._get_json(request_path, resource, action)
+
+    def _get_json(self, request_path, resource, action="",
+                  raise_for_status=False):
+        """GET a full url and decode the JSON response."""
+        with self.instrument('GET', resource, action) as event:
+            result = self._send('GET', request_path)
+            if raise_for_status:
+                result.raise_for_status()
+            with event.phase('decode'):
+                result = json.loads(result.content)
         return result
 
-    def post_request(self, resource, action="", data={}):
+    def post_request(self, resource, action="", data={}, stream=False):
         """Send a POST request to the API with a wrapper.
 
         This is used by other objects
@@ -91,6 +398,8 @@ class Client:
             e.g. datasource/1/meta_data
         data : type
             JSON object with the payload to send with a POST request.
+        stream : boolean
+            Don't read the response body until it's iterated over.
 
         Returns
         -------
@@ -103,20 +412,41 @@ class Client:
             request_path = "{}/{}/".format(self.base_url, resource)
         else:
             request_path = "{}/{}/{}/".format(self.base_url, resource, action)
-        result = requests.post(request_path,
-                               headers=self._get_headers(),
-                               data=json.dumps(data)
-                               )
+        headers = {}
+        if self.binary and action in BINARY_ACTIONS:
+            headers['Accept'] = wire.accept_header()
+        body = self._encode_body(data, headers)
+        with self.instrument('POST', resource, action):
+            result = self._send('POST', request_path,
+                                idempotent=action in IDEMPOTENT_ACTIONS,
+                                data=body,
+                                stream=stream,
+                                headers=headers
+                                )
         return result
 
     def put_request(self, resource, data):
         request_path = "{}/{}/".format(self.base_url, resource)
-        result = requests.put(request_path,
-                              headers=self._get_headers(),
-                              json=data
-                              )
+        headers = {}
+        body = self._encode_body(data, headers)
+        with self.instrument('PUT', resource):
+            result = self._send('PUT', request_path, data=body,
+                                headers=headers)
         return result
 
+    def _encode_body(self, data, headers):
+        """Serialize a request payload, compressed if it's large enough.
+
+        The Content-Encoding header is added to ``headers`` when the body
+        is compressed.
+        """
+        body = json.dumps(data)
+        if self.compression is None or len(body) < compressions.MIN_SIZE:
+            return body
+        headers['Content-Encoding'] = self.compression
+        return compressions.compress(body.encode('utf-8'), self.compression,
+                                     self.compression_level)
+
     def delete_request(self, resource, primary_key):
         """Send a delete request to the API.
 
@@ -134,8 +464,8 @@ class Client:
 
         """
         request_path = "{}/{}/{}".format(self.base_url, resource, primary_key)
-        result = requests.delete(request_path,
-                                 headers=self._get_headers())
+        with self.instrument('DELETE', resource):
+            result = self._send('DELETE', request_path)
         return result
 
     def get_base_url(self, api=True):
@@ -166,13 +496,19 @@ class Client:
                                 primary_key=result['pk'])
         return datasource
 
-    def get_datasource(self, primary_key):
+    def get_datasource(self, primary_key, meta_variables=None):
         """Create a datasource object from information fetched from the API.
 
+        The survey meta data is fetched when the datasource first needs it,
+        so getting a datasource just to use its id is a single small request.
+
         Parameters
         ----------
         primaryKey : integer
             The primary key of the datasource.
+        meta_variables : list
+            Only fetch the meta data of these variables. Other variables
+            are fetched when tables or labels need them.
 
         Returns
         -------
@@ -183,10 +519,119 @@ class Client:
         result = self.get_request('datasource/{}'.format(primary_key))
         datasource = Datasource(client=self,
                                 meta=result,
-                                primary_key=result['pk'])
-        datasource.survey_meta = datasource.get_meta()
+                                primary_key=result['pk'],
+                                meta_variables=meta_variables)
         return datasource
 
+    def _get_meta(self, datasource, version, variables=None):
+        """A datasource's meta data, downloaded once per version.
+
+        Datasources are shared between wave tables, dashboards and so on,
+        so the meta data of the last version seen of each is kept, for the
+        META_CACHE_SIZE datasources used most recently, while the
+        datasource's modified date is unchanged. The same object is handed
+        to every datasource, so it must not be changed (see the Notes of
+        Datasource).
+
+        With ``variables`` only the meta data of those variables is
+        returned. Variables that aren't in the cache yet are fetched and
+        added to it, so each variable of a version is downloaded once.
+        """
+        if version is None:
+            return datasource.get_meta(variables)
+        primary_key = datasource.get_id()
+        with self._lock:
+            cached = self._meta_cache.get(primary_key)
+            if cached is not None and cached[0] == version:
+                self._meta_cache.move_to_end(primary_key)
+            else:
+                cached = None
+        if cached is not None:
+            meta, complete = cached[1], cached[2]
+            if complete and not variables:
+                return meta
+            missing = [] if complete else \
+                [i for i in variables or () if not has_variable(meta, i)]
+            if variables and not missing:
+                return select_meta(meta, variables)
+        if not variables:
+            meta = datasource.get_meta()
+            self._cache_meta(primary_key, version, meta, True)
+            return meta
+        if cached is None:
+            meta = datasource.get_meta(variables)
+        else:
+            meta = merge_meta(cached[1], datasource.get_meta(missing))
+        self._cache_meta(primary_key, version, meta, False)
+        return select_meta(meta, variables)
+
+    def _cache_meta(self, primary_key, version, meta, complete):
+        with self._lock:
+            cached = self._meta_cache.get(primary_key)
+            if complete or cached is None or cached[0] != version or \
+                    not cached[2]:
+                self._meta_cache[primary_key] = (version, meta, complete)
+            self._meta_cache.move_to_end(primary_key)
+            while len(self._meta_cache) > META_CACHE_SIZE:
+                self._meta_cache.popitem(last=False)
+
+    def get_wave_tables(self, primary_keys, stub, banner, views,
+                        language=None, wave_names=None, max_workers=8,
+                        deadline=None):
+        """Calculate the same table for many datasources and stack them.
+
+        Meant for trackers with a datasource per wave. The datasources and
+        their tables are fetched concurrently over the client's connection
+        pool, and the labelled tables are aligned on their labels, so codes
+        only some waves have get empty cells in the others.
+
+        Parameters
+        ----------
+        primary_keys : list
+            Primary keys of the datasources, in wave order.
+        stub : list
+            List of variables on the x axis
+        banner : list
+            List of variables on the y axis
+        views : list
+            List of view's to calculate
+        wave_names : list
+            A name for each wave. Defaults to the datasources' names, or
+            their primary keys if the names aren't unique.
+        max_workers : int
+            Number of waves to fetch at the same time.
+        deadline : float
+            Seconds all the waves may take, see Datasource.get_table_set.
+
+        Returns
+        -------
+        pandas.DataFrame
+            The combined tables of all the waves, with the wave as the
+            outermost level of the index.
+        """
+        def get_wave(primary_key):
+            datasource = self.get_datasource(primary_key)
+            table = datasource.get_tables(stub, banner, views, combine=True,
+                                          language=language)
+            if isinstance(table, dict):
+                # a single view (or block of counts and c%) isn't combined
+                table = pd.concat(list(table.values()))
+                table.index = datasource.apply_labels(table.index)
+                table.columns = datasource.apply_labels(table.columns)
+            return datasource.name, table
+
+        primary_keys = list(primary_keys)
+        with deadlines.within(deadline):
+            waves = deadlines.run_all(get_wave, primary_keys,
+                                      max(1, min(max_workers,
+                                                 len(primary_keys))))
+        if wave_names is None:
+            wave_names = [name for name, table in waves]
+            if len(set(wave_names)) < len(wave_names):
+                wave_names = primary_keys
+        return pd.concat([table for name, table in waves], keys=wave_names,
+                         names=['Wave'])
+
     def list_datasources(self):
         """Get a list of all the datasources this account has.
 
@@ -201,6 +646,63 @@ class Client:
         result = self.get_request('datasource')
         return result
 
+    def iter_datasources(self, page_size=100, fields=None, prefetch=True,
+                         **filters):
+        """Iterate over all the datasources this account has.
+
+        Pages are fetched as they are needed, and while one page is being
+        consumed the next one is fetched in the background.
+
+        Parameters
+        ----------
+        page_size : int
+            Number of datasources to fetch with each request.
+        fields : list
+            Only fetch these fields of each datasource, if the server
+            supports field selection.
+        prefetch : boolean
+            Fetch the next page in the background.
+        **filters
+            Passed to the server as query parameters, e.g. name="Wave 3".
+
+        Returns
+        -------
+        generator
+            The datasources, as JSON objects.
+
+        """
+        return self._iter_pages('datasource', page_size, fields, prefetch,
+                                filters)
+
+    def _iter_pages(self, resource, page_size, fields, prefetch, filters):
+        """Walk the pages of a paginated list, following the next links."""
+        params = dict(filters, page_size=page_size)
+        if fields is not None:
+            params['fields'] = fields
+        pool = None
+        if prefetch:
+            pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix='datasmoothie-prefetch')
+        try:
+            page = self.get_request(resource, params=params)
+            while True:
+                next_url = page.get('next')
+                next_page = None
+                if next_url and pool is not None:
+                    next_page = pool.submit(contextvars.copy_context().run,
+                                            self._get_json, next_url, resource)
+                for item in page['results']:
+                    yield item
+                if not next_url:
+                    return
+                if next_page is not None:
+                    page = next_page.result()
+                else:
+                    page = self._get_json(next_url, resource)
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=False)
+
     def create_report(self, title, global_filter="default", template="none"):
         """Create a report/dashboard in Datasmoothie.
 
@@ -239,6 +741,20 @@ class Client:
         result = self.get_request('report')
         return result
 
+    def iter_reports(self, page_size=100, fields=None, prefetch=True,
+                     **filters):
+        """Iterate over all the reports this account has.
+
+        Takes the same parameters as iter_datasources.
+
+        Returns
+        -------
+        generator
+            The reports' meta data, as JSON objects.
+
+        """
+        return self._iter_pages('report', page_size, fields, prefetch, filters)
+
     def get_report_meta(self, primary_key):
         """Met meta data for the report.
 
@@ -296,3 +812,109 @@ class Client:
         elements = self.get_report_elements(primary_key)
         report = Report(self, meta, elements['elements'], primary_key)
         return report
+
+    def get_reports(self, primary_keys, max_workers=8):
+        """Get many reports concurrently.
+
+        The meta data and the elements of every report are fetched in
+        parallel, with at most ``max_workers`` requests running at once.
+
+        Parameters
+        ----------
+        primary_keys : list
+            Primary keys of the reports.
+        max_workers : int
+            Maximum number of requests running at the same time.
+
+        Returns
+        -------
+        list
+            A datasmoothie.bulk.BulkResult for each primary key, in the
+            same order, holding either the Report or the error.
+
+        """
+        def fetch(key):
+            primary_key, part = key
+            resource = 'report' if part == 'meta' else 'reportElement'
+            request_path = "{}/{}/{}/".format(self.base_url, resource,
+                                              primary_key)
+            return self._get_json(request_path, resource,
+                                  raise_for_status=True)
+
+        primary_keys = list(primary_keys)
+        parts = run_bulk(fetch,
+                         [(primary_key, part) for primary_key in primary_keys
+                          for part in ('meta', 'elements')],
+                         max_workers=max_workers)
+        results = []
+        for primary_key, meta, elements in zip(primary_keys, parts[::2],
+                                               parts[1::2]):
+            error = meta.error or elements.error
+            if error is not None:
+                results.append(BulkResult(primary_key, error=error))
+            else:
+                report = Report(self, meta.result,
+                                elements.result['elements'], primary_key)
+                results.append(BulkResult(primary_key, result=report))
+        return results
+
+    def update_reports(self, reports, meta=True, elements=True,
+                       max_workers=8):
+        """Send the local changes of many reports to the server concurrently.
+
+        Parameters
+        ----------
+        reports : list
+            Report objects, e.g. from get_reports, that have been changed.
+        meta : boolean
+            Update each report's meta data.
+        elements : boolean
+            Update each report's elements.
+        max_workers : int
+            Maximum number of reports being updated at the same time.
+
+        Returns
+        -------
+        list
+            A datasmoothie.bulk.BulkResult for each report, keyed by its
+            primary key, holding the report or the error.
+
+        """
+        reports = list(reports)
+        by_key = {report._pk: report for report in reports}
+
+        def update(primary_key):
+            report = by_key[primary_key]
+            if meta:
+                report.update_meta(report.meta).raise_for_status()
+            if elements:
+                report.update_content(report.elements).raise_for_status()
+            return report
+
+        return run_bulk(update, [report._pk for report in reports],
+                        max_workers=max_workers)
+
+    def delete_reports(self, primary_keys, max_workers=8):
+        """Delete many reports concurrently (be careful!).
+
+        Parameters
+        ----------
+        primary_keys : list
+            Primary keys of the reports to delete.
+        max_workers : int
+            Maximum number of requests running at the same time.
+
+        Returns
+        -------
+        list
+            A datasmoothie.bulk.BulkResult for each primary key, holding the
+            server's response or the error.
+
+        """
+        def delete(primary_key):
+            resp = self.delete_request(resource='report',
+                                       primary_key=primary_key)
+            resp.raise_for_status()
+            return resp
+
+        return run_bulk(delete, primary_keys, max_workers=max_workers)
@@ -1,6 +1,82 @@
 import json
+import threading
+
 import pandas as pd
 
+from . import assembly
+from . import deadline as deadlines
+from . import decoding
+from . import delta as deltas
+from . import frames
+from . import validation
+from . import views as view_derivation
+from . import wire
+
+# bytes read from the socket at a time when streaming tables responses
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class _State:
+    """The meta data and data of a datasource at one point in time.
+
+    A state is replaced as a whole and never changed, except for adding
+    DataFrames parsed from its data, so a thread holding one sees meta data
+    and data that belong together. Meta data of None hasn't been fetched,
+    and partial meta data has only some of the variables.
+    """
+
+    __slots__ = ('meta', 'data', 'dataframes', 'partial')
+
+    def __init__(self, meta, data, partial=False):
+        self.meta = meta
+        self.data = data
+        self.dataframes = {}
+        self.partial = partial
+
+
+def has_variable(meta, variable):
+    """Whether meta data has a variable, as a column or a mask."""
+    return variable in meta.get('columns', {}) or \
+        variable in meta.get('masks', {})
+
+
+def select_meta(meta, variables):
+    """The meta data of only some variables, like the meta endpoint sends.
+
+    The columns and masks are narrowed down to the variables, the other
+    sections (lib, info, ...) are kept. ``meta`` isn't changed.
+    """
+    selected = dict(meta)
+    for section in ('columns', 'masks'):
+        if section in meta:
+            selected[section] = {name: meta[section][name]
+                                 for name in variables
+                                 if name in meta[section]}
+    return selected
+
+
+def merge_meta(meta, more):
+    """Meta data with the variables of ``more`` added to those of ``meta``.
+
+    Neither is changed.
+    """
+    merged = dict(meta)
+    for section, entries in more.items():
+        if isinstance(entries, dict) and isinstance(merged.get(section), dict):
+            merged[section] = dict(merged[section], **entries)
+        elif section not in merged:
+            merged[section] = entries
+    return merged
+
+
+def _variables(*groups):
+    """The variable names in stubs and banners, each once, without '@'."""
+    names = []
+    for group in groups:
+        names += [group] if isinstance(group, str) else list(group)
+    return [name for name in dict.fromkeys(names) if name != '@']
+
+
 class Datasource:
     """A class that represents a Datasmoothie datasource.
 
@@ -26,11 +102,22 @@ class Datasource:
     _pk : integer
         Identifier of the datasource in Datasmoothie.
 
+    Notes
+    -----
+    A Datasource can be shared between threads. ``survey_meta`` and
+    ``survey_data`` are replaced together with new objects when they are
+    downloaded or uploaded, never changed in place, so treat the meta data
+    you get as a read-only snapshot: read ``survey_meta`` once and use that
+    object rather than reading the attribute repeatedly.
+
     """
 
-    def __init__(self, client, meta, primary_key):
+    def __init__(self, client, meta, primary_key, meta_variables=None):
         """Initialise a Datasource.
 
+        The survey meta data isn't downloaded until it's first used, e.g.
+        by survey_meta, text, get_values or apply_labels.
+
         Parameters
         ----------
         client : A Datasmoothie python client.
@@ -39,11 +126,16 @@ class Datasource:
             Datasource name.
         primaryKey : type
             The primary key of the Datasource in Datasmoothie.
+        meta_variables : list
+            Only fetch the meta data of these variables. Saves time and
+            memory for wide surveys when only a few variables are used.
+            Other variables are fetched when they're used, see meta_for.
 
 
         """
-        self.survey_meta = {}
-        self.survey_data = ""
+        self._state = _State(None, "")
+        self._lock = threading.RLock()
+        self._meta_variables = meta_variables
         self.meta = meta
         self.name = meta['name']
         self._client = client
@@ -60,6 +152,95 @@ class Datasource:
 
         return pd.DataFrame(data=data, index=index, columns=columns)
 
+    def _read_table(self, resp):
+        """The DataFrame in a table response, in Arrow IPC or JSON."""
+        if wire.is_arrow(resp):
+            return wire.decode_frame(resp.content)
+        content = json.loads(resp.content)
+        return self.deserialize_dataframe(data=content['data'],
+                                          index=content['index'],
+                                          columns=content['columns'])
+
+    def _needs_meta(self, state):
+        # partial meta data is enough only when only some was asked for
+        return state.meta is None or \
+            (state.partial and self._meta_variables is None)
+
+    @property
+    def survey_meta(self):
+        state = self._state
+        if self._needs_meta(state):
+            with self._lock:
+                state = self._state
+                if self._needs_meta(state):
+                    meta = self._client._get_meta(self,
+                                                  self.meta.get('modified'),
+                                                  self._meta_variables)
+                    state = self._state = _State(
+                        meta, state.data,
+                        partial=self._meta_variables is not None)
+        return state.meta
+
+    def meta_for(self, variables):
+        """Meta data that has at least the given variables.
+
+        Once the full meta data is loaded, that is returned. Until then,
+        and for datasources opened with meta_variables, only the meta data
+        of the variables that haven't been loaded yet is fetched and added
+        to what has been, so using a few variables of a wide survey doesn't
+        download all of it.
+
+        Parameters
+        ----------
+        variables : list
+            Variable names. '@', the total, is ignored.
+
+        Returns
+        -------
+        dict
+            Quantipy meta data, with every variable the datasource has.
+
+        """
+        state = self._state
+        if state.meta is not None and not state.partial:
+            return state.meta
+        variables = _variables(variables)
+        if self._meta_variables is None and state.meta is None and \
+                not variables:
+            return self.survey_meta
+        with self._lock:
+            if self._meta_variables is not None:
+                self.survey_meta
+            state = self._state
+            meta = state.meta
+            if meta is not None and not state.partial:
+                return meta
+            missing = [name for name in variables
+                       if meta is None or not has_variable(meta, name)]
+            if not missing:
+                return meta
+            fetched = self._client._get_meta(self, self.meta.get('modified'),
+                                             missing)
+            meta = fetched if meta is None else merge_meta(meta, fetched)
+            self._state = _State(meta, state.data, partial=True)
+            return meta
+
+    @survey_meta.setter
+    def survey_meta(self, meta):
+        self._state = _State(meta, self._state.data)
+
+    @property
+    def survey_data(self):
+        return self._state.data
+
+    @survey_data.setter
+    def survey_data(self, data):
+        self._state = _State(self._state.meta, data)
+
+    @property
+    def _dataframes(self):
+        return self._state.dataframes
+
     def get_id(self):
         """Get the id of this datasource.
 
@@ -84,17 +265,23 @@ class Datasource:
         """
         return self._name
 
-    def get_meta(self):
+    def get_meta(self, variables=None):
         """Get survey meta data.
 
+        Parameters
+        ----------
+        variables : list
+            Only get the meta data of these variables.
+
         Returns
         -------
         json
             Meta data for the survey. Includes question labels etc.
 
         """
+        params = {'variables': variables} if variables else None
         resp = self._client.get_request('datasource/{}'.format(self._pk),
-                                        'meta')
+                                        'meta', params=params)
         return resp
 
     def get_variables(self, type=None):
@@ -135,36 +322,179 @@ class Datasource:
         """
         resp = self._client.get_request('datasource/{}'.format(self._pk),
                                         'meta_data')
-        self.survey_meta = resp['meta']
-        self.survey_data = resp['data']
+        self._state = _State(resp['meta'], resp['data'])
         return resp
 
-    def update_meta_and_data(self, meta, data):
+    def get_dataframe(self, delimited_sets='category', downcast_floats=False):
+        """Get the survey data as a DataFrame with compact dtypes.
+
+        The variable types in the meta data decide the dtypes: single choice
+        variables become categoricals, ints the smallest nullable int type
+        and delimited sets are stored as set by ``delimited_sets``. The data
+        is downloaded if it hasn't been, and the DataFrame is cached until
+        get_meta_and_data is called again.
+
+        If the client has a snapshot_store, the data is loaded from the
+        local snapshot while the remote datasource's modified date matches
+        it, and a new snapshot is saved when it doesn't.
+
+        Parameters
+        ----------
+        delimited_sets : string
+            category (default), bits, sparse or object. See
+            datasmoothie.frames.read_survey_data.
+        downcast_floats : boolean
+            Store float variables as float32.
+
+        Returns
+        -------
+        pandas.DataFrame
+            The survey data.
+
+        """
+        key = (delimited_sets, downcast_floats)
+        dataframe = self._dataframes.get(key)
+        if dataframe is not None:
+            return dataframe
+        # one thread downloads and parses, the others wait for its result
+        with self._lock:
+            return self._get_dataframe(key, delimited_sets, downcast_floats)
+
+    def _get_dataframe(self, key, delimited_sets, downcast_floats):
+        if key not in self._dataframes:
+            store = self._client.snapshot_store
+            if store is not None and self.survey_data == "":
+                frame = frames.convert_delimited_sets(
+                    self._get_snapshot_frame(store), self.survey_meta,
+                    delimited_sets)
+                if downcast_floats:
+                    frame = frame.astype({
+                        name: 'float32' for name in frame.columns
+                        if self.survey_meta['columns'].get(name, {}).get(
+                            'type') == 'float'})
+                self._dataframes[key] = frame
+                return frame
+            if self.survey_data == "":
+                self.get_meta_and_data()
+            state = self._state
+            state.dataframes[key] = frames.read_survey_data(
+                state.data,
+                state.meta,
+                delimited_sets=delimited_sets,
+                downcast_floats=downcast_floats)
+            return state.dataframes[key]
+        return self._dataframes[key]
+
+    def _get_snapshot_frame(self, store):
+        """The survey data from the snapshot store, refreshed if outdated.
+
+        The version is read before downloading, so data that changes while
+        it's being downloaded is stored under the older version and fetched
+        again next time.
+        """
+        version = self._client.get_request(
+            'datasource/{}'.format(self._pk)).get('modified')
+        if store.is_current(self._pk, version):
+            if not self._state.meta:
+                self.survey_meta = store.load_meta(self._pk)
+            return frames.restore_categories(store.load_data(self._pk),
+                                             self.survey_meta)
+        self.get_meta_and_data()
+        frame = frames.read_survey_data(self.survey_data, self.survey_meta)
+        store.save(self._pk, version, self.survey_meta, frame)
+        return frame
+
+    def update_meta_and_data(self, meta, data, delta=False, key=None):
         """Update the remote datasource with new meta-data and data.
 
+        With ``delta=True`` only the rows that are new or changed since the
+        last upload (or download) are sent, together with the ids of
+        removed rows and the meta data entries that changed. If this
+        datasource object hasn't seen the data yet, the client's
+        snapshot_store is used when it holds the current version, and the
+        data is downloaded otherwise. After an upload a snapshot of it is
+        saved in the store, so the next run doesn't have to download
+        anything to work out its delta.
+
         Parameters
         ----------
         meta : json object
             Meta data (in quantipy form).
         data : string
             A CSV file with the dataset's data.
+        delta : boolean
+            Send only what changed instead of replacing everything.
+        key : string
+            The respondent id variable rows are matched on, required
+            with delta=True.
 
         Returns
         -------
         type
             The Json object the API returned.
         """
-        payload = {
-            'meta': meta,
-            'data': data
-        }
-        resp = self._client.post_request('datasource/{}'.format(self._pk),
-                                         'meta_data',
-                                         data=payload
-                                         )
+        if delta:
+            if key is None:
+                raise ValueError("A delta update needs the key variable.")
+            old_meta, old_data = self._last_upload()
+            payload = deltas.diff(old_meta, old_data, meta, data, key)
+            resp = self._client.post_request('datasource/{}'.format(self._pk),
+                                             'meta_data_delta',
+                                             data=payload)
+            resp.raise_for_status()
+            rows = resp.json().get('rows')
+            if rows != payload['rows']:
+                raise ValueError(
+                    "The datasource has {} rows after the update, expected "
+                    "{}.".format(rows, payload['rows']))
+        else:
+            payload = {
+                'meta': meta,
+                'data': data
+            }
+            resp = self._client.post_request('datasource/{}'.format(self._pk),
+                                             'meta_data',
+                                             data=payload
+                                             )
+            if not resp.ok:
+                # the remote datasource is unchanged
+                return resp
+        self._state = _State(meta, data)
+        if self._client.snapshot_store is not None:
+            self._save_snapshot(meta, data, resp)
         return resp
 
-    def get_tables(self, stub, banner, views, combine=False, language=None):
+    def _last_upload(self):
+        """The meta data and data a delta update is worked out against."""
+        state = self._state
+        if state.data != "":
+            return state.meta, state.data
+        store = self._client.snapshot_store
+        if store is not None:
+            version = self._client.get_request(
+                'datasource/{}'.format(self._pk)).get('modified')
+            if store.is_current(self._pk, version):
+                meta = store.load_meta(self._pk)
+                frame = frames.restore_categories(store.load_data(self._pk),
+                                                  meta)
+                return meta, frame.to_csv(index=False)
+        resp = self.get_meta_and_data()
+        return resp['meta'], resp['data']
+
+    def _save_snapshot(self, meta, data, resp):
+        """Store the uploaded meta data and data as the current snapshot."""
+        try:
+            version = resp.json().get('modified')
+        except ValueError:
+            version = None
+        if version is None:
+            version = self._client.get_request(
+                'datasource/{}'.format(self._pk)).get('modified')
+        self._client.snapshot_store.save(
+            self._pk, version, meta, frames.read_survey_data(data, meta))
+
+    def get_tables(self, stub, banner, views, combine=False, language=None,
+                   derive=True, decoder=None, stream=False, validate=True):
         """ Calculates views for a stub/banner combination
 
         Parameters
@@ -175,81 +505,278 @@ class Datasource:
             List of variables on the y axis
         views : list
             List of view's to calculate
-            Unsupported view's are ignored.
+            Views the server doesn't return are left out.
+        derive : boolean
+            Calculate percentage views (c%, r%) locally from counts and
+            bases rather than having the server send them.
+        decoder : datasmoothie.decoding.DecodePool
+            Decode the response and build the DataFrames in a worker
+            process instead of this one.
+        stream : boolean
+            Parse the response as it arrives and build each view as soon
+            as it has been received, instead of reading the whole response
+            first. Uses much less memory for responses with many views.
+            Ignored when a decoder is given.
+        validate : boolean
+            Check the variables and views against the survey meta data
+            before sending the request.
+
+        Tables the server sends in Arrow IPC (see Client's binary
+        argument) are decoded in this process whatever the decoder and
+        stream arguments, since that only wraps the received bytes.
 
         Returns
         -------
         dict
             A dict that contains the views as keys
             and the results as Pandas DataFrames.
+
+        Raises
+        ------
+        datasmoothie.validation.ValidationError
+            If variables are unknown, listing all of them. View names
+            that aren't standard views give a UserWarning.
         """
-        payload = {
-            'stub': stub,
-            'banner': banner,
-            'views': views
-        }
-        resp = self._client.post_request(resource='datasource/{}'.format(self._pk),
-                                         action="tables",
-                                         data=payload
-                                        )
-        results = {}
-        if resp.status_code == 200:
-            content = json.loads(resp.content)
-            for view in content['results']:
-                results[view] = self.deserialize_dataframe(
-                    data=content['results'][view]['data'],
-                    index=content['results'][view]['index'],
-                    columns=content['results'][view]['columns']
-                )
-        #remove invalide views
-        views = [i for i in views if i in results.keys()]
-        if 'counts' in views:
-            results['counts'] = results['counts'].astype(int)
-        if 'c%' in views:
-            results['c%'] = results['c%'].round(1)
-
-        # to combine % and counts, we merge them row by row
-        if 'c%' in views and 'counts' in views and combine:
-            mi_pct = results['c%'].index
-            mi_counts = results['counts'].index
-            values = results['c%'].index.levels[1]
-            mi_pct = mi_pct.set_levels(level=1,
-                                   levels=["{} (%)".format(i) for i in values])
-            mi_counts = mi_counts.set_levels(level=1,
-                                   levels=["{}".format(i) for i in values])
-            results['c%'].index = mi_pct
-            results['counts'].index = mi_counts
-            results['c%'] = pd.concat([results['counts'], results['c%']]).sort_index(level=0)
-            del results['counts']
-            views.remove('counts')
-        if combine and len(views) > 1:
-            combined = results[views[0]]
-            for view in views[1:]:
-                combined = pd.concat([combined, results[view]])
-            combined.index = self.apply_labels(combined.index)
-            combined.columns = self.apply_labels(combined.columns)
-            return combined
-        else:
+        if validate:
+            validation.raise_problems(validation.check_tables(
+                self.meta_for(_variables(stub, banner)), [stub], [banner],
+                views))
+        with self._client.instrument('POST',
+                                     'datasource/{}'.format(self._pk),
+                                     'tables') as event:
+            if derive:
+                fetch, derived = view_derivation.plan_views(
+                    views, self._derivable_views(banner))
+            else:
+                fetch, derived = views, []
+            payload = {
+                'stub': stub,
+                'banner': banner,
+                'views': fetch
+            }
+            stream = stream and decoder is None
+            resp = self._client.post_request(resource='datasource/{}'.format(self._pk),
+                                             action="tables",
+                                             data=payload,
+                                             stream=stream
+                                            )
+            if resp.status_code != 200:
+                resp.raise_for_status()
+            results = {}
+            if resp.status_code == 200 and wire.is_arrow(resp):
+                with event.phase('decode'), resp:
+                    results = wire.decode_tables(resp.content)
+            elif resp.status_code == 200 and stream:
+                with event.phase('decode'), resp:
+                    results = dict(decoding.iter_tables(
+                        resp.iter_content(chunk_size=STREAM_CHUNK_SIZE)))
+            elif resp.status_code == 200 and decoder is not None:
+                with event.phase('decode'):
+                    results = decoder.decode(resp.content)
+            elif resp.status_code == 200:
+                with event.phase('decode'):
+                    content = json.loads(resp.content)
+                with event.phase('deserialize'):
+                    for view in content['results']:
+                        results[view] = self.deserialize_dataframe(
+                            data=content['results'][view]['data'],
+                            index=content['results'][view]['index'],
+                            columns=content['results'][view]['columns']
+                        )
+            with event.phase('derive'):
+                view_derivation.derive_views(results, derived)
+            #remove invalide views and the base views only fetched to derive others
+            views = [i for i in views if i in results.keys()]
+            results = {view: results[view] for view in views}
+            if 'counts' in views:
+                results['counts'] = results['counts'].astype(int)
+            if 'c%' in views:
+                results['c%'] = results['c%'].round(1)
+
+            # counts and c% are merged row by row into a single block
+            blocks = len(views) - ('counts' in views and 'c%' in views)
+            if combine and blocks > 1:
+                combined = assembly.combine_views(results, views)
+                with event.phase('labels'):
+                    combined.index = self.apply_labels(combined.index)
+                    combined.columns = self.apply_labels(combined.columns)
+                return combined
+            if combine and blocks == 1 and len(views) == 2:
+                return {'c%': assembly.combine_views(results, views)}
             return results
 
-    def get_table_set(self, stubs, banners, views, language=None):
-        table_set = []
-        for stub in stubs:
-            for banner in banners:
-                table = self.get_tables(stub,
-                                        banner,
-                                        views,
-                                        combine=True,
-                                        language=language)
-                table_set.append(table)
-        return table_set
+    def _derivable_views(self, banner):
+        """Views that can be derived locally for this banner.
+
+        Row percentages are only the sum across a banner variable's codes
+        when it is single coded, so r% is derived only when the meta data
+        is loaded and says so.
+        """
+        derivable = ['c%']
+        # don't download the meta data just to decide this
+        columns = (self._state.meta or {}).get('columns', {})
+        if isinstance(banner, str):
+            banner = [banner]
+        if all(variable == '@' or
+               columns.get(variable, {}).get('type') == 'single'
+               for variable in banner):
+            derivable.append('r%')
+        return derivable
+
+    def get_table_set(self, stubs, banners, views, language=None,
+                      max_workers=1, deadline=None, decoder=None,
+                      validate=True):
+        """ Calculates combined tables for every stub/banner combination
+
+        Parameters
+        ----------
+        stubs : list
+            List of stubs, each a list of variables on the x axis
+        banners : list
+            List of banners, each a list of variables on the y axis
+        views : list
+            List of view's to calculate
+        max_workers : int
+            Number of tables to fetch at the same time.
+        deadline : float
+            Seconds the whole table set may take. Requests get timeouts
+            from the time left, and tables not yet started when it passes
+            are cancelled and DeadlineExceeded is raised.
+        decoder : datasmoothie.decoding.DecodePool
+            Decode the responses in worker processes, so tables fetched on
+            several threads are also decoded on several cores.
+        validate : boolean
+            Check the variables and views of every table against the
+            survey meta data before requesting any of them.
+
+        Returns
+        -------
+        list
+            The combined tables, in stub then banner order.
+
+        Raises
+        ------
+        datasmoothie.validation.ValidationError
+            Before any table is requested, if variables are unknown,
+            listing all of them.
+        """
+        if validate:
+            validation.raise_problems(validation.check_tables(
+                self.meta_for(_variables(*stubs, *banners)), stubs, banners,
+                views))
+
+        def get_table(stub_and_banner):
+            return self.get_tables(stub_and_banner[0],
+                                   stub_and_banner[1],
+                                   views,
+                                   combine=True,
+                                   language=language,
+                                   decoder=decoder,
+                                   validate=False)
+
+        stubs_and_banners = [(stub, banner)
+                             for stub in stubs for banner in banners]
+        with deadlines.within(deadline):
+            if max_workers > 1:
+                return deadlines.run_all(get_table, stubs_and_banners,
+                                         max_workers)
+            return [get_table(i) for i in stubs_and_banners]
+
+    def iter_table_set(self, stubs, banners, views, language=None,
+                       max_workers=1, ordered=True, deadline=None,
+                       decoder=None, validate=True):
+        """ Calculates combined tables for every stub/banner combination,
+        yielding each table as soon as it's ready.
+
+        Unlike get_table_set the tables aren't collected in a list, and at
+        most ``max_workers`` tables are fetched ahead of the one being
+        used, so memory stays bounded however big the tab plan is. The
+        exporters (table_set_to_excel, table_set_to_csv) take the
+        generator directly, though only table_set_to_csv keeps memory
+        bounded while writing.
+
+        Parameters
+        ----------
+        stubs : list
+            List of stubs, each a list of variables on the x axis
+        banners : list
+            List of banners, each a list of variables on the y axis
+        views : list
+            List of view's to calculate
+        max_workers : int
+            Number of tables to fetch at the same time.
+        ordered : boolean
+            Yield the tables in stub then banner order. With False they
+            are yielded as they complete.
+        deadline : float
+            Seconds the whole table set may take, see get_table_set.
+        decoder : datasmoothie.decoding.DecodePool
+            Decode the responses in worker processes.
+        validate : boolean
+            Check the tab plan against the survey meta data, see
+            get_table_set.
+
+        Yields
+        ------
+        tuple
+            (stub, banner, table) for every stub/banner combination.
+
+        Raises
+        ------
+        datasmoothie.validation.ValidationError
+            Like get_table_set, when the first table is asked for.
+        """
+        if validate:
+            validation.raise_problems(validation.check_tables(
+                self.meta_for(_variables(*stubs, *banners)), stubs, banners,
+                views))
+
+        def get_table(stub_and_banner):
+            return self.get_tables(stub_and_banner[0],
+                                   stub_and_banner[1],
+                                   views,
+                                   combine=True,
+                                   language=language,
+                                   decoder=decoder,
+                                   validate=False)
+
+        stubs_and_banners = ((stub, banner)
+                             for stub in stubs for banner in banners)
+        results = deadlines.iter_all(
+            get_table, stubs_and_banners, max_workers, ordered=ordered,
+            deadline=None if deadline is None
+            else deadlines.Deadline(deadline))
+        for (stub, banner), table in results:
+            yield stub, banner, table
+
+    @staticmethod
+    def _tables_of(table_set):
+        """The tables of a table set or of iter_table_set's results."""
+        for table in table_set:
+            yield table[2] if isinstance(table, tuple) else table
 
     def table_set_to_excel(self, table_set, filename):
+        """Write a table set to an Excel file, one sheet per table.
+
+        The tables are released as they are written, but the workbook
+        holds every cell until the file is closed, so memory grows with
+        the tab plan; use table_set_to_csv for bounded memory. xlsxwriter's
+        constant_memory mode can't be used, as pandas writes each table
+        column by column and that mode drops cells of rows already flushed.
+
+        Parameters
+        ----------
+        table_set : iterable
+            Tables from get_table_set, or the generator from
+            iter_table_set, which is written as the tables arrive.
+        filename : string
+            The file to write.
+        """
         writer = pd.ExcelWriter('{}'.format(filename), engine="xlsxwriter")
         workbook = writer.book
         left_format = workbook.add_format({'align':'left'})
         left_format.set_align('left')
-        for index, table in enumerate(table_set):
+        for index, table in enumerate(self._tables_of(table_set)):
             table.to_excel(writer,
                         startrow=2,
                         sheet_name="Table {}".format(index))
@@ -258,7 +785,27 @@ class Datasource:
             datasheet.set_column(0,0,20, left_format)
             datasheet.set_column(1,1,20, left_format)
 
-        writer.save()
+        writer.close()
+
+    def table_set_to_csv(self, table_set, filename):
+        """Write a table set to one CSV file, with a blank line between tables.
+
+        Each table is written and released before the next one is taken,
+        so with iter_table_set only a few tables are in memory at a time.
+
+        Parameters
+        ----------
+        table_set : iterable
+            Tables from get_table_set, or the generator from
+            iter_table_set.
+        filename : string
+            The file to write.
+        """
+        with open(filename, 'w', newline='') as csv_file:
+            for index, table in enumerate(self._tables_of(table_set)):
+                if index > 0:
+                    csv_file.write('\n')
+                table.to_csv(csv_file)
 
     def get_table(self, stub, banner, view):
         """ Calculates a single view for a stub/banner combination
@@ -287,10 +834,7 @@ class Datasource:
                                          data=payload
                                         )
         if resp.status_code == 200:
-            content = json.loads(resp.content)
-            return self.deserialize_dataframe(data=content['data'],
-                                              index=content['index'],
-                                              columns=content['columns'])
+            return self._read_table(resp)
         else:
             return resp
 
@@ -320,10 +864,7 @@ class Datasource:
                                          data=payload
                                         )
         if resp.status_code == 200:
-            content = json.loads(resp.content)
-            return self.deserialize_dataframe(data=content['data'],
-                                              index=content['index'],
-                                              columns=content['columns'])
+            return self._read_table(resp)
         else:
             return resp
 
@@ -335,14 +876,20 @@ class Datasource:
             return self.survey_meta
 
     def apply_labels(self, index, text_key=None):
+        # the meta data of every variable in the index, fetched at once
+        meta = self.meta_for([str(t[0]) for t in index])
         if text_key is None:
-            text_key = self.get_survey_meta()['lib']['default text']
-        tuple_list = index.to_native_types()
+            text_key = meta['lib']['default text']
+        # look up each variable's labels once, not once per row
+        value_maps = {}
+        texts = {}
         new_list = []
-        for t in tuple_list:
-            code = t[1]
-            variable = t[0]
-            value_map = self.get_values(variable)
+        for t in index:
+            variable, code = str(t[0]), str(t[1])
+            if variable not in value_maps:
+                value_maps[variable] = self.get_values(variable, text_key)
+                texts[variable] = self.text(variable, text_key)
+            value_map = value_maps[variable]
             try:
                 code = int(code)
             except Exception as e:
@@ -350,16 +897,15 @@ class Datasource:
             if code in value_map.keys():
                 value = value_map[code]
             else:
-                if '%' in code:
+                if '%' in str(code):
                     value = '%'
                 else:
                     value = code
-            variable = self.text(variable)
-            new_list.append((variable, value))
+            new_list.append((texts[variable], value))
         return pd.MultiIndex.from_tuples(new_list, names=["Questions", "Values"])
 
     def get_default_language(self):
-        return self.survey_meta['lib']['default text']
+        return self.meta_for([])['lib']['default text']
 
     def text(self, name, text_key=None):
         """
@@ -377,14 +923,16 @@ class Datasource:
         text : str
             The text metadata.
         """
-        if text_key is None: text_key = self.get_survey_meta()['lib']['default text']
-        return self.get_survey_meta()['columns'][name]['text'].get(text_key, '')
+        meta = self.meta_for([name])
+        if text_key is None: text_key = meta['lib']['default text']
+        return meta['columns'][name]['text'].get(text_key, '')
 
     def get_values(self, variable, text_key=None):
+        meta = self.meta_for([variable])
         if text_key is None:
-            text_key = self.get_survey_meta()['lib']['default text']
+            text_key = meta['lib']['default text']
         mapper = {}
-        for i in self.get_survey_meta()['columns'][variable]['values']:
+        for i in meta['columns'][variable]['values']:
             mapper[i['value']] = i['text'][text_key]
         return mapper
 
@@ -442,11 +990,6 @@ class Datasource:
                                          action="sig_diff",
                                          data=payload)
         if resp.status_code == 200:
-            content = json.loads(resp.content)
-            return self.deserialize_dataframe(
-                data=content['data'],
-                index=content['index'],
-                columns=content['columns']
-            )
+            return self._read_table(resp)
         else:
             return resp
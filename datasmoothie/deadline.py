@@ -0,0 +1,210 @@
+"""Deadlines for single requests and for batches of requests.
+
+A deadline is set for a block of code with ``within``. Every request the
+client sends inside the block gets a timeout no longer than the time that
+is left, and ``run_all`` and ``iter_all`` cancel work that hasn't started
+when it runs out.
+"""
+import collections
+import contextlib
+import contextvars
+import concurrent.futures
+import time
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a deadline passes before the work is done."""
+
+
+class Deadline:
+    """A point in time by which work has to be finished.
+
+    Parameters
+    ----------
+    seconds : float
+        Seconds from now until the deadline.
+
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        """Seconds left until the deadline, never negative."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self):
+        return time.monotonic() >= self.expires_at
+
+    def timeout(self, default=None):
+        """Timeout for a request, the smaller of ``default`` and what's left.
+
+        Raises
+        ------
+        DeadlineExceeded
+            If the deadline has already passed.
+
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(
+                "Deadline of {}s exceeded.".format(self.seconds))
+        if default is None:
+            return remaining
+        return min(default, remaining)
+
+
+_current = contextvars.ContextVar('datasmoothie_deadline', default=None)
+
+
+def current():
+    """The deadline in effect, or None."""
+    return _current.get()
+
+
+@contextlib.contextmanager
+def within(seconds):
+    """Run a block of code with a deadline.
+
+    Nested deadlines can only shorten the one already in effect. Passing
+    None leaves the current deadline (if any) as it is.
+
+    Parameters
+    ----------
+    seconds : float
+        Seconds the block may take.
+
+    """
+    if seconds is None:
+        yield current()
+        return
+    deadline = Deadline(seconds)
+    outer = current()
+    if outer is not None and outer.expires_at < deadline.expires_at:
+        deadline = outer
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def run_all(function, items, max_workers):
+    """Call ``function`` on each item in a thread pool, within the deadline.
+
+    The deadline in effect is carried into the worker threads. When it
+    passes, work that hasn't started is cancelled and DeadlineExceeded is
+    raised; requests still running time out on their own since their
+    timeouts are derived from the same deadline.
+
+    Parameters
+    ----------
+    function : callable
+        Called with a single item.
+    items : list
+        The items to process.
+    max_workers : int
+        Number of threads.
+
+    Returns
+    -------
+    list
+        The return values, in the same order as ``items``.
+
+    """
+    deadline = current()
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+    futures = [pool.submit(contextvars.copy_context().run, function, item)
+               for item in items]
+    timeout = None if deadline is None else deadline.remaining()
+    done, not_done = concurrent.futures.wait(futures, timeout=timeout)
+    if not_done:
+        for future in not_done:
+            future.cancel()
+        # don't wait for running requests, their timeouts will end them
+        pool.shutdown(wait=False)
+        raise DeadlineExceeded(
+            "Deadline of {}s exceeded with {} of {} items unfinished."
+            .format(deadline.seconds, len(not_done), len(items)))
+    pool.shutdown()
+    return [future.result() for future in futures]
+
+
+def iter_all(function, items, max_workers, ordered=True, deadline=None):
+    """Call ``function`` on each item in a thread pool, yielding results.
+
+    Unlike run_all, results are yielded as they become available and only
+    ``max_workers`` items are submitted at a time: a new item is started
+    when a result is taken. Items that are finished but can't be yielded
+    yet because an earlier one is still running count towards the limit,
+    so at most ``max_workers`` results are held at any time.
+
+    Parameters
+    ----------
+    function : callable
+        Called with a single item.
+    items : iterable
+        The items to process, read as they are needed.
+    max_workers : int
+        Number of threads, and of items in progress at a time.
+    ordered : boolean
+        Yield the results in the order of ``items``, rather than as they
+        complete.
+    deadline : Deadline
+        Deadline for all the items, by default the one in effect.
+
+    Yields
+    ------
+    tuple
+        (item, result) for every item.
+
+    """
+    if deadline is None:
+        deadline = current()
+    items = iter(items)
+
+    def run(item):
+        if deadline is not None:
+            _current.set(deadline)
+        return function(item)
+
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+    pending = collections.OrderedDict()
+
+    def fill():
+        while len(pending) < max_workers:
+            try:
+                item = next(items)
+            except StopIteration:
+                return
+            future = pool.submit(contextvars.copy_context().run, run, item)
+            pending[future] = item
+
+    try:
+        fill()
+        while pending:
+            timeout = None if deadline is None else deadline.remaining()
+            if ordered:
+                waiting = [next(iter(pending))]
+            else:
+                waiting = list(pending)
+            done, not_done = concurrent.futures.wait(
+                waiting, timeout=timeout,
+                return_when=concurrent.futures.FIRST_COMPLETED)
+            if not done:
+                raise DeadlineExceeded(
+                    "Deadline of {}s exceeded with {} items unfinished."
+                    .format(deadline.seconds, len(pending)))
+            future = waiting[0] if ordered else \
+                next(future for future in pending if future in done)
+            item = pending.pop(future)
+            result = future.result()
+            fill()
+            yield item, result
+    finally:
+        for future in pending:
+            future.cancel()
+        # don't wait for running requests, their timeouts will end them
+        pool.shutdown(wait=False)
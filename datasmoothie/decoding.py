@@ -0,0 +1,327 @@
+"""Decode tables responses into DataFrames.
+
+Parsing a large ``tables`` response and building its DataFrames holds the
+GIL, so fetching tables on many threads still decodes them one at a time.
+A ``DecodePool`` does that work in separate processes. The values of each
+view come back through shared memory and only the (small) index and column
+labels are pickled::
+
+    with DecodePool(4) as pool:
+        tables = datasource.get_table_set(stubs, banners, views,
+                                          max_workers=8, decoder=pool)
+
+``iter_tables`` instead parses a response as it arrives, building each
+view's DataFrame as soon as that view has been received, so only one view
+is held as text at a time.
+"""
+import codecs
+import concurrent.futures
+import json
+import multiprocessing
+import re
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+
+def decode_tables(content):
+    """Build a DataFrame for each view in a tables response.
+
+    Parameters
+    ----------
+    content : bytes or string
+        The body of the response, with each view serialized with
+        orient='split'.
+
+    Returns
+    -------
+    dict
+        A DataFrame for each view, with MultiIndex rows and columns.
+
+    """
+    results = json.loads(content)['results']
+    return {view: pd.DataFrame(
+                data=result['data'],
+                index=pd.MultiIndex.from_tuples(result['index']),
+                columns=pd.MultiIndex.from_tuples(result['columns']))
+            for view, result in results.items()}
+
+
+def _share(frame):
+    """Describe a frame, with its values copied to a shared memory block.
+
+    Frames with mixed or non-numeric column types are returned as they are
+    and pickled instead.
+    """
+    dtypes = set(frame.dtypes)
+    dtype = dtypes.pop() if len(dtypes) == 1 else None
+    if not isinstance(dtype, np.dtype) or dtype.kind not in 'biuf' \
+            or frame.size == 0:
+        return frame
+    block = shared_memory.SharedMemory(create=True,
+                                       size=frame.size * dtype.itemsize)
+    try:
+        values = np.ndarray(frame.shape, dtype=dtype, buffer=block.buf)
+        values[:] = frame.to_numpy()
+        del values
+        return {'name': block.name,
+                'shape': frame.shape,
+                'dtype': dtype.str,
+                'index': frame.index.tolist(),
+                'columns': frame.columns.tolist()}
+    finally:
+        block.close()
+
+
+def _decode_shared(content):
+    return {view: _share(frame)
+            for view, frame in decode_tables(content).items()}
+
+
+def _unshare(shared):
+    if isinstance(shared, pd.DataFrame):
+        return shared
+    block = shared_memory.SharedMemory(name=shared['name'])
+    try:
+        values = np.ndarray(shared['shape'], dtype=np.dtype(shared['dtype']),
+                            buffer=block.buf).copy()
+    finally:
+        block.close()
+        block.unlink()
+    return pd.DataFrame(values,
+                        index=pd.MultiIndex.from_tuples(shared['index']),
+                        columns=pd.MultiIndex.from_tuples(shared['columns']))
+
+
+class DecodePool:
+    """A pool of processes that decode tables responses.
+
+    Parameters
+    ----------
+    processes : int
+        Number of worker processes, by default the number of CPUs.
+
+    The workers are started with the spawn method, so they're safe to use
+    alongside the client's threads; starting them takes a moment, which
+    is why a pool is meant to be reused for a whole table set.
+    """
+
+    def __init__(self, processes=None):
+        self._executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context('spawn'))
+
+    def decode(self, content):
+        """Like decode_tables, but done in one of the worker processes."""
+        shared = self._executor.submit(_decode_shared, content).result()
+        results = {}
+        try:
+            for view in list(shared):
+                results[view] = _unshare(shared.pop(view))
+        finally:
+            for remaining in shared.values():
+                if not isinstance(remaining, pd.DataFrame):
+                    _unlink(remaining['name'])
+        return results
+
+    def close(self):
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _unlink(name):
+    try:
+        block = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    block.close()
+    block.unlink()
+
+
+_STRUCTURE = re.compile(r'[\[\]{}"]')
+_STRING = re.compile(r'["\\]')
+_PRIMITIVE_END = re.compile(r'[,}\]\s]')
+_SPACE = re.compile(r'\s*')
+
+
+class _ContainerScanner:
+    """Finds the end of a JSON object or array that arrives in pieces."""
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+
+    def scan(self, text, pos=0):
+        """The index just past the end of the value, or None if not in text.
+
+        The scanner keeps its state between calls, so each piece of text
+        is scanned once.
+        """
+        while True:
+            if self.escape:
+                if pos >= len(text):
+                    return None
+                self.escape = False
+                pos += 1
+            if self.in_string:
+                match = _STRING.search(text, pos)
+                if match is None:
+                    return None
+                pos = match.end()
+                if match.group() == '\\':
+                    self.escape = True
+                else:
+                    self.in_string = False
+                continue
+            match = _STRUCTURE.search(text, pos)
+            if match is None:
+                return None
+            pos = match.end()
+            char = match.group()
+            if char == '"':
+                self.in_string = True
+            elif char in '[{':
+                self.depth += 1
+            else:
+                self.depth -= 1
+                if self.depth == 0:
+                    return pos
+
+
+class _Reader:
+    """Reads JSON tokens and values from chunks of UTF-8 bytes."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self.text = ''
+        self.pos = 0
+
+    def _next_text(self):
+        for chunk in self._chunks:
+            text = self._decoder.decode(chunk)
+            if text:
+                return text
+        return self._decoder.decode(b'', final=True) or None
+
+    def _more(self):
+        text = self._next_text()
+        if text is None:
+            raise ValueError("The response ended in the middle of the JSON.")
+        self.text = self.text[self.pos:] + text
+        self.pos = 0
+
+    def peek(self):
+        """The next character that isn't whitespace."""
+        while True:
+            self.pos = _SPACE.match(self.text, self.pos).end()
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            self._more()
+
+    def expect(self, chars):
+        char = self.peek()
+        if char not in chars:
+            raise ValueError("Expected one of {!r} at {!r}.".format(
+                chars, self.text[self.pos:self.pos + 20]))
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decode the next value, reading only as much as it needs."""
+        char = self.peek()
+        if char == '"':
+            while True:
+                try:
+                    value, self.pos = self._json.raw_decode(self.text,
+                                                            self.pos)
+                    return value
+                except json.JSONDecodeError:
+                    self._more()
+        if char not in '[{':
+            while _PRIMITIVE_END.search(self.text, self.pos) is None:
+                self._more()
+            value, self.pos = self._json.raw_decode(self.text, self.pos)
+            return value
+        scanner = _ContainerScanner()
+        end = scanner.scan(self.text, self.pos)
+        if end is not None:
+            value = json.loads(self.text[self.pos:end])
+            self.pos = end
+            return value
+        parts = [self.text[self.pos:]]
+        self.text, self.pos = '', 0
+        while end is None:
+            text = self._next_text()
+            if text is None:
+                raise ValueError(
+                    "The response ended in the middle of the JSON.")
+            end = scanner.scan(text)
+            parts.append(text if end is None else text[:end])
+        self.text, self.pos = text, end
+        text = ''.join(parts)
+        del parts
+        return json.loads(text)
+
+    def items(self):
+        """Decode the keys of an object, leaving each value to the caller.
+
+        Yields each key once the reader is positioned at its value.
+        """
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            yield key
+            if self.expect(',}') == '}':
+                return
+
+
+def iter_views(chunks):
+    """Parse the views of a tables response one at a time.
+
+    Parameters
+    ----------
+    chunks : iterable
+        The body of the response as chunks of bytes, e.g. from
+        requests.Response.iter_content.
+
+    Yields
+    ------
+    tuple
+        (view, result) for each view in the results object, where result
+        is the view's dict with data, index and columns.
+
+    """
+    reader = _Reader(chunks)
+    for key in reader.items():
+        if key != 'results':
+            reader.value()
+            continue
+        for view in reader.items():
+            yield view, reader.value()
+
+
+def iter_tables(chunks):
+    """Build the DataFrame of each view as soon as it has been received.
+
+    Takes the same argument as iter_views and yields (view, DataFrame).
+    """
+    for view, result in iter_views(chunks):
+        frame = pd.DataFrame(
+            data=result.pop('data'),
+            index=pd.MultiIndex.from_tuples(result['index']),
+            columns=pd.MultiIndex.from_tuples(result['columns']))
+        del result
+        yield view, frame
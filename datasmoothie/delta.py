@@ -0,0 +1,157 @@
+"""Work out what changed between two versions of a datasource.
+
+A delta holds the rows that are new or changed, the respondent ids of rows
+that were removed and the meta data entries that changed, so a daily update
+of a large tracker only has to send the new interviews::
+
+    delta = diff(old_meta, old_data, meta, data, key='id')
+    apply(old_meta, old_data, delta)  # == (meta, data)
+"""
+import io
+
+import pandas as pd
+
+
+def _read(data):
+    if isinstance(data, str):
+        return pd.read_csv(io.StringIO(data), float_precision='round_trip')
+    return data
+
+
+def _keyed(frame, key):
+    if key not in frame.columns:
+        raise ValueError("The data has no {} column.".format(key))
+    frame = frame.set_index(key, drop=False)
+    if not frame.index.is_unique:
+        raise ValueError("The {} column has duplicate values.".format(key))
+    return frame
+
+
+def diff_data(old, new, key):
+    """The rows of ``new`` that aren't in ``old`` or differ from it.
+
+    Parameters
+    ----------
+    old : string or pandas.DataFrame
+        The data as last uploaded, as CSV or a DataFrame.
+    new : string or pandas.DataFrame
+        The data to upload.
+    key : string
+        The variable with the respondent id.
+
+    Returns
+    -------
+    tuple
+        (changed, removed): a DataFrame with the new and changed rows and
+        a list of the ids of the rows that are in old but not in new.
+
+    """
+    old = _keyed(_read(old), key)
+    new = _keyed(_read(new), key)
+    common = new.index.intersection(old.index)
+    before = old.loc[common].reindex(columns=new.columns)
+    after = new.loc[common]
+    same = ((before == after) | (before.isna() & after.isna())).all(axis=1)
+    changed = new.index.difference(old.index, sort=False).append(
+        same.index[~same.to_numpy()])
+    changed = new.index[new.index.isin(changed)]
+    removed = old.index.difference(new.index, sort=False)
+    return new.loc[changed].reset_index(drop=True), removed.tolist()
+
+
+def diff_meta(old, new):
+    """The entries of the meta data sections that changed.
+
+    Returns
+    -------
+    dict
+        ``changed`` maps each section (columns, masks, sets, lib, ...) to
+        its new or changed entries and ``removed`` to the names of the
+        entries that are gone. Both are empty if nothing changed.
+
+    """
+    changed = {}
+    removed = {}
+    for section in set(old) | set(new):
+        before = old.get(section)
+        after = new.get(section)
+        if before == after:
+            continue
+        if isinstance(before, dict) and isinstance(after, dict):
+            entries = {name: value for name, value in after.items()
+                       if before.get(name) != value}
+            if entries:
+                changed[section] = entries
+            gone = [name for name in before if name not in after]
+            if gone:
+                removed[section] = gone
+        elif section not in new:
+            removed[section] = None
+        else:
+            changed[section] = after
+    return {'changed': changed, 'removed': removed}
+
+
+def diff(old_meta, old_data, meta, data, key):
+    """The delta that turns the old meta data and data into the new.
+
+    Returns
+    -------
+    dict
+        The payload for the meta_data_delta endpoint: ``key``, ``meta``
+        (see diff_meta), ``data`` (CSV of new and changed rows),
+        ``removed`` (ids of removed rows) and ``rows``, the number of
+        rows the datasource should have after the update.
+
+    """
+    new = _read(data)
+    changed, removed = diff_data(old_data, new, key)
+    return {
+        'key': key,
+        'meta': diff_meta(old_meta, meta),
+        'data': changed.to_csv(index=False),
+        'removed': removed,
+        'rows': len(new)
+    }
+
+
+def apply_meta(meta, changes):
+    """Apply a diff_meta result to meta data, returning the new meta."""
+    meta = dict(meta)
+    for section, names in changes['removed'].items():
+        if names is None:
+            meta.pop(section, None)
+        else:
+            meta[section] = {name: value
+                             for name, value in meta[section].items()
+                             if name not in names}
+    for section, entries in changes['changed'].items():
+        if isinstance(entries, dict) and isinstance(meta.get(section), dict):
+            meta[section] = dict(meta[section], **entries)
+        else:
+            meta[section] = entries
+    return meta
+
+
+def apply(meta, data, delta):
+    """Apply a delta to meta data and CSV data.
+
+    Changed rows are updated in place and new rows appended, so the row
+    order of the data is kept. The columns are those of the delta's data,
+    which always has the full header.
+
+    Returns
+    -------
+    tuple
+        (meta, data) with the data as CSV.
+
+    """
+    key = delta['key']
+    old = _keyed(_read(data), key)
+    rows = _keyed(_read(delta['data']), key)
+    old = old.drop(index=delta['removed'], errors='ignore')
+    order = old.index.append(rows.index.difference(old.index, sort=False))
+    frame = pd.concat([old.drop(index=rows.index, errors='ignore'), rows])
+    frame = frame.reindex(index=order, columns=rows.columns)
+    return (apply_meta(meta, delta['meta']),
+            frame.reset_index(drop=True).to_csv(index=False))
@@ -0,0 +1,231 @@
+"""The elements of a report, indexed by rowid.
+
+A report's elements (charts, texts, images, ...) are dicts with a
+``rowid`` that identifies them and a ``position`` that orders them, from
+1. Charts laid out next to each other have ``Data.hasOnLeft`` set on all
+but the first chart of the row. ``ElementCollection`` keeps the elements
+in position order with an index by rowid, so looking an element up by
+rowid or position takes constant time, and keeps the positions and rows
+consistent as elements are inserted, moved and removed::
+
+    elements = ElementCollection(report.elements)
+    elements.move(rowid, 1)
+    del elements[elements.index_of(other_rowid)]
+
+Element dicts are never changed in place. Giving an element a new position
+or layout replaces it with an updated copy, so a copy of a collection, and
+any element read from one, keeps its values whatever happens to the
+collection it came from.
+"""
+import threading
+import time
+from collections.abc import MutableSequence
+
+_rowid_lock = threading.Lock()
+_last_rowid = 0
+
+
+def next_rowid():
+    """A new rowid: the time in milliseconds, made unique in this process.
+
+    Rowids handed out in the same millisecond are the following integers,
+    so adding many charts at once doesn't give any two the same rowid.
+    """
+    global _last_rowid
+    with _rowid_lock:
+        _last_rowid = max(int(time.time() * 1000), _last_rowid + 1)
+        return _last_rowid
+
+
+def _has_on_left(element):
+    return bool((element.get('Data') or {}).get('hasOnLeft'))
+
+
+def _placed(element, position, has_on_left=None):
+    """The element with the given position and hasOnLeft, copied if needed."""
+    if element.get('position') != position:
+        element = dict(element, position=position)
+    if has_on_left is not None and _has_on_left(element) != has_on_left:
+        element = dict(element, Data=dict(element.get('Data') or {},
+                                          hasOnLeft=has_on_left))
+    return element
+
+
+class ElementCollection(MutableSequence):
+    """The elements of a report, in position order.
+
+    Parameters
+    ----------
+    elements : iterable
+        Element dicts. They are sorted by their position, if they all have
+        one, and numbered from 1.
+
+    Lookups by rowid (get, index_of, ``in``) and by position take constant
+    time. Inserting, moving and removing renumber the elements after the
+    change. An element that starts a row keeps starting one: when it is
+    removed or moved away, the next element loses its hasOnLeft, and the
+    first element never has it.
+    """
+
+    def __init__(self, elements=()):
+        elements = list(elements)
+        if all('position' in i for i in elements):
+            elements.sort(key=lambda i: i['position'])
+        self._elements = elements
+        self._by_rowid = {}
+        self._renumber(0)
+
+    def _renumber(self, start, row_start=None, stop=None):
+        """Set the positions from ``start`` on and update the index.
+
+        The element at ``row_start``, and the first element, lose their
+        hasOnLeft. Elements from ``stop`` on are known to be in place.
+        """
+        stop = len(self._elements) if stop is None else stop
+        for index in range(start, stop):
+            old = self._elements[index]
+            element = _placed(old, index + 1,
+                              False if index in (0, row_start) else None)
+            self._elements[index] = element
+            rowid = element.get('rowid')
+            # with duplicate rowids from the server the first one is indexed
+            if rowid is not None and self._by_rowid.get(rowid, old) is old:
+                self._by_rowid[rowid] = element
+
+    def _check_rowid(self, element, replacing=None):
+        rowid = element.get('rowid')
+        if rowid is not None and rowid in self._by_rowid and \
+                self._by_rowid[rowid] is not replacing:
+            raise ValueError("An element with rowid {} is already in the "
+                             "report.".format(rowid))
+
+    def _unindex(self, element):
+        rowid = element.get('rowid')
+        if rowid is not None and self._by_rowid.get(rowid) is element:
+            del self._by_rowid[rowid]
+
+    def __len__(self):
+        return len(self._elements)
+
+    def __iter__(self):
+        return iter(self._elements)
+
+    def __getitem__(self, index):
+        return self._elements[index]
+
+    def __setitem__(self, index, element):
+        if isinstance(index, slice):
+            raise TypeError("Elements can't be set by slice.")
+        old = self._elements[index]
+        self._check_rowid(element, replacing=old)
+        self._unindex(old)
+        index = range(len(self._elements))[index]
+        self._elements[index] = element
+        self._renumber(index)
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            for i in sorted(range(len(self._elements))[index], reverse=True):
+                del self[i]
+            return
+        index = range(len(self._elements))[index]
+        element = self._elements.pop(index)
+        self._unindex(element)
+        # the next element now starts the row this one started
+        self._renumber(index, None if _has_on_left(element) else index)
+
+    def insert(self, index, element):
+        """Insert an element before ``index``, renumbering those after it.
+
+        Raises
+        ------
+        ValueError
+            If the collection already has an element with its rowid.
+
+        """
+        self._check_rowid(element)
+        index = min(max(index if index >= 0 else len(self) + index, 0),
+                    len(self))
+        self._elements.insert(index, element)
+        self._renumber(index)
+
+    def __contains__(self, element):
+        rowid = element.get('rowid') if isinstance(element, dict) else None
+        return rowid is not None and \
+            self._by_rowid.get(rowid) is not None and \
+            self._by_rowid[rowid] == element
+
+    def __eq__(self, other):
+        if isinstance(other, ElementCollection):
+            other = other._elements
+        return self._elements == other
+
+    def __repr__(self):
+        return "ElementCollection({!r})".format(self._elements)
+
+    def get(self, rowid, default=None):
+        """The element with a rowid, or ``default``."""
+        return self._by_rowid.get(rowid, default)
+
+    def index_of(self, rowid):
+        """The index (position - 1) of the element with a rowid.
+
+        Raises
+        ------
+        KeyError
+            If there is no element with the rowid.
+
+        """
+        return self._by_rowid[rowid]['position'] - 1
+
+    def at_position(self, position):
+        """The element at a position, counting from 1."""
+        if position < 1:
+            raise IndexError("Positions start at 1.")
+        return self._elements[position - 1]
+
+    def move(self, rowid, position):
+        """Move the element with a rowid to a position, counting from 1.
+
+        The element keeps its own hasOnLeft, so it joins the row of the
+        element before it if it was on the right of another chart. Only
+        the elements between its old and new position are renumbered.
+        """
+        index = self.index_of(rowid)
+        target = min(max(position, 1), len(self)) - 1
+        if target == index:
+            return
+        element = self._elements.pop(index)
+        self._elements.insert(target, element)
+        # only the elements between the old and new place change position
+        stop = max(index, target) + 1
+        row_start = None
+        if not _has_on_left(element):
+            row_start = index + 1 if target < index else index
+            stop = min(max(stop, row_start + 1), len(self))
+        self._renumber(min(index, target), row_start, stop)
+
+    def remove_rowid(self, rowid):
+        """Remove the element with a rowid and return it."""
+        index = self.index_of(rowid)
+        element = self._elements[index]
+        del self[index]
+        return element
+
+    def new_rowid(self):
+        """A rowid that no element in the collection has."""
+        rowid = next_rowid()
+        while rowid in self._by_rowid:
+            rowid = next_rowid()
+        return rowid
+
+    def copy(self):
+        """A new collection with the same elements."""
+        collection = ElementCollection.__new__(ElementCollection)
+        collection._elements = list(self._elements)
+        collection._by_rowid = dict(self._by_rowid)
+        return collection
+
+    def to_list(self):
+        """The elements as a list, e.g. to send to the API."""
+        return list(self._elements)
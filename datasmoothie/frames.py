@@ -0,0 +1,255 @@
+"""Parse survey data into compactly typed pandas DataFrames.
+
+pandas reads single choice answers as float64 and delimited sets as Python
+strings, which is wasteful for wide surveys. ``read_survey_data`` uses the
+variable types in the Quantipy meta data instead:
+
+- single: a categorical with the codes in the meta as categories
+- int: the smallest nullable integer type that fits the values
+- float: float64, or float32 with ``downcast_floats=True``
+- delimited set: see the ``delimited_sets`` argument of read_survey_data
+"""
+import io
+
+import numpy as np
+import pandas as pd
+
+DELIMITED_SET_FORMATS = ('category', 'bits', 'sparse', 'object')
+
+INT_TYPES = [('Int8', np.int8), ('Int16', np.int16), ('Int32', np.int32),
+             ('Int64', np.int64)]
+
+BIT_TYPES = [(8, np.uint8), (16, np.uint16), (32, np.uint32), (64, np.uint64)]
+
+
+def _codes(meta, variable):
+    return [value['value'] for value in meta['columns'][variable]['values']]
+
+
+def read_survey_data(data, meta, delimited_sets='category',
+                     downcast_floats=False):
+    """Read survey data with dtypes taken from the meta data.
+
+    Parameters
+    ----------
+    data : string or file-like
+        The data as CSV.
+    meta : dict
+        Quantipy meta data describing the variables in the data.
+    delimited_sets : string
+        How to store delimited sets (multiple choice answers like "1;3;"):
+        ``category`` keeps the answer strings as a categorical, ``bits``
+        packs the chosen codes into an unsigned integer with one bit per
+        code, ``sparse`` expands each delimited set into one sparse boolean
+        column per code named "{variable}_{code}", and ``object`` leaves
+        them as strings.
+    downcast_floats : boolean
+        Store float variables as float32.
+
+    Returns
+    -------
+    pandas.DataFrame
+
+    """
+    if delimited_sets not in DELIMITED_SET_FORMATS:
+        raise ValueError("delimited_sets must be one of {}.".format(
+            ", ".join(DELIMITED_SET_FORMATS)))
+    if isinstance(data, str):
+        data = io.StringIO(data)
+    columns = meta['columns']
+    read_types = {}
+    for name, variable in columns.items():
+        if variable['type'] == 'single':
+            read_types[name] = 'float32'
+        elif variable['type'] in ('int', 'float'):
+            read_types[name] = 'float64'
+        elif variable['type'] == 'delimited set':
+            read_types[name] = object
+    # round_trip, so the floats are exactly those in the CSV
+    frame = pd.read_csv(data, dtype=read_types, float_precision='round_trip')
+    converted = {}
+    for name in frame.columns:
+        if name not in columns:
+            continue
+        variable_type = columns[name]['type']
+        if variable_type == 'single':
+            converted[name] = to_categorical(frame[name], _codes(meta, name))
+        elif variable_type == 'int':
+            converted[name] = to_smallest_int(frame[name])
+        elif variable_type == 'float' and downcast_floats:
+            converted[name] = frame[name].astype('float32')
+        elif variable_type == 'delimited set':
+            converted[name] = convert_delimited_set(
+                frame[name], _codes(meta, name), delimited_sets)
+    return _replace_columns(frame, converted)
+
+
+def _replace_columns(frame, converted):
+    """Put converted columns in place, expanding DataFrames in position."""
+    for name, column in converted.items():
+        if isinstance(column, pd.DataFrame):
+            position = frame.columns.get_loc(name)
+            frame = pd.concat([frame.iloc[:, :position], column,
+                               frame.iloc[:, position + 1:]], axis=1)
+        else:
+            frame[name] = column
+    return frame
+
+
+def convert_delimited_sets(frame, meta, format):
+    """Convert the delimited sets of a frame read with format='category'.
+
+    Parameters
+    ----------
+    frame : pandas.DataFrame
+        Survey data from read_survey_data with the default format.
+    meta : dict
+        Quantipy meta data.
+    format : string
+        category, bits, sparse or object, see read_survey_data.
+
+    Returns
+    -------
+    pandas.DataFrame
+
+    """
+    if format == 'category':
+        return frame
+    converted = {}
+    for name in frame.columns:
+        if meta['columns'].get(name, {}).get('type') == 'delimited set':
+            converted[name] = convert_delimited_set(
+                frame[name].astype(object), _codes(meta, name), format)
+    return _replace_columns(frame.copy(), converted)
+
+
+def restore_categories(frame, meta):
+    """Turn single choice columns back into categoricals of the meta codes.
+
+    Parquet keeps string categories but stores integer ones as plain
+    integers, so frames read back from Parquet need this.
+    """
+    for name in frame.columns:
+        variable = meta['columns'].get(name, {})
+        if variable.get('type') == 'single' and \
+                not isinstance(frame[name].dtype, pd.CategoricalDtype):
+            frame[name] = to_categorical(frame[name], _codes(meta, name))
+    return frame
+
+
+def to_categorical(column, codes):
+    """Convert single choice answers to a categorical of the meta codes.
+
+    Codes found in the data but not in the meta are added as categories
+    rather than lost.
+    """
+    categories = pd.Index(codes, dtype='float64')
+    observed = pd.unique(column.dropna())
+    extra = np.setdiff1d(observed, categories.to_numpy())
+    if len(extra):
+        categories = categories.append(pd.Index(extra))
+    positions = categories.get_indexer(column.to_numpy(dtype='float64'))
+    categories = categories.astype('int64') \
+        if (categories == categories.astype('int64')).all() else categories
+    return pd.Series(pd.Categorical.from_codes(positions, categories),
+                     index=column.index, name=column.name)
+
+
+def to_smallest_int(column):
+    """Convert a float column of whole numbers to the smallest nullable int.
+
+    Columns with fractions are returned unchanged.
+    """
+    values = column.dropna()
+    if len(values) and not (values == values.round()).all():
+        return column
+    low = values.min() if len(values) else 0
+    high = values.max() if len(values) else 0
+    for name, numpy_type in INT_TYPES:
+        info = np.iinfo(numpy_type)
+        if info.min <= low and high <= info.max:
+            return column.astype(name)
+    return column
+
+
+def _explode_codes(column, codes):
+    """Positions of the chosen codes, as (row, code position) arrays.
+
+    Codes found in the data but not in ``codes`` are added at the end, and
+    the extended list of codes is returned too.
+    """
+    exploded = column.str.split(';').explode()
+    exploded = exploded[exploded.notna() & (exploded != '')]
+    rows = column.index.get_indexer(exploded.index)
+    labels = pd.Index([str(code) for code in codes])
+    observed = pd.unique(exploded)
+    extra = [code for code in observed if code not in labels]
+    for code in extra:
+        codes.append(int(code) if code.lstrip('-').isdigit() else code)
+    labels = labels.append(pd.Index(extra)) if extra else labels
+    return rows, labels.get_indexer(exploded.to_numpy()), codes
+
+
+def convert_delimited_set(column, codes, format='category'):
+    """Convert the answer strings of a delimited set to a compact form.
+
+    Parameters
+    ----------
+    column : pandas.Series
+        Answers such as "1;3;".
+    codes : list
+        The codes in the meta data, which set the bit and column order.
+    format : string
+        category, bits, sparse or object, see read_survey_data.
+
+    Returns
+    -------
+    pandas.Series or pandas.DataFrame
+        A DataFrame for the sparse format, otherwise a Series. The bits
+        format falls back to sparse for sets with more than 64 codes.
+
+    """
+    if format == 'object':
+        return column
+    if format == 'category':
+        return column.astype('category')
+    codes = list(codes)
+    if not column.index.is_unique:
+        column = column.reset_index(drop=True)
+    rows, positions, codes = _explode_codes(column, codes)
+    if format == 'bits' and len(codes) <= 64:
+        numpy_type = next(t for bits, t in BIT_TYPES if len(codes) <= bits)
+        values = np.zeros(len(column), dtype=numpy_type)
+        np.bitwise_or.at(values, rows,
+                         np.left_shift(numpy_type(1),
+                                       positions.astype(numpy_type)))
+        return pd.Series(values, index=column.index, name=column.name)
+    dense = np.zeros((len(column), len(codes)), dtype=bool)
+    dense[rows, positions] = True
+    return pd.DataFrame({
+        "{}_{}".format(column.name, code): pd.arrays.SparseArray(
+            dense[:, index], fill_value=False)
+        for index, code in enumerate(codes)}, index=column.index)
+
+
+def unpack_bits(column, codes):
+    """Expand a delimited set stored as bits into boolean columns.
+
+    Parameters
+    ----------
+    column : pandas.Series
+        A delimited set converted with format='bits'.
+    codes : list
+        The codes in the same order as when the bits were packed.
+
+    Returns
+    -------
+    pandas.DataFrame
+        One boolean column per code, named "{variable}_{code}".
+
+    """
+    values = column.to_numpy()
+    return pd.DataFrame({
+        "{}_{}".format(column.name, code):
+            (values >> values.dtype.type(index)) & 1 == 1
+        for index, code in enumerate(codes)}, index=column.index)
@@ -0,0 +1,263 @@
+"""Timings and counters for requests made through a Client.
+
+Hooks are plain callables that receive a ``RequestEvent`` once a request
+(or a higher level call like ``Datasource.get_tables``) has finished::
+
+    metrics = MetricsAggregator()
+    client = Client(api_key, hooks=[metrics])
+    datasource.get_tables(...)
+    metrics.summary()
+
+When a client has no hooks nothing is timed and no events are created.
+"""
+import bisect
+import contextlib
+import contextvars
+import re
+import threading
+import time
+
+
+class RequestEvent:
+    """What happened during one call to the API.
+
+    Attributes
+    ----------
+    method : string
+        HTTP method.
+    resource : string
+        Resource with primary keys removed, e.g. datasource.
+    action : string
+        Action on the resource, e.g. tables.
+    status_code : int
+        Status of the last response, None if no response was received.
+    bytes_sent : int
+        Size of the request bodies sent, including retries.
+    bytes_received : int
+        Size of the response bodies received, including retries.
+    retries : int
+        Number of times the request was sent again.
+    cache_hit : boolean
+        Whether the result came from a cache rather than the server.
+    timings : dict
+        Seconds spent in each phase, e.g. network, decode, deserialize,
+        labels and total.
+    error : Exception
+        The exception raised, if the call failed.
+
+    """
+
+    def __init__(self, method, resource, action=''):
+        self.method = method
+        self.resource = normalize_resource(resource)
+        self.action = action or ''
+        self.status_code = None
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.retries = 0
+        self.cache_hit = False
+        self.timings = {}
+        self.error = None
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Time a block of code as part of phase ``name``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_timing(name, time.perf_counter() - start)
+
+    def add_timing(self, name, seconds):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def __repr__(self):
+        return "RequestEvent({} {}/{} status={} timings={})".format(
+            self.method, self.resource, self.action, self.status_code,
+            {k: round(v, 4) for k, v in self.timings.items()})
+
+
+class _NullEvent:
+    """Stands in for RequestEvent when no hooks are registered."""
+
+    _nullcontext = contextlib.nullcontext()
+
+    def phase(self, name):
+        return self._nullcontext
+
+    def add_timing(self, name, seconds):
+        pass
+
+    def __bool__(self):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+NULL_EVENT = _NullEvent()
+
+_current_event = contextvars.ContextVar('datasmoothie_event', default=None)
+
+
+def current_event():
+    """The event being recorded in this context, or NULL_EVENT."""
+    event = _current_event.get()
+    return NULL_EVENT if event is None else event
+
+
+@contextlib.contextmanager
+def record(hooks, method, resource, action=''):
+    """Record an event for a block of code and pass it to ``hooks``.
+
+    Calls nested inside the block (e.g. the POST made by get_tables) add
+    to the outer event rather than creating their own.
+    """
+    if not hooks:
+        yield NULL_EVENT
+        return
+    outer = _current_event.get()
+    if outer is not None:
+        yield outer
+        return
+    event = RequestEvent(method, resource, action)
+    token = _current_event.set(event)
+    start = time.perf_counter()
+    try:
+        yield event
+    except Exception as e:
+        event.error = e
+        raise
+    finally:
+        _current_event.reset(token)
+        event.add_timing('total', time.perf_counter() - start)
+        for hook in hooks:
+            hook(event)
+
+
+def normalize_resource(resource):
+    """Remove primary keys from a resource, datasource/12 -> datasource."""
+    return re.sub(r'/\d+', '', resource.strip('/'))
+
+
+class Histogram:
+    """Latency histogram with fixed, roughly logarithmic buckets.
+
+    Parameters
+    ----------
+    bounds : list
+        Upper bounds of the buckets in seconds. Values above the last bound
+        go in an overflow bucket.
+
+    """
+
+    BOUNDS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+              1.0, 2.5, 5.0, 10.0, 30.0, 60.0]
+
+    def __init__(self, bounds=None):
+        self.bounds = list(bounds or self.BOUNDS)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile."""
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds + [self.max], self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else None
+
+
+class MetricsAggregator:
+    """Hook that keeps counters and latency histograms per resource/action.
+
+    It is thread safe, so one aggregator can be shared by all clients.
+    """
+
+    COUNTERS = ('requests', 'errors', 'retries', 'cache_hits',
+                'bytes_sent', 'bytes_received')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._statuses = {}
+        self._histograms = {}
+
+    def __call__(self, event):
+        key = (event.resource, event.action)
+        with self._lock:
+            counters = self._counters.setdefault(
+                key, dict.fromkeys(self.COUNTERS, 0))
+            counters['requests'] += 1
+            counters['errors'] += event.error is not None
+            counters['retries'] += event.retries
+            counters['cache_hits'] += bool(event.cache_hit)
+            counters['bytes_sent'] += event.bytes_sent
+            counters['bytes_received'] += event.bytes_received
+            statuses = self._statuses.setdefault(key, {})
+            statuses[event.status_code] = statuses.get(event.status_code, 0) + 1
+            for phase, seconds in event.timings.items():
+                histogram = self._histograms.get(key + (phase,))
+                if histogram is None:
+                    histogram = self._histograms[key + (phase,)] = Histogram()
+                histogram.observe(seconds)
+
+    def counters(self, resource, action=''):
+        """Counters for a resource/action, e.g. counters('datasource', 'tables')."""
+        with self._lock:
+            return dict(self._counters.get((resource, action),
+                                           dict.fromkeys(self.COUNTERS, 0)))
+
+    def histogram(self, resource, action='', phase='total'):
+        """The latency histogram of one phase of a resource/action."""
+        return self._histograms.get((resource, action, phase))
+
+    def summary(self):
+        """Counters and latency quantiles per resource/action and phase.
+
+        Returns
+        -------
+        dict
+            Keyed by "resource/action", with counters, status counts and a
+            dict of phases with count, mean, p50, p95 and max seconds.
+
+        """
+        with self._lock:
+            summary = {}
+            for key, counters in self._counters.items():
+                name = "/".join(i for i in key if i)
+                summary[name] = dict(counters,
+                                     statuses=dict(self._statuses[key]),
+                                     phases={})
+            for (resource, action, phase), histogram in self._histograms.items():
+                name = "/".join(i for i in (resource, action) if i)
+                summary[name]['phases'][phase] = {
+                    'count': histogram.count,
+                    'mean': histogram.mean,
+                    'p50': histogram.quantile(0.5),
+                    'p95': histogram.quantile(0.95),
+                    'max': histogram.max
+                }
+            return summary
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._statuses.clear()
+            self._histograms.clear()
@@ -1,5 +1,5 @@
 import json
-import time
+import threading
 try:
     import importlib.resources as pkg_resources
 except ImportError:
@@ -7,6 +7,19 @@ except ImportError:
     import importlib_resources as pkg_resources
 
 from . import templates  # relative-import the *package* containing the templates
+from . import deadline as deadlines
+from . import validation
+from .elements import ElementCollection
+
+def _meta_payload(meta):
+    """A copy of the meta data with the defaults the server expects."""
+    payload = dict(meta)
+    if payload['global_filter'] == '':
+        payload['global_filter'] = "default_filter"
+    if payload['template'] == '':
+        payload['template'] = "None"
+    return payload
+
 
 class Report():
     """Represents a report object in datasource.
@@ -26,6 +39,17 @@ class Report():
     _title : string
     _pk : string
 
+    Notes
+    -----
+    A Report can be shared between threads. ``meta`` and ``elements`` are
+    copied on write: changes replace them with new objects rather than
+    changing them in place, so the elements read from the report never
+    change under the reader.
+
+    ``elements`` is a datasmoothie.elements.ElementCollection, which finds
+    elements by rowid or position in constant time. Assigning a list to it
+    wraps the list in one.
+
     """
 
     def __init__(self, client, meta, elements, primary_key=None):
@@ -34,6 +58,20 @@ class Report():
         self.title = meta['title']
         self.meta = meta
         self.elements = elements
+        self._lock = threading.RLock()
+        # held while the elements are sent, so sends can't overtake each other
+        self._send_lock = threading.Lock()
+        self._meta_send_lock = threading.Lock()
+
+    @property
+    def elements(self):
+        return self._elements
+
+    @elements.setter
+    def elements(self, elements):
+        if not isinstance(elements, ElementCollection):
+            elements = ElementCollection(elements)
+        self._elements = elements
 
     def get_content(self):
         """Get the content of a report, i.e. a list of its elements.
@@ -66,14 +104,9 @@ class Report():
             Description of returned object.
 
         """
-        payload = new_meta
-        if new_meta['global_filter'] == '':
-            new_meta['global_filter'] = "default_filter"
-        if new_meta['template'] == '':
-            new_meta['template'] = "None"
-        return self._client.put_request('report/{}'.format(self._pk),
-                                        data=payload
-                                        )
+        with self._lock:
+            self.meta = _meta_payload(new_meta)
+        return self._send_meta()
 
     def update_meta_element(self, element, new_value):
         """Update a single element in the report's meta data.
@@ -87,11 +120,13 @@ class Report():
 
 
         """
-        if element not in self.meta:
-            raise ValueError("{} is not in the report meta data.".format(element))
-        new_meta = self.meta
-        new_meta[element] = new_value
-        return self.update_meta(new_meta)
+        with self._lock:
+            if element not in self.meta:
+                raise ValueError("{} is not in the report meta data.".format(element))
+            new_meta = dict(self.meta)
+            new_meta[element] = new_value
+            self.meta = _meta_payload(new_meta)
+        return self._send_meta()
 
     def update_content(self, new_elements):
         """Update report elements with new element list.
@@ -107,7 +142,7 @@ class Report():
             Meta data of the updated report.
 
         """
-        payload = {"elements":new_elements}
+        payload = {"elements": list(new_elements)}
         return self._client.put_request('reportElement/{}'.format(self._pk),
                                         data=payload
                                         )
@@ -145,7 +180,9 @@ class Report():
                   filter=None,
                   comparison_variables=[],
                   chart_type="StackedBarChart",
-                  charts_per_row=1):
+                  charts_per_row=1,
+                  deadline=None,
+                  validate=True):
         """Add multiple charts to the report.
 
         Use this method rather than add_chart to add multiple charts at once
@@ -165,28 +202,50 @@ class Report():
             What variables the user can filter across with an interactive dropdown.
         chart_type : string
             Chart type. Allowed types are StackedBarChart, StackedChartHor.
+        deadline : float
+            Seconds all the requests together may take before
+            DeadlineExceeded is raised.
+        validate : boolean
+            Check the variables and filters of every chart against the
+            meta data before changing the report.
 
         Returns
         -------
         type
             Description of returned object.
 
+        Raises
+        ------
+        datasmoothie.validation.ValidationError
+            Before the report is changed, if any of the charts refer to
+            variables that aren't in the datasource, listing all of them.
+
         """
-        datasource = self._client.get_datasource(datasource_primary_key)
-        for index, variable_pair in enumerate(x_y_pairs):
-            # 2 charts per row, this is true on 2, 4, 6, 8 etc.
-            same_line_as_previous = (index % charts_per_row > 0 )
-            self.add_chart(datasource_primary_key=datasource_primary_key,
-                           x=variable_pair[0],
-                           y=variable_pair[1],
-                           filter=filter,
-                           user_filters=user_filters,
-                           comparison_variables=comparison_variables,
-                           chart_type=chart_type,
-                           update_server=False,
-                           same_line_as_previous=same_line_as_previous,
-                           datasource=datasource)
-        self.update_content(self.elements)
+        with deadlines.within(deadline):
+            datasource = self._client.get_datasource(datasource_primary_key)
+            if validate:
+                validation.raise_problems(validation.check_charts(
+                    datasource.meta_for(validation.chart_variables(
+                        x_y_pairs, filter, user_filters,
+                        comparison_variables)),
+                    x_y_pairs, filter=filter, user_filters=user_filters,
+                    comparison_variables=comparison_variables))
+            self._use_datasource(datasource_primary_key)
+            charts = []
+            for index, variable_pair in enumerate(x_y_pairs):
+                # 2 charts per row, this is true on 2, 4, 6, 8 etc.
+                same_line_as_previous = (index % charts_per_row > 0 )
+                charts.append(self._chart_element(
+                    datasource_primary_key, datasource,
+                    x=variable_pair[0],
+                    y=variable_pair[1],
+                    filter=filter,
+                    user_filters=user_filters,
+                    comparison_variables=comparison_variables,
+                    chart_type=chart_type,
+                    same_line_as_previous=same_line_as_previous))
+            self._append_elements(charts)
+            self._send_elements()
 
     def add_chart(self,
                   datasource_primary_key,
@@ -200,15 +259,17 @@ class Report():
                   user_filters=[],
                   same_line_as_previous=False,
                   language_key=None,
-                  datasource=None
+                  datasource=None,
+                  validate=True
                   ):
         """Add a chart to the report.
 
         Add a chart to the report. The chart will be the
         last element in the report. The user supplies information
         on what datasource the chart should come from and what
-        the names of the variables are. If incorrect names are used
-        the chart is still added but it won't work in the dashboard.
+        the names of the variables are. The variables are checked against
+        the datasource's meta data before anything is changed, unless
+        validate is False.
 
         Parameters
         ----------
@@ -237,32 +298,62 @@ class Report():
         same_line_as_previous : boolean
             Should this chart be in the same line as the previous chart, on
             the right? Don't do this for the first chart you add.
+        validate : boolean
+            Check the variables and filters against the meta data.
 
         Returns
         -------
         type
             JSON object representing the new element.
 
+        Raises
+        ------
+        datasmoothie.validation.ValidationError
+            If variables in the chart aren't in the datasource.
+
         """
         if x is None:
             raise ValueError("x must be a valid variable")
         if datasource_primary_key is None:
             raise ValueError("datasource primary key must be defined")
-        if self.meta['datasource'] is None:
-            datasource_url = "https://{}/datasource/{}/".format(self._client.get_base_url(),
-                                                                 datasource_primary_key)
-            self.meta['datasource'] = datasource_url
-        new_meta = self.meta
-        self.update_meta(new_meta)
-        new_element_json = {}
         if datasource is None:
             datasource = self._client.get_datasource(datasource_primary_key)
-        if language_key is None:
-            language_key = datasource.get_default_language()
+        if validate:
+            validation.raise_problems(validation.check_charts(
+                datasource.meta_for(validation.chart_variables(
+                    [(x, y)], filter, user_filters, comparison_variables)),
+                [(x, y)], filter=filter, user_filters=user_filters,
+                comparison_variables=comparison_variables))
+        self._use_datasource(datasource_primary_key)
+        new_element_json = self._chart_element(
+            datasource_primary_key, datasource, x, y, title=title,
+            chart_type=chart_type, comparison_variables=comparison_variables,
+            filter=filter, user_filters=user_filters,
+            same_line_as_previous=same_line_as_previous,
+            language_key=language_key)
+        new_elements = self._append_elements([new_element_json])
+        if update_server:
+            self._send_elements()
+        return new_elements.get(new_element_json['rowid'])
+
+    def _use_datasource(self, datasource_primary_key):
+        """Link the report to the datasource if it has none yet."""
+        with self._lock:
+            if self.meta['datasource'] is None:
+                datasource_url = "https://{}/datasource/{}/".format(self._client.get_base_url(),
+                                                                     datasource_primary_key)
+                self.meta = dict(self.meta, datasource=datasource_url)
+            self.meta = _meta_payload(self.meta)
+        self._send_meta()
+
+    def _chart_element(self, datasource_primary_key, datasource, x, y="@",
+                       title=None, chart_type="StackedBarChart",
+                       comparison_variables=[], filter=None, user_filters=[],
+                       same_line_as_previous=False, language_key=None):
+        """The element of a new chart, without its rowid and position."""
+        new_element_json = {}
         with pkg_resources.open_text(templates, 'chart.json') as file:
             new_element_json = json.load(file)
-        new_element_json['position'] = len(self.elements) + 1
-        new_element_json['rowid'] = int(time.time()*1000)
         new_element_json['Type'] = chart_type
         new_element_json['Data']['y'] = y
         new_element_json['Data']['x'] = x
@@ -272,12 +363,15 @@ class Report():
             new_element_json['Data']['hasOnLeft'] = True
         new_element_json['Data']['chartOptions']['filters'] = user_filters
         new_element_json['Data']['chartOptions']['comparisonvars'] = comparison_variables
-        if title is None:
-            survey_meta = datasource.get_survey_meta()
-            if type(x) != list and x in survey_meta['columns']:
+        if title is None and type(x) != list:
+            # only these charts need the meta data, and only of x
+            survey_meta = datasource.meta_for([x])
+            if language_key is None:
+                language_key = survey_meta['lib']['default text']
+            if x in survey_meta['columns']:
                 title_from_meta = survey_meta['columns'][x]['text'][language_key]
                 new_element_json['Data']['chartOptions']['title'] = title_from_meta
-        else:
+        elif title is not None:
             new_element_json['Data']['chartOptions']['title'] = title
 
         selection = {}
@@ -286,9 +380,86 @@ class Report():
                                              "type": "categorical"
                                              }
         new_element_json['Data']['selectionsByDatasource'] = selection
-        new_elements = self.elements
-        new_elements.append(new_element_json)
-        self.elements = new_elements
-        if update_server:
-            self.update_content(new_elements)
         return new_element_json
+
+    def _append_elements(self, new_elements):
+        """Add elements to the end of the report with new rowids.
+
+        Returns the new collection of elements.
+        """
+        with self._lock:
+            elements = self.elements.copy()
+            for element in new_elements:
+                element['rowid'] = elements.new_rowid()
+                element['position'] = len(elements) + 1
+                elements.append(element)
+            self.elements = elements
+        return elements
+
+    def _send_elements(self):
+        """Send the report's elements to the server.
+
+        The elements are read once the previous send has finished, so
+        when several threads change the report, the last request sent
+        holds every change made before it.
+        """
+        with self._send_lock:
+            return self.update_content(self.elements)
+
+    def _send_meta(self):
+        """Send the report's meta data to the server.
+
+        Like _send_elements, the meta data is read once the previous send
+        has finished, so the last request sent holds every change.
+        """
+        with self._meta_send_lock:
+            return self._client.put_request('report/{}'.format(self._pk),
+                                            data=self.meta)
+
+    def get_element(self, rowid):
+        """The element with a rowid, or None."""
+        return self.elements.get(rowid)
+
+    def move_element(self, rowid, position, update_server=True):
+        """Move an element to a position, counting from 1.
+
+        The elements in between shift up or down one place. See
+        ElementCollection.move for how rows of charts are kept.
+
+        Parameters
+        ----------
+        rowid : int
+            The rowid of the element.
+        position : int
+            Its new position.
+        update_server : boolean
+            Send the new elements to the server.
+
+        """
+        with self._lock:
+            elements = self.elements.copy()
+            elements.move(rowid, position)
+            self.elements = elements
+        if update_server:
+            return self._send_elements()
+
+    def remove_element(self, rowid, update_server=True):
+        """Remove an element from the report.
+
+        The elements after it move up one place. If the element started a
+        row of charts, the next chart starts the row instead.
+
+        Parameters
+        ----------
+        rowid : int
+            The rowid of the element.
+        update_server : boolean
+            Send the new elements to the server.
+
+        """
+        with self._lock:
+            elements = self.elements.copy()
+            elements.remove_rowid(rowid)
+            self.elements = elements
+        if update_server:
+            return self._send_elements()
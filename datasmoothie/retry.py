@@ -0,0 +1,180 @@
+"""Retries, rate limiting and circuit breaking for API requests.
+
+A ``RateLimiter`` or ``CircuitBreaker`` can be passed to several clients
+(and used from several threads) so that they all share one budget.
+"""
+import email.utils
+import random
+import threading
+import time
+
+
+class CircuitOpenError(Exception):
+    """Raised when a request is refused because the circuit is open."""
+
+
+class RetryPolicy:
+    """Decides whether and when a failed request is tried again.
+
+    Parameters
+    ----------
+    total : int
+        Maximum number of retries after the first attempt.
+    backoff_factor : float
+        Base delay in seconds. The n-th retry waits up to
+        ``backoff_factor * 2 ** n`` seconds (full jitter).
+    max_backoff : float
+        Upper bound on any single delay, including Retry-After.
+    status_forcelist : tuple
+        Status codes that are retried.
+
+    """
+
+    def __init__(self, total=3, backoff_factor=0.5, max_backoff=30.0,
+                 status_forcelist=(429, 500, 502, 503, 504)):
+        self.total = total
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.status_forcelist = status_forcelist
+
+    def should_retry(self, attempt, status_code=None, idempotent=True):
+        """Should attempt number ``attempt`` (starting at 0) be retried?
+
+        A 429 means the server didn't process the request, so it is always
+        safe to retry. Anything else is only retried for idempotent calls.
+        """
+        if attempt >= self.total:
+            return False
+        if status_code is None:
+            return idempotent
+        if status_code not in self.status_forcelist:
+            return False
+        return status_code == 429 or idempotent
+
+    def get_backoff(self, attempt, retry_after=None):
+        """Seconds to wait before retrying attempt number ``attempt``."""
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        ceiling = min(self.max_backoff, self.backoff_factor * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+
+def parse_retry_after(value):
+    """Parse a Retry-After header (seconds or an HTTP date) into seconds."""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class RateLimiter:
+    """Thread safe token bucket.
+
+    Parameters
+    ----------
+    rate : float
+        Requests per second that can be sustained.
+    burst : int
+        Number of requests that can be made at once after being idle.
+
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now >= self._paused_until:
+                    self._refill(now)
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+                else:
+                    wait = self._paused_until - now
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Stop handing out tokens for ``seconds``, e.g. after a 429."""
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0.0
+            self._updated = max(now, self._paused_until)
+
+
+class CircuitBreaker:
+    """Stop calling the API after repeated failures.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    requests fail immediately with ``CircuitOpenError``. Once
+    ``reset_timeout`` seconds have passed a single trial request is let
+    through; if it succeeds the circuit closes again.
+
+    Parameters
+    ----------
+    failure_threshold : int
+        Consecutive failures before the circuit opens.
+    reset_timeout : float
+        Seconds to wait before letting a trial request through.
+
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        with self._lock:
+            return self._opened_at is not None
+
+    def before_request(self):
+        """Raise CircuitOpenError if the request may not be sent."""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            waited = time.monotonic() - self._opened_at
+            if waited >= self.reset_timeout and not self._trial_running:
+                self._trial_running = True
+                return
+            raise CircuitOpenError(
+                "Circuit open after {} consecutive failures, retry in {:.1f}s."
+                .format(self._failures, max(0.0, self.reset_timeout - waited)))
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_running = False
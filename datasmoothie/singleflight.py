@@ -0,0 +1,71 @@
+"""Coalesce identical calls that are in flight at the same time.
+
+When many threads ask for the same thing at once, only the first one (the
+leader) does the work; the others wait for it and get the same result, or
+the same exception if it failed. Once the call has finished the next one
+starts afresh, so nothing is cached.
+"""
+import concurrent.futures
+import threading
+
+from . import deadline as deadlines
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time and shares its outcome."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, function):
+        """Call ``function``, unless a call for ``key`` is already running.
+
+        Parameters
+        ----------
+        key : hashable
+            Identifies calls that can share a result.
+        function : callable
+            Called without arguments by the leader.
+
+        Returns
+        -------
+        tuple
+            (result, shared): the result, and whether it came from a call
+            made by another thread.
+
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = concurrent.futures.Future()
+        if not leader:
+            deadline = deadlines.current()
+            try:
+                return future.result(
+                    timeout=None if deadline is None
+                    else deadline.remaining()), True
+            except concurrent.futures.TimeoutError:
+                raise deadlines.DeadlineExceeded(
+                    "Deadline of {}s exceeded waiting for a shared request."
+                    .format(deadline.seconds))
+        try:
+            result = function()
+        except BaseException as error:
+            self._finish(key)
+            future.set_exception(error)
+            raise
+        self._finish(key)
+        future.set_result(result)
+        return result, False
+
+    def _finish(self, key):
+        # later callers start a new call rather than joining this one
+        with self._lock:
+            del self._calls[key]
+
+    def in_flight(self):
+        """Number of calls running."""
+        with self._lock:
+            return len(self._calls)
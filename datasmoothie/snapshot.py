@@ -0,0 +1,115 @@
+"""Local snapshots of datasources, so unchanged data isn't downloaded again.
+
+A snapshot is a directory per datasource holding the meta data as JSON,
+the typed data as Parquet and a version marker taken from the datasource's
+``modified`` field. Give a client a store and ``Datasource.get_dataframe``
+uses the snapshot while the remote datasource hasn't changed::
+
+    client = Client(api_key, snapshot_store=SnapshotStore('~/.datasmoothie'))
+    client.get_datasource(12).get_dataframe()
+"""
+import json
+import os
+import shutil
+import tempfile
+
+try:
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+class SnapshotStore:
+    """Datasource snapshots in a local directory.
+
+    Parameters
+    ----------
+    directory : string
+        Where to keep the snapshots, created if it doesn't exist.
+    memory_map : boolean
+        Memory-map the Parquet files when loading them.
+
+    """
+
+    META = 'meta.json'
+    DATA = 'data.parquet'
+    VERSION = 'version.json'
+
+    def __init__(self, directory, memory_map=True):
+        if pyarrow is None:
+            raise ImportError("SnapshotStore requires pyarrow.")
+        self.directory = os.path.expanduser(directory)
+        self.memory_map = memory_map
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, primary_key, name=None):
+        path = os.path.join(self.directory, str(primary_key))
+        return path if name is None else os.path.join(path, name)
+
+    def version(self, primary_key):
+        """The version of the stored snapshot, or None if there is none."""
+        try:
+            with open(self._path(primary_key, self.VERSION)) as version_file:
+                return json.load(version_file)['version']
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def is_current(self, primary_key, version):
+        """Is there a snapshot of this exact version?"""
+        return version is not None and self.version(primary_key) == version
+
+    def save(self, primary_key, version, meta, frame):
+        """Store a snapshot, replacing any older one.
+
+        The files are written to a temporary directory first and moved in
+        place with the version marker last, so a crash never leaves a
+        snapshot that looks current but is incomplete.
+
+        Parameters
+        ----------
+        primary_key : int
+            Primary key of the datasource.
+        version : string
+            The datasource's version marker, e.g. its modified date.
+        meta : dict
+            Quantipy meta data.
+        frame : pandas.DataFrame
+            The survey data.
+
+        """
+        path = self._path(primary_key)
+        os.makedirs(path, exist_ok=True)
+        temp = tempfile.mkdtemp(dir=self.directory)
+        try:
+            with open(os.path.join(temp, self.META), 'w') as meta_file:
+                json.dump(meta, meta_file)
+            frame.to_parquet(os.path.join(temp, self.DATA), index=False)
+            with open(os.path.join(temp, self.VERSION), 'w') as version_file:
+                json.dump({'version': version}, version_file)
+            if os.path.exists(self._path(primary_key, self.VERSION)):
+                os.remove(self._path(primary_key, self.VERSION))
+            for name in (self.META, self.DATA, self.VERSION):
+                os.replace(os.path.join(temp, name),
+                           self._path(primary_key, name))
+        finally:
+            shutil.rmtree(temp, ignore_errors=True)
+
+    def load_meta(self, primary_key):
+        with open(self._path(primary_key, self.META)) as meta_file:
+            return json.load(meta_file)
+
+    def load_data(self, primary_key):
+        """Load the survey data, memory-mapping the Parquet file.
+
+        Parquet pages are encoded, so decoding them always copies the data
+        out of the mapped file. The Arrow table is then handed to pandas
+        column by column, freeing each column as it's converted and
+        reusing its buffer where the dtype allows, so the data is held
+        once rather than twice.
+        """
+        table = pyarrow.parquet.read_table(self._path(primary_key, self.DATA),
+                                           memory_map=self.memory_map)
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+
+    def delete(self, primary_key):
+        shutil.rmtree(self._path(primary_key), ignore_errors=True)
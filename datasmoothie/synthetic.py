@@ -0,0 +1,196 @@
+"""Generate synthetic surveys in Quantipy format for scale testing.
+
+The meta data and the data are consistent with each other: every column in
+the data has an entry in the meta, and single and delimited set answers
+only use codes listed in the variable's values. Data is generated in
+chunks so surveys with millions of rows can be written without holding
+them in memory::
+
+    meta = generate_meta(singles=2000, delimited_sets=200, languages=3)
+    write_data(meta, 'survey.parquet', rows=1000000)
+"""
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+LANGUAGES = ['en-GB', 'de-DE', 'fr-FR', 'es-ES', 'it-IT', 'nl-NL', 'sv-SE',
+             'da-DK', 'nb-NO', 'fi-FI', 'pl-PL', 'pt-PT', 'ja-JP', 'zh-CN']
+
+
+def _texts(label, languages):
+    return {language: "{} [{}]".format(label, language)
+            for language in languages}
+
+
+def _variable(name, type, label, languages, codes=None):
+    variable = {'name': name,
+                'parent': {},
+                'text': _texts(label, languages),
+                'type': type}
+    if codes is not None:
+        variable['values'] = [{'text': _texts("Answer {}".format(code),
+                                              languages),
+                               'value': code}
+                              for code in range(1, codes + 1)]
+    return variable
+
+
+def generate_meta(singles=100, delimited_sets=10, ints=5, floats=5,
+                  codes=(2, 12), languages=1, seed=0):
+    """Generate Quantipy meta data.
+
+    Parameters
+    ----------
+    singles : int
+        Number of single choice variables.
+    delimited_sets : int
+        Number of multiple choice (delimited set) variables.
+    ints : int
+        Number of integer variables, besides the respondent id.
+    floats : int
+        Number of float variables.
+    codes : tuple
+        Smallest and largest number of answer codes a variable can have.
+    languages : int
+        Number of languages the labels are in.
+    seed : int
+        Seed for the random number of codes per variable.
+
+    Returns
+    -------
+    dict
+        Quantipy meta data. The first variable, ``id``, is a unique
+        respondent id.
+
+    """
+    random = np.random.default_rng(seed)
+    if languages > len(LANGUAGES):
+        raise ValueError("At most {} languages are supported.".format(
+            len(LANGUAGES)))
+    text_keys = LANGUAGES[:languages]
+    columns = {'id': _variable('id', 'int', 'Respondent id', text_keys)}
+    for prefix, type, count in [('q', 'single', singles),
+                                ('m', 'delimited set', delimited_sets)]:
+        for number in range(1, count + 1):
+            name = "{}{}".format(prefix, number)
+            columns[name] = _variable(
+                name, type, "Question {}".format(name), text_keys,
+                codes=int(random.integers(codes[0], codes[1] + 1)))
+    for prefix, type, count in [('n', 'int', ints), ('f', 'float', floats)]:
+        for number in range(1, count + 1):
+            name = "{}{}".format(prefix, number)
+            columns[name] = _variable(name, type, "Number {}".format(name),
+                                      text_keys)
+    return {
+        'columns': columns,
+        'info': {'from_source': {'pandas_reader': 'synthetic'},
+                 'text': 'Generated by datasmoothie.synthetic.'},
+        'lib': {'default text': text_keys[0], 'values': {}},
+        'masks': {},
+        'sets': {'data file': {
+            'items': ["columns@{}".format(name) for name in columns],
+            'text': _texts('Variable order in source file', text_keys)}},
+        'type': 'pandas.DataFrame'
+    }
+
+
+def iter_data(meta, rows, chunk_size=100000, missing=0.05, seed=0):
+    """Generate survey data for meta data in chunks.
+
+    Parameters
+    ----------
+    meta : dict
+        Quantipy meta data, e.g. from generate_meta.
+    rows : int
+        Total number of rows (respondents).
+    chunk_size : int
+        Number of rows in each chunk.
+    missing : float
+        Share of answers that are left empty.
+    seed : int
+        Seed for the random answers.
+
+    Yields
+    ------
+    pandas.DataFrame
+        The next chunk of rows, with one column per variable in the meta.
+
+    """
+    random = np.random.default_rng(seed)
+    for start in range(0, rows, chunk_size):
+        size = min(chunk_size, rows - start)
+        chunk = {}
+        for name, variable in meta['columns'].items():
+            if name == 'id':
+                chunk[name] = np.arange(start + 1, start + size + 1)
+                continue
+            empty = random.random(size) < missing
+            if variable['type'] == 'single':
+                codes = np.array([i['value'] for i in variable['values']])
+                values = random.choice(codes, size).astype(float)
+                values[empty] = np.nan
+                chunk[name] = values
+            elif variable['type'] == 'delimited set':
+                answers = pd.Series([''] * size)
+                for value in variable['values']:
+                    chosen = random.random(size) < 0.3
+                    answers[chosen] += "{};".format(value['value'])
+                answers[empty | (answers == '')] = np.nan
+                chunk[name] = answers
+            elif variable['type'] == 'int':
+                values = random.integers(0, 100, size).astype(float)
+                values[empty] = np.nan
+                chunk[name] = values
+            else:
+                values = random.normal(50, 15, size)
+                values[empty] = np.nan
+                chunk[name] = values
+        yield pd.DataFrame(chunk)
+
+
+def generate_data(meta, rows, **kwargs):
+    """Generate all the rows of survey data as a single data frame.
+
+    Takes the same arguments as iter_data.
+    """
+    return pd.concat(iter_data(meta, rows, **kwargs), ignore_index=True)
+
+
+def write_data(meta, path, rows, format=None, **kwargs):
+    """Write survey data to a CSV or Parquet file, one chunk at a time.
+
+    Parameters
+    ----------
+    meta : dict
+        Quantipy meta data.
+    path : string
+        File to write to.
+    rows : int
+        Number of rows.
+    format : string
+        csv or parquet, by default taken from the file's extension.
+    **kwargs
+        Passed on to iter_data.
+
+    """
+    if format is None:
+        format = 'parquet' if path.endswith('.parquet') else 'csv'
+    if format == 'parquet' and pyarrow is None:
+        raise ImportError("Writing Parquet files requires pyarrow.")
+    writer = None
+    for index, chunk in enumerate(iter_data(meta, rows, **kwargs)):
+        if format == 'csv':
+            chunk.to_csv(path, mode='w' if index == 0 else 'a',
+                         header=index == 0, index=False)
+        else:
+            table = pyarrow.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pyarrow.parquet.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    if writer is not None:
+        writer.close()
@@ -0,0 +1,615 @@
+"""A stand-in for the Datasmoothie API, for tests and load tests.
+
+``FakeServer`` keeps datasources and reports in memory and calculates
+tables from the datasource's Quantipy meta and CSV data, so the client can
+be exercised without a network connection::
+
+    server = FakeServer()
+    server.add_datasource('My survey', meta=meta, data=csv)
+    client = Client(api_key='', transport=FakeTransport(server))
+
+Only the parts of the API the client uses are implemented. Significance
+tests are a plain two-proportion z-test and weights are ignored.
+"""
+import copy
+import datetime
+import http.server
+import io
+import itertools
+import json
+import math
+import re
+import threading
+import urllib.parse
+
+import numpy as np
+import pandas as pd
+
+from . import compression, delta, wire
+
+# significance level for each sig_diff level
+SIG_LEVELS = {'low': 0.10, 'mid': 0.05, 'high': 0.01}
+
+
+class FakeServer:
+    """In-memory implementation of the Datasmoothie API.
+
+    Parameters
+    ----------
+    api_keys : list
+        Keys that are accepted, or None to accept any key.
+    page_size : int
+        Number of items on each page of datasource and report lists.
+    responses : dict
+        Recorded responses that take precedence over the implementation,
+        keyed by (method, path) with (status, body) values, e.g.
+        {('GET', 'report/1'): (200, {...})}.
+    arrow : boolean
+        Answer table requests in Arrow IPC when their Accept header asks
+        for it and pyarrow is installed. Set to False to stand in for a
+        server that only speaks JSON.
+    compression_level : int
+        Level responses are compressed at, see
+        datasmoothie.compression.LEVELS. The default fast level keeps
+        compression from dominating benchmarks run against the server.
+
+    """
+
+    def __init__(self, api_keys=None, page_size=100, responses=None,
+                 arrow=True, compression_level=None):
+        self.api_keys = None if api_keys is None else set(api_keys)
+        self.page_size = page_size
+        self.responses = dict(responses or {})
+        self.arrow = arrow
+        self.compression_level = compression_level
+        self.datasources = {}
+        self.reports = {}
+        self.requests = []
+        self._ids = itertools.count(1)
+        self._lock = threading.RLock()
+
+    # --- state --------------------------------------------------------
+
+    def add_datasource(self, name, meta=None, data=None):
+        """Add a datasource and return its primary key."""
+        with self._lock:
+            pk = next(self._ids)
+            self.datasources[pk] = {
+                'record': {'pk': pk, 'name': name, 'modified': _now()},
+                'meta': meta if meta is not None else {},
+                'data': data if data is not None else '',
+                'frame': None
+            }
+            return pk
+
+    def add_report(self, title, elements=None, datasource=None):
+        """Add a report and return its primary key."""
+        with self._lock:
+            pk = next(self._ids)
+            self.reports[pk] = {
+                'meta': {'pk': pk,
+                         'title': title,
+                         'subtitle': '',
+                         'slug': re.sub(r'\W+', '-', title.lower()),
+                         'account': 'test',
+                         'datasource': datasource,
+                         'global_filter': 'default',
+                         'template': 'none'},
+                'elements': list(elements or [])
+            }
+            return pk
+
+    @classmethod
+    def from_fixtures(cls, meta_path, data_path, **kwargs):
+        """Create a server with one datasource and one report from files."""
+        server = cls(**kwargs)
+        with open(meta_path) as meta_file:
+            meta = json.load(meta_file)
+        with open(data_path) as data_file:
+            data = data_file.read()
+        server.add_datasource('Sample datasource', meta=meta, data=data)
+        server.add_report('Sample report')
+        return server
+
+    # --- request handling ---------------------------------------------
+
+    ROUTES = [
+        ('GET', r'datasource', '_list_datasources'),
+        ('POST', r'datasource', '_create_datasource'),
+        ('GET', r'datasource/(\d+)', '_get_datasource'),
+        ('GET', r'datasource/(\d+)/meta', '_get_meta'),
+        ('GET', r'datasource/(\d+)/meta_data', '_get_meta_data'),
+        ('POST', r'datasource/(\d+)/meta_data', '_update_meta_data'),
+        ('POST', r'datasource/(\d+)/meta_data_delta',
+         '_update_meta_data_delta'),
+        ('POST', r'datasource/(\d+)/tables', '_tables'),
+        ('POST', r'datasource/(\d+)/table', '_table'),
+        ('POST', r'datasource/(\d+)/crosstab', '_crosstab'),
+        ('POST', r'datasource/(\d+)/sig_diff', '_sig_diff'),
+        ('GET', r'report', '_list_reports'),
+        ('POST', r'report', '_create_report'),
+        ('GET', r'report/(\d+)', '_get_report'),
+        ('PUT', r'report/(\d+)', '_update_report'),
+        ('DELETE', r'report/(\d+)', '_delete_report'),
+        ('GET', r'reportElement/(\d+)', '_get_elements'),
+        ('PUT', r'reportElement/(\d+)', '_update_elements'),
+    ]
+
+    RESOURCES = ('datasource', 'report', 'reportElement')
+
+    def handle(self, method, url, headers, body):
+        """Handle a request.
+
+        Parameters
+        ----------
+        method : string
+            HTTP method.
+        url : string
+            Full url of the request.
+        headers : dict
+            Request headers.
+        body : bytes
+            Request body, or None.
+
+        Returns
+        -------
+        tuple
+            (status, headers, body) of the response.
+
+        Request bodies are decompressed according to their
+        Content-Encoding, and responses of 1KB or more are compressed
+        when the Accept-Encoding header allows it.
+        """
+        if body:
+            try:
+                body = compression.decompress(
+                    body, headers.get('Content-Encoding'))
+            except ValueError as e:
+                return self._respond(415, {'detail': str(e)})
+        status, response_headers, content = self._handle(method, url,
+                                                         headers, body)
+        encoding = compression.choose(headers.get('Accept-Encoding', ''))
+        if encoding is not None and len(content) >= compression.MIN_SIZE:
+            content = compression.compress(content, encoding,
+                                           self.compression_level)
+            response_headers = dict(response_headers,
+                                    **{'Content-Encoding': encoding,
+                                       'Content-Length': str(len(content))})
+        return status, response_headers, content
+
+    def _handle(self, method, url, headers, body):
+        parts = urllib.parse.urlsplit(url)
+        path = self._relative_path(parts.path)
+        query = dict(urllib.parse.parse_qsl(parts.query))
+        with self._lock:
+            self.requests.append((method, path))
+        if not self._authorized(headers):
+            return self._respond(401, {'detail': 'Invalid token.'})
+        if (method, path) in self.responses:
+            return self._respond(*self.responses[(method, path)])
+        payload = json.loads(body) if body else {}
+        for route_method, pattern, handler in self.ROUTES:
+            match = re.fullmatch(pattern, path)
+            if route_method == method and match:
+                args = [int(i) for i in match.groups()]
+                try:
+                    with self._lock:
+                        status, content = getattr(self, handler)(
+                            *args, payload=payload, query=query, url=url)
+                except KeyError:
+                    status, content = 404, {'detail': 'Not found.'}
+                return self._respond(status, content,
+                                     headers.get('Accept', ''))
+        return self._respond(404, {'detail': 'Not found.'})
+
+    def _relative_path(self, path):
+        segments = [i for i in path.split('/') if i]
+        for index, segment in enumerate(segments):
+            if segment in self.RESOURCES:
+                return '/'.join(segments[index:])
+        return '/'.join(segments)
+
+    def _authorized(self, headers):
+        if self.api_keys is None:
+            return True
+        token = headers.get('Authorization', '')
+        return token[len('Token '):] in self.api_keys
+
+    def _respond(self, status, content, accept=''):
+        if content is None:
+            return status, {}, b''
+        if self.arrow and wire.pyarrow is not None and wire.ARROW in accept:
+            if isinstance(content, pd.DataFrame):
+                body = wire.encode_frame(content)
+            elif isinstance(content, dict) and list(content) == ['results']:
+                body = wire.encode_tables(content['results'])
+            else:
+                body = None
+            if body is not None:
+                return status, {'Content-Type': wire.ARROW,
+                                'Content-Length': str(len(body))}, body
+        body = json.dumps(content, default=_to_json).encode('utf-8')
+        return status, {'Content-Type': 'application/json',
+                        'Content-Length': str(len(body))}, body
+
+    def _paginate(self, items, query, url):
+        """Filter, select fields and return one page of ``items``.
+
+        Query parameters other than page, page_size and fields filter the
+        items on equality with the field of the same name.
+        """
+        filters = {k: v for k, v in query.items()
+                   if k not in ('page', 'page_size', 'fields')}
+        items = [i for i in items
+                 if all(str(i.get(k)) == v for k, v in filters.items())]
+        if 'fields' in query:
+            fields = query['fields'].split(',')
+            items = [{k: v for k, v in i.items() if k in fields}
+                     for i in items]
+        page = int(query.get('page', 1))
+        page_size = int(query.get('page_size', self.page_size))
+        start = (page - 1) * page_size
+        results = items[start:start + page_size]
+
+        def link(number):
+            parts = urllib.parse.urlsplit(url)
+            params = dict(urllib.parse.parse_qsl(parts.query), page=number)
+            return urllib.parse.urlunsplit(
+                parts._replace(query=urllib.parse.urlencode(params)))
+
+        return {
+            'count': len(items),
+            'next': link(page + 1) if start + page_size < len(items) else None,
+            'previous': link(page - 1) if page > 1 else None,
+            'results': results
+        }
+
+    # --- datasources ----------------------------------------------------
+
+    def _list_datasources(self, payload, query, url):
+        records = [copy.deepcopy(i['record'])
+                   for i in self.datasources.values()]
+        return 200, self._paginate(records, query, url)
+
+    def _create_datasource(self, payload, query, url):
+        pk = self.add_datasource(payload['name'])
+        return 201, copy.deepcopy(self.datasources[pk]['record'])
+
+    def _get_datasource(self, pk, payload, query, url):
+        return 200, copy.deepcopy(self.datasources[pk]['record'])
+
+    def _get_meta(self, pk, payload, query, url):
+        meta = copy.deepcopy(self.datasources[pk]['meta'])
+        if query.get('variables'):
+            variables = query['variables'].split(',')
+            for section in ('columns', 'masks'):
+                if section in meta:
+                    meta[section] = {name: meta[section][name]
+                                     for name in variables
+                                     if name in meta[section]}
+        return 200, meta
+
+    def _get_meta_data(self, pk, payload, query, url):
+        datasource = self.datasources[pk]
+        return 200, {'meta': copy.deepcopy(datasource['meta']),
+                     'data': datasource['data']}
+
+    def _update_meta_data(self, pk, payload, query, url):
+        datasource = self.datasources[pk]
+        datasource['meta'] = payload['meta']
+        datasource['data'] = payload['data']
+        datasource['frame'] = None
+        datasource['record']['modified'] = _now()
+        return 200, copy.deepcopy(datasource['record'])
+
+    def _update_meta_data_delta(self, pk, payload, query, url):
+        datasource = self.datasources[pk]
+        datasource['meta'], datasource['data'] = delta.apply(
+            datasource['meta'], datasource['data'], payload)
+        datasource['frame'] = None
+        datasource['record']['modified'] = _now()
+        record = copy.deepcopy(datasource['record'])
+        record['rows'] = len(pd.read_csv(io.StringIO(datasource['data'])))
+        return 200, record
+
+    def _tables(self, pk, payload, query, url):
+        tables = Tabulator(*self._meta_and_frame(pk))
+        results = {}
+        for view in payload['views']:
+            table = tables.view(payload['stub'], payload['banner'], view)
+            if table is not None:
+                results[view] = table
+        return 200, {'results': results}
+
+    def _table(self, pk, payload, query, url):
+        tables = Tabulator(*self._meta_and_frame(pk))
+        table = tables.view(payload['stub'], payload['banner'],
+                            payload['view'])
+        if table is None:
+            return 400, {'detail': 'Unsupported view.'}
+        return 200, table
+
+    def _crosstab(self, pk, payload, query, url):
+        tables = Tabulator(*self._meta_and_frame(pk))
+        return 200, tables.view(payload['stub'], payload['banner'], 'counts')
+
+    def _sig_diff(self, pk, payload, query, url):
+        meta, frame = self._meta_and_frame(pk)
+        if payload.get('filter', 'no_filter') != 'no_filter':
+            frame = frame.query(payload['filter'])
+        tables = Tabulator(meta, frame)
+        level = SIG_LEVELS[payload.get('level', 'mid')]
+        return 200, tables.sig_diff(payload['stub'], payload['banner'], level)
+
+    def _meta_and_frame(self, pk):
+        datasource = self.datasources[pk]
+        if datasource['frame'] is None:
+            datasource['frame'] = pd.read_csv(io.StringIO(datasource['data']))
+        return datasource['meta'], datasource['frame']
+
+    # --- reports --------------------------------------------------------
+
+    def _list_reports(self, payload, query, url):
+        metas = [copy.deepcopy(i['meta']) for i in self.reports.values()]
+        return 200, self._paginate(metas, query, url)
+
+    def _create_report(self, payload, query, url):
+        pk = self.add_report(payload['title'])
+        meta = self.reports[pk]['meta']
+        meta['global_filter'] = payload.get('global_filter', 'default')
+        meta['template'] = payload.get('template', 'none')
+        return 201, copy.deepcopy(meta)
+
+    def _get_report(self, pk, payload, query, url):
+        return 200, copy.deepcopy(self.reports[pk]['meta'])
+
+    def _update_report(self, pk, payload, query, url):
+        meta = self.reports[pk]['meta']
+        meta.update({k: v for k, v in payload.items() if k != 'pk'})
+        return 200, copy.deepcopy(meta)
+
+    def _delete_report(self, pk, payload, query, url):
+        del self.reports[pk]
+        return 204, None
+
+    def _get_elements(self, pk, payload, query, url):
+        return 200, {'elements': copy.deepcopy(self.reports[pk]['elements'])}
+
+    def _update_elements(self, pk, payload, query, url):
+        self.reports[pk]['elements'] = payload['elements']
+        return 200, {'elements': copy.deepcopy(payload['elements'])}
+
+
+class StubHTTPServer:
+    """Serve a FakeServer over HTTP on localhost from a background thread.
+
+    Used where the real network stack should be part of what's measured,
+    e.g. in the benchmarks::
+
+        with StubHTTPServer(server) as stub:
+            client = Client(api_key='', host=stub.host, ssl=False)
+
+    Parameters
+    ----------
+    server : FakeServer
+        The server that handles the requests.
+    port : int
+        Port to listen on, 0 picks a free one.
+
+    """
+
+    def __init__(self, server, port=0):
+        fake = server
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def _handle(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else None
+                url = 'http://{}{}'.format(self.headers.get('Host'), self.path)
+                status, headers, content = fake.handle(
+                    self.command, url, dict(self.headers), body)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                if 'Content-Length' not in headers:
+                    self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = fake
+        self._httpd = http.server.ThreadingHTTPServer(('127.0.0.1', port),
+                                                      Handler)
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def host(self):
+        """The host argument for a Client talking to this server."""
+        return "127.0.0.1:{}/api2".format(self._httpd.server_address[1])
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class Tabulator:
+    """Calculates views from Quantipy meta and a data frame.
+
+    Parameters
+    ----------
+    meta : dict
+        Quantipy meta data.
+    frame : pandas.DataFrame
+        The survey data.
+
+    """
+
+    def __init__(self, meta, frame):
+        self.meta = meta
+        self.frame = frame
+
+    def codes(self, variable):
+        if variable == '@':
+            return ['@']
+        return [i['value'] for i in self.meta['columns'][variable]['values']]
+
+    def dummies(self, variable):
+        """Boolean matrix of respondents by codes for a variable."""
+        if variable == '@':
+            return np.ones((len(self.frame), 1), dtype=bool)
+        codes = self.codes(variable)
+        column = self.frame[variable]
+        if self.meta['columns'][variable]['type'] == 'delimited set':
+            answers = column.fillna('').astype(str).str.split(';')
+            return np.array([[str(code) in answer for code in codes]
+                             for answer in answers], dtype=bool).reshape(
+                                 len(column), len(codes))
+        values = column.to_numpy(dtype=float)
+        return values[:, None] == np.array(codes, dtype=float)[None, :]
+
+    def _columns(self, banner):
+        return pd.MultiIndex.from_tuples(
+            [(y, code) for y in banner for code in self.codes(y)])
+
+    def _banner_dummies(self, banner):
+        return np.hstack([self.dummies(y) for y in banner])
+
+    def view(self, stub, banner, view):
+        """Calculate a view, or return None if it isn't supported."""
+        stub = [stub] if isinstance(stub, str) else stub
+        banner = [banner] if isinstance(banner, str) else banner
+        y = self._banner_dummies(banner).astype(float)
+        columns = self._columns(banner)
+        if view in ('counts', 'c%', 'r%', 'cbase'):
+            frames = []
+            for x_name in stub:
+                x = self.dummies(x_name).astype(float)
+                counts = x.T @ y
+                base = x.any(axis=1).astype(float) @ y
+                if view == 'counts':
+                    values = counts
+                elif view == 'cbase':
+                    values = base[None, :]
+                elif view == 'c%':
+                    with np.errstate(divide='ignore', invalid='ignore'):
+                        values = counts / base[None, :] * 100
+                else:
+                    values = self._row_percentages(counts, banner)
+                codes = ['All'] if view == 'cbase' else self.codes(x_name)
+                index = pd.MultiIndex.from_tuples([(x_name, i) for i in codes])
+                frames.append(pd.DataFrame(values, index=index,
+                                           columns=columns))
+            return pd.concat(frames)
+        if view in ('mean', 'stddev'):
+            rows = []
+            for x_name in stub:
+                values = self.frame[x_name].to_numpy(dtype=float)
+                valid = ~np.isnan(values)
+                row = []
+                for column in y.T.astype(bool):
+                    selected = values[column & valid]
+                    if view == 'mean':
+                        row.append(selected.mean() if len(selected) else np.nan)
+                    else:
+                        row.append(selected.std(ddof=1) if len(selected) > 1
+                                   else np.nan)
+                rows.append(row)
+            index = pd.MultiIndex.from_tuples([(x, view) for x in stub])
+            return pd.DataFrame(rows, index=index, columns=columns)
+        return None
+
+    def _row_percentages(self, counts, banner):
+        result = np.empty_like(counts)
+        start = 0
+        for y_name in banner:
+            end = start + len(self.codes(y_name))
+            totals = counts[:, start:end].sum(axis=1, keepdims=True)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                result[:, start:end] = counts[:, start:end] / totals * 100
+            start = end
+        return result
+
+    def sig_diff(self, stub, banner, level):
+        """Two-proportion z-tests between the codes of each banner variable.
+
+        Each cell lists the codes of the columns it is significantly higher
+        than, and (negated) the codes it is significantly lower than.
+        """
+        stub = [stub] if isinstance(stub, str) else stub
+        banner = [banner] if isinstance(banner, str) else banner
+        counts = self.view(stub, banner, 'counts')
+        bases = self.view(stub, banner, 'cbase')
+        result = pd.DataFrame([[[] for _ in counts.columns]
+                               for _ in counts.index],
+                              index=counts.index, columns=counts.columns)
+        for row in counts.index:
+            base_row = bases.loc[(row[0], 'All')]
+            for y_name in banner:
+                for first, second in itertools.combinations(
+                        self.codes(y_name), 2):
+                    n1 = base_row[(y_name, first)]
+                    n2 = base_row[(y_name, second)]
+                    if not n1 or not n2:
+                        continue
+                    p1 = counts.loc[row, (y_name, first)] / n1
+                    p2 = counts.loc[row, (y_name, second)] / n2
+                    if _p_value(p1, p2, n1, n2) < level:
+                        higher, lower = (first, second) if p1 > p2 \
+                            else (second, first)
+                        result.loc[row, (y_name, higher)].append(lower)
+                        result.loc[row, (y_name, lower)].append(-higher)
+        return result
+
+
+def _p_value(p1, p2, n1, n2):
+    pooled = (p1 * n1 + p2 * n2) / (n1 + n2)
+    error = math.sqrt(pooled * (1 - pooled) * (1 / n1 + 1 / n2))
+    if error == 0:
+        return 1.0
+    z = abs(p1 - p2) / error
+    return math.erfc(z / math.sqrt(2))
+
+
+def _split(frame):
+    """Serialize a data frame the way the API does (orient='split')."""
+    data = frame.to_numpy(dtype=object)
+    if frame.dtypes.map(lambda i: i.kind == 'f').all():
+        data = np.where(pd.isna(frame.to_numpy()), None, data)
+    return {'index': [list(i) for i in frame.index],
+            'columns': [list(i) for i in frame.columns],
+            'data': data.tolist()}
+
+
+def _to_json(value):
+    if isinstance(value, pd.DataFrame):
+        return _split(value)
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    raise TypeError("{} is not JSON serializable".format(type(value)))
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
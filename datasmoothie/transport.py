@@ -0,0 +1,127 @@
+"""Transports send the HTTP requests a Client makes.
+
+``RequestsTransport`` talks to the API with a pooled ``requests.Session``.
+``FakeTransport`` answers requests in-process from a
+``datasmoothie.testing.FakeServer``, so tests and load tests can run
+offline and deterministically.
+"""
+import io
+import time
+import urllib.parse
+
+import requests
+import urllib3
+from requests.structures import CaseInsensitiveDict
+
+
+class Transport:
+    """Interface the Client uses to send requests.
+
+    Subclasses implement ``request`` and return a requests.Response, and
+    raise requests.exceptions.RequestException subclasses for network
+    errors so that retries behave the same whatever the transport.
+    """
+
+    def request(self, method, url, headers=None, timeout=None, data=None,
+                stream=False):
+        """Send a request.
+
+        Parameters
+        ----------
+        method : string
+            HTTP method.
+        url : string
+            Full url of the request.
+        headers : dict
+            Request headers.
+        timeout : float
+            Seconds to wait for the response.
+        data : string or bytes
+            Request body.
+        stream : boolean
+            Don't read the response body until it is accessed.
+
+        Returns
+        -------
+        requests.Response
+
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class RequestsTransport(Transport):
+    """Send requests over HTTP with a requests.Session.
+
+    The session keeps connections to the API open between requests.
+    """
+
+    def __init__(self, session=None):
+        self.session = session if session is not None else requests.Session()
+
+    def request(self, method, url, headers=None, timeout=None, data=None,
+                stream=False):
+        return self.session.request(method, url,
+                                    headers=headers,
+                                    timeout=timeout,
+                                    data=data,
+                                    stream=stream)
+
+    def close(self):
+        self.session.close()
+
+
+class FakeTransport(Transport):
+    """Answer requests in-process with a stand-in server.
+
+    Parameters
+    ----------
+    server : datasmoothie.testing.FakeServer
+        The server that handles the requests.
+    latency : float or callable
+        Seconds to wait before answering each request, or a callable taking
+        (method, path) and returning the seconds to wait.
+
+    """
+
+    def __init__(self, server, latency=0.0):
+        self.server = server
+        self.latency = latency
+
+    def request(self, method, url, headers=None, timeout=None, data=None,
+                stream=False):
+        path = urllib.parse.urlsplit(url).path
+        latency = self.latency(method, path) if callable(self.latency) \
+            else self.latency
+        if timeout is not None and latency > timeout:
+            time.sleep(timeout)
+            raise requests.exceptions.ReadTimeout(
+                "Fake server didn't answer within {}s.".format(timeout))
+        if latency:
+            time.sleep(latency)
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        status, response_headers, body = self.server.handle(
+            method, url, headers or {}, data)
+        return build_response(method, url, status, response_headers, body)
+
+
+def build_response(method, url, status, headers, body):
+    """Create a requests.Response with a body that is read on demand."""
+    response = requests.Response()
+    response.status_code = status
+    response.reason = requests.status_codes._codes.get(status, ('',))[0] \
+        .replace('_', ' ').upper()
+    response.headers = CaseInsensitiveDict(headers)
+    response.url = url
+    response.encoding = 'utf-8'
+    # urllib3 decodes the body as it's read, as for a real response
+    response.raw = urllib3.HTTPResponse(body=io.BytesIO(body),
+                                        headers=headers,
+                                        status=status,
+                                        preload_content=False,
+                                        decode_content=True)
+    response.request = requests.Request(method, url).prepare()
+    return response
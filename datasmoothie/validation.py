@@ -0,0 +1,198 @@
+"""Check table and chart requests against the survey meta data.
+
+The API ignores views it doesn't know and charts can be saved with
+variables that don't exist, so such mistakes otherwise show up as missing
+tables or broken dashboards. These checks run locally before anything is
+sent and report every problem they find at once::
+
+    problems = check_tables(meta, stubs, banners, views)
+    raise_problems(problems)   # ValidationError listing all of them
+
+Views outside the standard ones below, like totals and nets, are left to
+the server, so unknown view names only give a warning.
+"""
+import ast
+import re
+import warnings
+
+# the standard views the API calculates
+VIEWS = ('counts', 'c%', 'r%', 'cbase', 'rbase', 'ebase', 'mean', 'stddev',
+         'median', 'var', 'min', 'max', 'sem', 'lower_q', 'upper_q', 'sum')
+
+_QUOTED_NAME = re.compile(r'`([^`]*)`')
+
+
+class ValidationError(ValueError):
+    """A request doesn't match the meta data.
+
+    Attributes
+    ----------
+    problems : list
+        A message for every problem found.
+
+    """
+
+    def __init__(self, problems):
+        self.problems = list(problems)
+        super().__init__("{} problem{} found:\n{}".format(
+            len(self.problems), "" if len(self.problems) == 1 else "s",
+            "\n".join("- {}".format(i) for i in self.problems)))
+
+
+def raise_problems(problems):
+    """Raise a ValidationError if there are any problems."""
+    if problems:
+        raise ValidationError(problems)
+
+
+def _names(variables):
+    return [variables] if isinstance(variables, str) else list(variables)
+
+
+def _exists(meta, variable):
+    return variable in meta.get('columns', {}) or \
+        variable in meta.get('masks', {})
+
+
+def check_variables(meta, variables, where, total=False):
+    """Problems with variables that aren't in the meta data.
+
+    Parameters
+    ----------
+    meta : dict
+        Quantipy meta data.
+    variables : string or list
+        The variable names.
+    where : string
+        What the variables are for, used in the messages, e.g. 'stub'.
+    total : boolean
+        Allow '@', the total column.
+
+    Returns
+    -------
+    list
+        A message for each unknown variable.
+
+    """
+    return ["Unknown variable {!r} in {}.".format(variable, where)
+            for variable in _names(variables)
+            if not (total and variable == '@') and
+            not _exists(meta, variable)]
+
+
+def check_views(views):
+    """Messages for view names that aren't standard views."""
+    return ["Unknown view {!r}, the standard views are {}.".format(
+                view, ", ".join(VIEWS))
+            for view in views if view not in VIEWS]
+
+
+def filter_variables(expression):
+    """The variables a filter expression in pandas query syntax uses.
+
+    Names in backticks may contain spaces. Returns None if the expression
+    doesn't parse.
+    """
+    names = {}
+
+    def quote(match):
+        placeholder = '_quoted_{}'.format(len(names))
+        names[placeholder] = match.group(1)
+        return placeholder
+
+    try:
+        tree = ast.parse(_QUOTED_NAME.sub(quote, expression), mode='eval')
+    except SyntaxError:
+        return None
+    variables = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            variable = names.get(node.id, node.id)
+            if variable not in variables:
+                variables.append(variable)
+    return variables
+
+
+def check_filter(meta, expression, where='filter'):
+    """Problems with a filter expression in pandas query syntax.
+
+    The expression has to parse and every variable it names has to be in
+    the meta data. Names in backticks may contain spaces.
+    """
+    variables = filter_variables(expression)
+    if variables is None:
+        return ["Can't parse the {} {!r}.".format(where, expression)]
+    return ["Unknown variable {!r} in {} {!r}.".format(variable, where,
+                                                       expression)
+            for variable in variables if not _exists(meta, variable)]
+
+
+def check_tables(meta, stubs, banners, views):
+    """Problems with the tables of a tab plan.
+
+    Parameters
+    ----------
+    meta : dict
+        Quantipy meta data.
+    stubs : list
+        Stubs, each a list of variables.
+    banners : list
+        Banners, each a list of variables or '@'.
+    views : list
+        View names.
+
+    Returns
+    -------
+    list
+        A message for every problem, each reported once. Unknown views
+        aren't problems, they give a UserWarning instead.
+
+    """
+    for message in check_views(views):
+        warnings.warn(message, stacklevel=3)
+    problems = []
+    for stub in stubs:
+        problems += check_variables(meta, stub, 'stub')
+    for banner in banners:
+        problems += check_variables(meta, banner, 'banner', total=True)
+    return list(dict.fromkeys(problems))
+
+
+def chart_variables(x_y_pairs, filter=None, user_filters=(),
+                    comparison_variables=()):
+    """Every variable the charts use, to load only their meta data."""
+    variables = []
+    for x, y in x_y_pairs:
+        variables += _names(x) + _names(y)
+    for expression in _names(filter) if filter is not None else ():
+        variables += filter_variables(expression) or []
+    variables += list(user_filters) + list(comparison_variables)
+    return list(dict.fromkeys(variables))
+
+
+def check_charts(meta, x_y_pairs, filter=None, user_filters=(),
+                 comparison_variables=()):
+    """Problems with the charts of a report.
+
+    The filter is an expression or a list of expressions. User filters
+    are shown as dropdowns of the variable's values, so they also have to
+    be variables with values.
+    """
+    problems = []
+    for x, y in x_y_pairs:
+        problems += check_variables(meta, x, 'x')
+        problems += check_variables(meta, y, 'y', total=True)
+    if filter is not None:
+        for expression in _names(filter):
+            problems += check_filter(meta, expression)
+    problems += check_variables(meta, comparison_variables,
+                                'comparison_variables')
+    for variable in user_filters:
+        if not _exists(meta, variable):
+            problems.append("Unknown variable {!r} in user_filters."
+                            .format(variable))
+        elif not (meta.get('columns', {}).get(variable) or
+                  meta['masks'][variable]).get('values'):
+            problems.append("User filter {!r} has no values to choose from."
+                            .format(variable))
+    return list(dict.fromkeys(problems))
@@ -0,0 +1,126 @@
+"""Derive views locally from the base views returned by the API.
+
+The server can calculate percentages itself, but they are cheap to compute
+from counts and bases, and shipping them as separate JSON matrices roughly
+doubles the size of a typical tables response. ``plan_views`` works out
+which views have to be fetched and ``derive_views`` fills in the rest.
+"""
+import numpy as np
+import pandas as pd
+
+
+def column_percentages(counts, cbase):
+    """Calculate column percentages (the c% view) from counts and cbase.
+
+    Parameters
+    ----------
+    counts : pandas.DataFrame
+        The counts view, indexed by (variable, code).
+    cbase : pandas.DataFrame
+        The cbase view, with one row per stub variable.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Counts divided by the column base of their stub variable, times 100.
+
+    """
+    bases = cbase.groupby(level=0, sort=False).first()
+    bases = bases.reindex(index=counts.index.get_level_values(0),
+                          columns=counts.columns)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = counts.to_numpy(dtype=float) / bases.to_numpy(dtype=float)
+    return pd.DataFrame(data=values * 100,
+                        index=counts.index,
+                        columns=counts.columns)
+
+
+def row_percentages(counts):
+    """Calculate row percentages (the r% view) from counts.
+
+    Each row is divided by its total within each banner variable, which
+    is only the row base when the banner variables are single coded.
+
+    Parameters
+    ----------
+    counts : pandas.DataFrame
+        The counts view, with (variable, code) columns.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Counts as a percentage of the row total for each banner variable.
+
+    """
+    values = counts.to_numpy(dtype=float)
+    banner = pd.factorize(counts.columns.get_level_values(0))[0]
+    totals = np.zeros((values.shape[0], banner.max() + 1 if len(banner) else 0))
+    np.add.at(totals.T, banner, values.T)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = values / totals[:, banner]
+    return pd.DataFrame(data=values * 100,
+                        index=counts.index,
+                        columns=counts.columns)
+
+
+# view name -> (views it is calculated from, function doing the calculation)
+DERIVATIONS = {
+    'c%': (('counts', 'cbase'), column_percentages),
+    'r%': (('counts',), row_percentages),
+}
+
+
+def plan_views(views, derivable=None):
+    """Split requested views into the ones to fetch and the ones to derive.
+
+    Parameters
+    ----------
+    views : list
+        The views the caller asked for, in order.
+    derivable : list
+        Names of views that may be derived locally. Defaults to every view
+        in ``DERIVATIONS``.
+
+    Returns
+    -------
+    tuple
+        A (fetch, derive) pair of lists. ``fetch`` keeps the order of
+        ``views`` and adds any base views the derived views need.
+
+    """
+    if derivable is None:
+        derivable = DERIVATIONS.keys()
+    derive = [view for view in views if view in derivable
+              and view in DERIVATIONS]
+    fetch = [view for view in views if view not in derive]
+    for view in derive:
+        for source in DERIVATIONS[view][0]:
+            if source not in fetch:
+                fetch.append(source)
+    return fetch, derive
+
+
+def derive_views(results, derive):
+    """Add derived views to a dict of fetched views.
+
+    Views whose sources weren't returned by the server are skipped, the same
+    way the server skips views it doesn't support.
+
+    Parameters
+    ----------
+    results : dict
+        Views as keys and pandas.DataFrames as values.
+    derive : list
+        Names of the views to calculate.
+
+    Returns
+    -------
+    dict
+        The ``results`` dict, with the derived views added.
+
+    """
+    for view in derive:
+        sources, function = DERIVATIONS[view]
+        if all(source in results for source in sources):
+            results[view] = function(*[results[source] for source in sources])
+    return results
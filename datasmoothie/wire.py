@@ -0,0 +1,172 @@
+"""Arrow IPC encoding of table responses.
+
+The ``tables``, ``table``, ``crosstab`` and ``sig_diff`` actions send their
+DataFrames as JSON arrays by default. When pyarrow is installed the client
+asks for them as Arrow IPC instead, which is smaller and needs no float
+parsing, and falls back to JSON whenever the server answers with that.
+
+Each DataFrame is one Arrow IPC stream and a tables response is the streams
+of its views one after the other. The schema metadata holds the view name
+and the index and column labels as JSON. A frame with a single numeric
+dtype is stored as one ``values`` column with the cells in row order, so
+decoding it only wraps the received bytes in a numpy array; other frames
+have one Arrow column per DataFrame column.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:
+    pyarrow = None
+
+ARROW = 'application/vnd.apache.arrow.stream'
+JSON = 'application/json'
+
+
+def accept_header():
+    """The Accept header for actions that can be answered in Arrow IPC."""
+    if pyarrow is None:
+        return JSON
+    return '{}, {};q=0.9'.format(ARROW, JSON)
+
+
+def is_arrow(response):
+    """Whether a requests.Response holds Arrow IPC rather than JSON."""
+    content_type = response.headers.get('Content-Type', '')
+    return content_type.split(';')[0].strip() == ARROW
+
+
+def _labels(labels):
+    return json.dumps([list(i) if isinstance(i, tuple) else i
+                       for i in labels.tolist()], default=_to_json)
+
+
+def _to_json(value):
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    raise TypeError("{} is not JSON serializable".format(type(value)))
+
+
+def encode_frame(frame, view=None):
+    """Serialize a DataFrame as one Arrow IPC stream.
+
+    Parameters
+    ----------
+    frame : pandas.DataFrame
+        The table to send.
+    view : string
+        The name of the view, for frames that are part of a tables
+        response.
+
+    Returns
+    -------
+    bytes
+
+    """
+    if pyarrow is None:
+        raise ImportError("Arrow IPC encoding requires pyarrow.")
+    metadata = {'index': _labels(frame.index),
+                'columns': _labels(frame.columns)}
+    if view is not None:
+        metadata['view'] = view
+    dtypes = set(frame.dtypes)
+    dtype = dtypes.pop() if len(dtypes) == 1 else None
+    if isinstance(dtype, np.dtype) and dtype.kind in 'iuf':
+        metadata['layout'] = 'values'
+        table = pyarrow.table(
+            {'values': pyarrow.array(frame.to_numpy().ravel())})
+    else:
+        metadata['layout'] = 'columns'
+        table = pyarrow.table(
+            {str(position): pyarrow.array(frame.iloc[:, position].tolist())
+             for position in range(frame.shape[1])})
+    table = table.replace_schema_metadata(metadata)
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def encode_tables(results):
+    """Serialize the views of a tables response, one stream per view."""
+    return b''.join(encode_frame(frame, view)
+                    for view, frame in results.items())
+
+
+def _read_values(table, body, base):
+    """The values column as a numpy array over the bytes of ``body``."""
+    chunks = table.column('values').chunks
+    if len(chunks) != 1 or chunks[0].null_count:
+        return table.column('values').to_numpy()
+    chunk = chunks[0]
+    dtype = np.dtype(chunk.type.to_pandas_dtype())
+    offset = chunk.buffers()[1].address - base + chunk.offset * dtype.itemsize
+    if not 0 <= offset <= len(body) - len(chunk) * dtype.itemsize:
+        # pyarrow copied the buffer, e.g. to align it
+        return chunk.to_numpy()
+    return np.frombuffer(body, dtype=dtype, count=len(chunk), offset=offset)
+
+
+def _read_frame(table, body, base):
+    metadata = {key.decode(): value.decode()
+                for key, value in table.schema.metadata.items()}
+    index = pd.MultiIndex.from_tuples(json.loads(metadata['index']))
+    columns = pd.MultiIndex.from_tuples(json.loads(metadata['columns']))
+    if metadata['layout'] == 'values':
+        values = _read_values(table, body, base).reshape(
+            len(index), len(columns))
+        frame = pd.DataFrame(values, index=index, columns=columns,
+                             copy=False)
+    else:
+        frame = pd.DataFrame({position: table.column(str(position))
+                              .to_pylist()
+                              for position in range(len(columns))},
+                             index=index)
+        frame.columns = columns
+    return metadata.get('view'), frame
+
+
+def iter_frames(content):
+    """Decode the DataFrames of an Arrow IPC response.
+
+    The body is copied once into a writable buffer that the values of the
+    frames then point into, so the frames can be changed like any other.
+
+    Parameters
+    ----------
+    content : bytes
+        The body of the response.
+
+    Yields
+    ------
+    tuple
+        (view, DataFrame) for each stream in the body, with a view of
+        None for responses with a single table.
+
+    """
+    if pyarrow is None:
+        raise ImportError("Arrow IPC decoding requires pyarrow.")
+    body = bytearray(content)
+    buffer = pyarrow.py_buffer(body)
+    reader = pyarrow.BufferReader(buffer)
+    while reader.tell() < len(body):
+        table = pyarrow.ipc.open_stream(reader).read_all()
+        yield _read_frame(table, body, buffer.address)
+
+
+def decode_tables(content):
+    """Like decoding.decode_tables, for a tables response in Arrow IPC."""
+    return dict(iter_frames(content))
+
+
+def decode_frame(content):
+    """Decode a response with a single table in Arrow IPC."""
+    for view, frame in iter_frames(content):
+        return frame
+    raise ValueError("The response has no table.")
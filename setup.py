@@ -4,7 +4,12 @@ import setuptools
 setuptools.setup(
     name="datasmoothie",
     packages=setuptools.find_packages(),
-    extras_require={':python_version<"3.7"': ['importlib-resources']},
+    extras_require={':python_version<"3.7"': ['importlib-resources'],
+                    'parquet': ['pyarrow'],
+                    'arrow': ['pyarrow'],
+                    'zstd': ['zstandard'],
+                    'yaml': ['PyYAML']},
+    entry_points={'console_scripts': ['datasmoothie=datasmoothie.cli:main']},
     version="0.13",
     license='MIT',
     include_package_data=True,
@@ -2,9 +2,16 @@ import json
 import pytest
 import pandas as pd
 
+import datasmoothie.client
+from datasmoothie.testing import FakeServer
+from datasmoothie.transport import FakeTransport
+
 
 def pytest_addoption(parser):
     parser.addoption("--token", action="store", default="")
+    parser.addoption("--live", action="store_true", default=False,
+                     help="Run against the API on localhost:8030 instead of "
+                          "the in-process fake server.")
 
 
 def pytest_generate_tests(metafunc):
@@ -15,6 +22,19 @@ def pytest_generate_tests(metafunc):
         metafunc.parametrize("token", [option_value])
 
 
+@pytest.fixture(autouse=True)
+def fake_server(request, monkeypatch):
+    """Point every Client at a fresh in-process server unless --live is set."""
+    if request.config.option.live:
+        return None
+    server = FakeServer.from_fixtures('tests/fixtures/sample_meta.json',
+                                      'tests/fixtures/sample_data.csv',
+                                      api_keys=[request.config.option.token])
+    monkeypatch.setattr(datasmoothie.client, 'RequestsTransport',
+                        lambda: FakeTransport(server))
+    return server
+
+
 @pytest.fixture(scope="session")
 def dataset_meta():
     with open('tests/fixtures/sample_meta.json') as json_file:
@@ -0,0 +1,41 @@
+import pandas as pd
+
+from datasmoothie import assembly
+
+
+def _view(rows, values):
+    columns = pd.MultiIndex.from_tuples([('gender', 0), ('gender', 1)])
+    return pd.DataFrame(values, index=pd.MultiIndex.from_tuples(rows),
+                        columns=columns)
+
+
+def _results():
+    codes = [('quality', 2), ('quality', 10), ('price', 1)]
+    return {
+        'counts': _view(codes, [[1, 2], [3, 4], [5, 6]]),
+        'c%': _view(codes, [[10.0, 20.0], [30.0, 40.0], [50.0, 60.0]]),
+        'cbase': _view([('quality', 'All'), ('price', 'All')],
+                       [[9.0, 12.0], [5.0, 6.0]]),
+    }
+
+
+def test_combine_views_interleaves_counts_and_percentages():
+    combined = assembly.combine_views(_results(), ['counts', 'cbase', 'c%'])
+    assert combined.index.tolist() == [
+        ('quality', 'All'), ('price', 'All'),
+        ('price', '1'), ('price', '1 (%)'),
+        ('quality', '10'), ('quality', '10 (%)'),
+        ('quality', '2'), ('quality', '2 (%)')]
+    assert combined[('gender', 1)].tolist() == [12, 6, 6, 60, 4, 40, 2, 20]
+    assert (combined.dtypes == 'float64').all()
+
+
+def test_combine_views_matches_concat():
+    results = _results()
+    combined = assembly.combine_views(results, ['cbase', 'counts'])
+    expected = pd.concat([results['cbase'], results['counts']])
+    pd.testing.assert_frame_equal(combined, expected)
+    results['cbase'] = results['cbase'].astype(object)
+    combined = assembly.combine_views(results, ['counts', 'cbase'])
+    expected = pd.concat([results['counts'], results['cbase']])
+    pd.testing.assert_frame_equal(combined, expected)
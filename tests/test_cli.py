@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from datasmoothie import cli
+
+
+def _plan(tmp_path, plan, name='plan.json'):
+    path = tmp_path / name
+    path.write_text(json.dumps(plan))
+    return str(path)
+
+
+def test_run_plan(token, fake_server, tmp_path, capsys):
+    if fake_server is None:
+        pytest.skip("needs the fake server")
+    plan = _plan(tmp_path, {
+        'client': {'host': 'localhost:8030/api2', 'ssl': False,
+                   'max_workers': 2, 'retries': 1},
+        'tables': [{'datasource': 1,
+                    'stubs': [['price', 'quality']],
+                    'banners': [['gender'], ['agecat']],
+                    'views': ['cbase', 'counts', 'c%'],
+                    'output': str(tmp_path / 'tables.csv')}],
+        'reports': [{'title': 'Tracker', 'datasource': 1,
+                     'charts': [['price', 'gender'], ['quality', '@']],
+                     'charts_per_row': 2}]})
+    assert cli.main(['run', plan, '--api-key', token, '--timings']) == 0
+    assert (tmp_path / 'tables.csv').read_text().count('Questions') >= 2
+    report = [i for i in fake_server.reports.values()
+              if i['meta']['title'] == 'Tracker'][0]
+    assert len(report['elements']) == 2
+    output = capsys.readouterr().err
+    assert 'table 2/2' in output
+    assert 'requests' in output
+
+
+def test_load_plan(tmp_path):
+    yaml = pytest.importorskip('yaml')
+    path = tmp_path / 'plan.yaml'
+    path.write_text(yaml.safe_dump({'tables': [{
+        'datasource': 1, 'stubs': [['q1']], 'banners': [['gender']],
+        'views': ['counts'], 'output': 'tables.xlsx'}]}))
+    assert cli.load_plan(str(path))['tables'][0]['views'] == ['counts']
+    with pytest.raises(ValueError, match='missing output'):
+        cli.load_plan(_plan(tmp_path, {'tables': [{
+            'datasource': 1, 'stubs': [], 'banners': [], 'views': []}]}))
+    with pytest.raises(ValueError, match='unknown settings: workers'):
+        cli.load_plan(_plan(tmp_path, {'client': {'workers': 8}}))
+
+
+def test_main_reports_errors(tmp_path, capsys):
+    plan = _plan(tmp_path, {'reports': [{'title': 'No charts'}]})
+    assert cli.main(['run', plan, '--api-key', 'key']) == 1
+    assert 'missing datasource, charts' in capsys.readouterr().err
@@ -1,9 +1,14 @@
 from io import StringIO
 import pandas as pd
 
+import pytest
+
+import datasmoothie.client
 from datasmoothie import Client
 from datasmoothie import Datasource
 from datasmoothie import Report
+from datasmoothie.testing import FakeServer
+from datasmoothie.transport import FakeTransport
 # import quantipy as qp
 
 
@@ -98,3 +103,134 @@ def test_create_report(token):
     assert client.list_reports()['count'] == number_of_reports + 1
     report.delete()
     assert client.list_reports()['count'] == number_of_reports
+
+
+def test_iter_reports(token):
+    client = Client(api_key=token, host="localhost:8030/api2", ssl=False)
+    created = [client.create_report(title="iter report {}".format(i))
+               for i in range(7)]
+    reports = list(client.iter_reports(page_size=3))
+    titles = [i['title'] for i in client.iter_reports(page_size=2,
+                                                       fields=['title'],
+                                                       prefetch=False,
+                                                       title='iter report 3')]
+    count = client.list_reports()['count']
+    for report in created:
+        report.delete()
+    assert len(reports) == count
+    assert len({report['pk'] for report in reports}) == len(reports)
+    assert titles == ['iter report 3']
+
+
+def test_iter_datasources(token):
+    client = Client(api_key=token, host="localhost:8030/api2", ssl=False)
+    datasources = client.iter_datasources(page_size=1)
+    assert 'pk' in next(datasources)
+
+
+def test_bulk_reports(token):
+    client = Client(api_key=token, host="localhost:8030/api2", ssl=False)
+    reports = [client.create_report(title="bulk report {}".format(i))
+               for i in range(5)]
+    primary_keys = [report._pk for report in reports]
+    results = client.get_reports(primary_keys + [999999], max_workers=4)
+    assert [result.key for result in results] == primary_keys + [999999]
+    assert all(result.ok for result in results[:-1])
+    assert not results[-1].ok
+    fetched = [result.result for result in results[:-1]]
+    for report in fetched:
+        report.meta['title'] = report.meta['title'] + ' updated'
+    updated = client.update_reports(fetched, elements=False)
+    assert all(result.ok for result in updated)
+    assert client.get_report_meta(primary_keys[0])['title'] == 'bulk report 0 updated'
+    deleted = client.delete_reports(primary_keys)
+    assert all(result.ok for result in deleted)
+    assert not any(result.ok for result in client.get_reports(primary_keys))
+
+
+def test_get_wave_tables(token, dataset_meta, dataset_data):
+    client = Client(api_key=token, host="localhost:8030/api2", ssl=False)
+    primary_keys = []
+    for wave, rows in enumerate([slice(0, 50), slice(50, 100)]):
+        datasource = client.create_datasource("Wave {}".format(wave + 1))
+        datasource.update_meta_and_data(meta=dataset_meta,
+                                        data=dataset_data[rows].to_csv())
+        primary_keys.append(datasource.get_id())
+    tables = client.get_wave_tables(primary_keys, ['price'],
+                                    ['gender'], ['cbase', 'counts', 'c%'],
+                                    max_workers=2)
+    single = client.get_datasource(primary_keys[0]).get_tables(
+        ['price'], ['gender'], ['cbase', 'counts', 'c%'], combine=True)
+    assert tables.index.names == ['Wave', 'Questions', 'Values']
+    assert tables.index.levels[0].tolist() == ['Wave 1', 'Wave 2']
+    pd.testing.assert_frame_equal(tables.loc['Wave 1'], single)
+    bases = tables.xs('All', level='Values').sum()
+    assert bases.sum() == len(dataset_data)
+
+
+def test_get_datasource_caches_meta(token, fake_server):
+    if fake_server is None:
+        pytest.skip("needs the fake server")
+    client = Client(api_key=token, host="localhost:8030/api2", ssl=False)
+    primary_key = client.list_datasources()['results'][0]['pk']
+    first = client.get_datasource(primary_key)
+    second = client.get_datasource(primary_key)
+    assert second.survey_meta == first.survey_meta
+    # shared, as meta data is never changed in place
+    assert second.survey_meta is first.survey_meta
+    meta_requests = [path for method, path in fake_server.requests
+                     if path.endswith('/meta')]
+    assert len(meta_requests) == 1
+
+
+def test_get_datasource_is_lazy(token, fake_server):
+    if fake_server is None:
+        pytest.skip("needs the fake server")
+    client = Client(api_key=token, host="localhost:8030/api2", ssl=False)
+    primary_key = client.list_datasources()['results'][0]['pk']
+    datasource = client.get_datasource(primary_key)
+    assert datasource.get_id() == primary_key
+    assert not [path for method, path in fake_server.requests
+                if path.endswith('/meta')]
+    assert datasource.get_default_language() == 'en-GB'
+    partial = client.get_datasource(primary_key,
+                                    meta_variables=['gender', 'agecat'])
+    assert list(partial.survey_meta['columns']) == ['gender', 'agecat']
+    assert partial.text('gender') == datasource.text('gender')
+
+
+def test_meta_cache_is_bounded(monkeypatch, dataset_meta):
+    monkeypatch.setattr(datasmoothie.client, 'META_CACHE_SIZE', 2)
+    server = FakeServer()
+    keys = [server.add_datasource(str(i), meta=dataset_meta, data='')
+            for i in range(3)]
+    client = Client(api_key='', transport=FakeTransport(server))
+    for primary_key in keys + keys[-1:]:
+        client.get_datasource(primary_key).get_default_language()
+    assert list(client._meta_cache) == keys[1:]
+    meta_requests = [path for method, path in server.requests
+                     if path.endswith('/meta')]
+    assert len(meta_requests) == 3
+
+
+def test_partial_meta_loads_missing_variables(token, fake_server):
+    if fake_server is None:
+        pytest.skip("needs the fake server")
+    client = Client(api_key=token, host="localhost:8030/api2", ssl=False)
+    primary_key = client.list_datasources()['results'][0]['pk']
+    partial = client.get_datasource(primary_key, meta_variables=['gender'])
+    tables = partial.get_tables(['price'], ['gender'], ['counts'])
+    assert 'counts' in tables
+    assert set(partial.survey_meta['columns']) == {'gender', 'price'}
+    other = client.get_datasource(primary_key, meta_variables=['gender'])
+    combined = other.get_tables(['quality'], ['gender'],
+                                ['cbase', 'counts', 'c%'], combine=True,
+                                validate=False)
+    assert combined.index.get_level_values(0)[0] == \
+        partial.text('quality')
+    requests = len(fake_server.requests)
+    # cached for the version, so a third datasource fetches nothing
+    third = client.get_datasource(primary_key, meta_variables=['price'])
+    assert third.text('quality') == other.text('quality')
+    assert [path for method, path in fake_server.requests[requests:]
+            if path.endswith('/meta')] == []
@@ -0,0 +1,44 @@
+import pytest
+
+from datasmoothie import Client
+from datasmoothie import compression
+from datasmoothie.testing import FakeServer
+from datasmoothie.transport import FakeTransport
+
+
+def test_compress():
+    body = b'{"data": "' + b'1,2,3\n' * 1000 + b'"}'
+    compressed = compression.compress(body, 'gzip')
+    assert len(compressed) < len(body) / 10
+    # no timestamp, so identical requests stay identical
+    assert compression.compress(body, 'gzip') == compressed
+    assert compression.decompress(compressed, 'gzip') == body
+    smallest = compression.compress(body, 'gzip', level=9)
+    assert len(smallest) <= len(compressed)
+    assert compression.decompress(smallest, 'gzip') == body
+    assert compression.resolve('auto') in ('gzip', 'zstd')
+    with pytest.raises(ValueError):
+        compression.resolve('brotli')
+    assert compression.choose('gzip, deflate') == 'gzip'
+    assert compression.choose('identity') is None
+
+
+def test_compressed_requests_and_responses():
+    server = FakeServer.from_fixtures('tests/fixtures/sample_meta.json',
+                                      'tests/fixtures/sample_data.csv')
+    client = Client(api_key='', host="localhost:8030/api2", ssl=False,
+                    transport=FakeTransport(server), compression='gzip')
+    events = []
+    client.add_hook(events.append)
+    datasource = client.get_datasource(1)
+    resp = datasource.get_meta_and_data()
+    response = client._send('GET', '{}/datasource/1/meta_data'.format(
+        client.base_url))
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert int(response.headers['Content-Length']) < len(response.content)
+    meta, data = resp['meta'], resp['data']
+    datasource.update_meta_and_data(meta, data)
+    assert server.datasources[1]['data'] == data
+    upload = events[-1]
+    assert upload.method == 'POST'
+    assert upload.bytes_sent < len(data) / 2
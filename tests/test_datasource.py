@@ -1,3 +1,4 @@
+import concurrent.futures
 import json
 import os.path
 
@@ -87,3 +88,52 @@ def test_dataset_to_excel(token):
     datasource.table_set_to_excel(table_set, 'myexcel.xlsx')
     assert os.path.isfile('myexcel.xlsx')
     os.remove("myexcel.xlsx")
+
+def test_get_dataframe(token):
+    client = Client(api_key=token, host="localhost:8030/api2", ssl=False)
+    datasources = client.list_datasources()
+    primary_key = datasources['results'][0]['pk']
+    datasource = client.get_datasource(primary_key)
+    dataframe = datasource.get_dataframe()
+    assert dataframe['gender'].dtype == 'category'
+    assert set(dataframe['gender'].cat.categories) == {0, 1}
+    assert str(dataframe['@1'].dtype).startswith('Int')
+    assert datasource.get_dataframe() is dataframe
+
+
+def test_get_dataframe_from_threads(token):
+    client = Client(api_key=token, host="localhost:8030/api2", ssl=False)
+    primary_key = client.list_datasources()['results'][0]['pk']
+    datasource = client.get_datasource(primary_key)
+    meta = datasource.survey_meta
+    with concurrent.futures.ThreadPoolExecutor(8) as pool:
+        dataframes = list(pool.map(lambda i: datasource.get_dataframe(),
+                                   range(8)))
+    assert all(dataframe is dataframes[0] for dataframe in dataframes)
+    datasource.get_meta_and_data()
+    assert datasource.survey_meta is not meta
+
+
+def test_iter_table_set(token, tmp_path):
+    client = Client(api_key=token, host="localhost:8030/api2", ssl=False)
+    primary_key = client.list_datasources()['results'][0]['pk']
+    datasource = client.get_datasource(primary_key)
+    stubs = [['distance', 'store'], ['price', 'quality']]
+    banners = [['gender', 'agecat'], ['regular']]
+    views = ['cbase', 'counts', 'c%']
+    expected = datasource.get_table_set(stubs, banners, views)
+    streamed = list(datasource.iter_table_set(stubs, banners, views,
+                                              max_workers=2))
+    assert [(stub, banner) for stub, banner, table in streamed] == \
+        [(stub, banner) for stub in stubs for banner in banners]
+    for (stub, banner, table), expected_table in zip(streamed, expected):
+        assert table.equals(expected_table)
+    unordered = datasource.iter_table_set(stubs, banners, views,
+                                          max_workers=3, ordered=False)
+    path = tmp_path / 'tables.csv'
+    datasource.table_set_to_csv(unordered, str(path))
+    assert path.read_text().count('\n\n') == len(expected) - 1
+    path = tmp_path / 'tables.xlsx'
+    datasource.table_set_to_excel(
+        datasource.iter_table_set(stubs, banners, views), str(path))
+    assert os.path.isfile(str(path))
@@ -0,0 +1,51 @@
+import time
+
+import pytest
+
+from datasmoothie import deadline
+
+
+def test_within_nested():
+    assert deadline.current() is None
+    with deadline.within(10) as outer:
+        with deadline.within(100) as inner:
+            assert inner is outer
+        with deadline.within(1) as inner:
+            assert inner.timeout(60) <= 1
+    assert deadline.current() is None
+
+
+def test_expired_timeout():
+    with deadline.within(0.01) as current:
+        time.sleep(0.02)
+        assert current.expired
+        with pytest.raises(deadline.DeadlineExceeded):
+            current.timeout(60)
+
+
+def test_run_all():
+    assert deadline.run_all(lambda i: i * 2, [1, 2, 3], 2) == [2, 4, 6]
+    with pytest.raises(deadline.DeadlineExceeded):
+        with deadline.within(0.05):
+            deadline.run_all(time.sleep, [0.2] * 4, 1)
+
+
+def test_iter_all():
+    running = []
+    peak = []
+
+    def work(i):
+        running.append(i)
+        peak.append(len(running))
+        time.sleep(0.01 * (5 - i))
+        running.remove(i)
+        return i * 2
+
+    results = list(deadline.iter_all(work, range(5), 2))
+    assert results == [(i, i * 2) for i in range(5)]
+    assert max(peak) <= 2
+    unordered = list(deadline.iter_all(work, range(5), 3, ordered=False))
+    assert sorted(unordered) == results
+    with pytest.raises(deadline.DeadlineExceeded):
+        list(deadline.iter_all(time.sleep, [0.2] * 4, 1,
+                               deadline=deadline.Deadline(0.05)))
@@ -0,0 +1,72 @@
+import json
+
+import pandas as pd
+
+from datasmoothie import Client
+from datasmoothie import decoding
+
+
+def test_decode_pool():
+    content = json.dumps({'results': {
+        'counts': {'data': [[1, 2], [3, 4]],
+                   'index': [['q1', 1], ['q1', 2]],
+                   'columns': [['gender', 0], ['gender', 1]]},
+        'mean': {'data': [[1.5, None]],
+                 'index': [['q1', 'mean']],
+                 'columns': [['gender', 0], ['gender', 1]]},
+        'labels': {'data': [['a', 1.0]],
+                   'index': [['q1', 'All']],
+                   'columns': [['gender', 0], ['gender', 1]]}}})
+    expected = decoding.decode_tables(content)
+    with decoding.DecodePool(1) as pool:
+        results = pool.decode(content)
+    assert list(results) == ['counts', 'mean', 'labels']
+    for view in expected:
+        pd.testing.assert_frame_equal(results[view], expected[view])
+
+
+def test_get_table_set_with_decode_pool(token):
+    # ask for JSON, which is what the pool and the stream parser decode
+    client = Client(api_key=token, host="localhost:8030/api2", ssl=False,
+                    binary=False)
+    primary_key = client.list_datasources()['results'][0]['pk']
+    datasource = client.get_datasource(primary_key)
+    stubs = [['price', 'quality']]
+    banners = [['gender'], ['agecat']]
+    views = ['cbase', 'counts', 'c%', 'mean']
+    with decoding.DecodePool(2) as pool:
+        tables = datasource.get_table_set(stubs, banners, views,
+                                          max_workers=2, decoder=pool)
+    expected = datasource.get_table_set(stubs, banners, views)
+    for table, expected_table in zip(tables, expected):
+        pd.testing.assert_frame_equal(table, expected_table)
+
+
+def test_iter_views_across_chunks():
+    content = {'info': {'note': 'a "quoted", {braced} [text]\\'},
+               'results': {
+                   'counts': {'data': [[1, 2], [3, None]],
+                              'index': [['q"1', 1], ['q1', 2]],
+                              'columns': [['gender', 0], ['gender', 1]]},
+                   'mean': {'data': [[1.5, -2e3]],
+                            'index': [['qé', 'mean']],
+                            'columns': [['gender', 0], ['gender', 1]]}}}
+    raw = json.dumps(content, ensure_ascii=False).encode('utf-8')
+    for size in (1, 3, 64):
+        chunks = [raw[i:i + size] for i in range(0, len(raw), size)]
+        assert dict(decoding.iter_views(chunks)) == content['results']
+
+
+def test_get_tables_stream(token):
+    # ask for JSON, which is what the pool and the stream parser decode
+    client = Client(api_key=token, host="localhost:8030/api2", ssl=False,
+                    binary=False)
+    primary_key = client.list_datasources()['results'][0]['pk']
+    datasource = client.get_datasource(primary_key)
+    arguments = (['price', 'quality'], ['gender', 'agecat'],
+                 ['cbase', 'counts', 'c%', 'mean'])
+    streamed = datasource.get_tables(*arguments, stream=True)
+    expected = datasource.get_tables(*arguments)
+    assert list(streamed) == list(expected)
+    for view in expected:
+        pd.testing.assert_frame_equal(streamed[view], expected[view])
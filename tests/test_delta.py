@@ -0,0 +1,131 @@
+import io
+
+import pandas as pd
+
+import pytest
+
+from datasmoothie import Client
+from datasmoothie import delta
+from datasmoothie import snapshot
+from datasmoothie import synthetic
+from datasmoothie.testing import FakeServer
+from datasmoothie.transport import FakeTransport
+
+
+def _survey(rows=200):
+    meta = synthetic.generate_meta(singles=5, delimited_sets=2, ints=1,
+                                   floats=1)
+    return meta, synthetic.generate_data(meta, rows=rows)
+
+
+def test_diff_and_apply():
+    meta, data = _survey()
+    new = pd.concat([data.iloc[5:], data.iloc[:3].assign(id=[901, 902, 903])],
+                    ignore_index=True)
+    new.loc[10, 'q1'] = 99
+    new_meta = synthetic.generate_meta(singles=5, delimited_sets=2, ints=1,
+                                       floats=1)
+    new_meta['columns']['q1']['values'].append(
+        {'text': {'en-GB': 'Answer 99'}, 'value': 99})
+    payload = delta.diff(meta, data.to_csv(index=False), new_meta,
+                         new.to_csv(index=False), key='id')
+    changed = pd.read_csv(io.StringIO(payload['data']))
+    assert changed['id'].tolist() == [16, 901, 902, 903]
+    assert payload['removed'] == [1, 2, 3, 4, 5]
+    assert list(payload['meta']['changed']['columns']) == ['q1']
+    assert payload['rows'] == 198
+    applied_meta, applied = delta.apply(meta, data.to_csv(index=False),
+                                        payload)
+    assert applied_meta == new_meta
+    pd.testing.assert_frame_equal(pd.read_csv(io.StringIO(applied)), new,
+                                  check_dtype=False)
+
+
+def test_update_meta_and_data_delta():
+    meta, data = _survey(rows=1000)
+    server = FakeServer(api_keys=['token'])
+    primary_key = server.add_datasource('Tracker', meta=meta,
+                                        data=data.to_csv(index=False))
+    client = Client(api_key='token', host="localhost:8030/api2", ssl=False,
+                    transport=FakeTransport(server))
+    datasource = client.get_datasource(primary_key)
+    more = synthetic.generate_data(meta, rows=20, seed=1)
+    more['id'] += 1000
+    new = pd.concat([data, more], ignore_index=True).to_csv(index=False)
+    resp = datasource.update_meta_and_data(meta, new, delta=True, key='id')
+    assert resp.json()['rows'] == 1020
+    assert server.datasources[primary_key]['data'] == new
+    more['id'] += 20
+    newer = new + more.to_csv(index=False, header=False)
+    requests = len(server.requests)
+    datasource.update_meta_and_data(meta, newer, delta=True, key='id')
+    assert server.requests[requests:] == [
+        ('POST', 'datasource/{}/meta_data_delta'.format(primary_key))]
+    assert len(datasource.get_meta_and_data()['data']) == len(newer)
+
+
+def test_failed_upload_keeps_the_baseline():
+    meta, data = _survey(rows=100)
+    csv = data.to_csv(index=False)
+    server = FakeServer(api_keys=['token'])
+    primary_key = server.add_datasource('Tracker', meta=meta, data=csv)
+    client = Client(api_key='token', host="localhost:8030/api2", ssl=False,
+                    transport=FakeTransport(server))
+    datasource = client.get_datasource(primary_key)
+    datasource.get_meta_and_data()
+    server.responses[('POST', 'datasource/{}/meta_data'.format(
+        primary_key))] = (500, {})
+    resp = datasource.update_meta_and_data(meta,
+                                           data.head(50).to_csv(index=False))
+    assert resp.status_code == 500
+    assert datasource.survey_data == csv
+    del server.responses[('POST', 'datasource/{}/meta_data'.format(
+        primary_key))]
+    more = synthetic.generate_data(meta, rows=5, seed=1)
+    more['id'] += 100
+    new = csv + more.to_csv(index=False, header=False)
+    resp = datasource.update_meta_and_data(meta, new, delta=True, key='id')
+    assert resp.json()['rows'] == 105
+    assert server.datasources[primary_key]['data'] == new
+
+
+@pytest.mark.skipif(snapshot.pyarrow is None,
+                    reason="pyarrow is not installed")
+def test_delta_from_snapshot(tmp_path):
+    meta, data = _survey(rows=1000)
+    server = FakeServer(api_keys=['token'])
+    primary_key = server.add_datasource('Tracker', meta=meta,
+                                        data=data.to_csv(index=False))
+
+    def datasource():
+        # a new client every time, like a job run by cron
+        client = Client(api_key='token', host="localhost:8030/api2",
+                        ssl=False, transport=FakeTransport(server),
+                        snapshot_store=snapshot.SnapshotStore(str(tmp_path)))
+        return client.get_datasource(primary_key)
+
+    more = synthetic.generate_data(meta, rows=20, seed=1)
+    more['id'] += 1000
+    new = pd.concat([data, more], ignore_index=True).to_csv(index=False)
+    datasource().update_meta_and_data(meta, new, delta=True, key='id')
+    payloads = []
+    handler = server._update_meta_data_delta
+
+    def update(pk, payload, **kwargs):
+        payloads.append(payload)
+        return handler(pk, payload, **kwargs)
+
+    server._update_meta_data_delta = update
+    requests = len(server.requests)
+    more['id'] += 20
+    newer = new + more.to_csv(index=False, header=False)
+    resp = datasource().update_meta_and_data(meta, newer, delta=True,
+                                             key='id')
+    assert resp.json()['rows'] == 1040
+    assert ('GET', 'datasource/{}/meta_data'.format(primary_key)) not in \
+        server.requests[requests:]
+    changed = pd.read_csv(io.StringIO(payloads[0]['data']))
+    assert changed['id'].tolist() == more['id'].tolist()
+    pd.testing.assert_frame_equal(
+        pd.read_csv(io.StringIO(server.datasources[primary_key]['data'])),
+        pd.read_csv(io.StringIO(newer)), check_dtype=False)
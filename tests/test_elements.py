@@ -0,0 +1,70 @@
+import pytest
+
+from datasmoothie import Client
+from datasmoothie.elements import ElementCollection, next_rowid
+
+
+def _chart(rowid, has_on_left=False, position=None):
+    element = {'rowid': rowid, 'Data': {'hasOnLeft': has_on_left}}
+    if position is not None:
+        element['position'] = position
+    return element
+
+
+def _layout(elements):
+    return [(i['rowid'], i['position'], i['Data']['hasOnLeft'])
+            for i in elements]
+
+
+def test_next_rowid_is_unique():
+    rowids = [next_rowid() for _ in range(1000)]
+    assert len(set(rowids)) == len(rowids)
+
+
+def test_element_collection():
+    elements = ElementCollection([_chart(3, position=3),
+                                  _chart(1, True, position=1),
+                                  _chart(2, True, position=2)])
+    # sorted by position, and the first chart can't be on the right
+    assert _layout(elements) == [(1, 1, False), (2, 2, True), (3, 3, False)]
+    assert elements.get(3)['position'] == 3
+    assert elements.at_position(2)['rowid'] == 2
+    assert elements.index_of(3) == 2
+    before = elements.copy()
+    first = elements[0]
+    # removing the start of a row makes the next chart start it
+    elements.remove_rowid(1)
+    assert _layout(elements) == [(2, 1, False), (3, 2, False)]
+    elements.insert(1, _chart(4, True))
+    elements.move(2, 3)
+    assert _layout(elements) == [(4, 1, False), (3, 2, False), (2, 3, False)]
+    elements.append(_chart(5, True))
+    assert _layout(elements)[-1] == (5, 4, True)
+    del elements[-2]
+    assert _layout(elements) == [(4, 1, False), (3, 2, False), (5, 3, False)]
+    assert elements.get(2) is None
+    with pytest.raises(ValueError):
+        elements.append(_chart(3))
+    # copies and elements read earlier are never changed
+    assert _layout(before) == [(1, 1, False), (2, 2, True), (3, 3, False)]
+    assert first == {'rowid': 1, 'position': 1, 'Data': {'hasOnLeft': False}}
+
+
+def test_move_and_remove_report_elements(token):
+    client = Client(api_key=token, host="localhost:8030/api2", ssl=False)
+    datasource_pk = client.list_datasources()['results'][0]['pk']
+    report = client.create_report('ordered report')
+    report.add_charts(datasource_pk,
+                      x_y_pairs=[('price', 'gender'), ('quality', 'gender'),
+                                 ('service', 'gender'), ('overall', '@')],
+                      charts_per_row=2)
+    rowids = [element['rowid'] for element in report.elements]
+    assert len(set(rowids)) == 4
+    report.move_element(rowids[3], 1)
+    report.remove_element(rowids[0])
+    fetched = client.get_report(report._pk)
+    assert [i['rowid'] for i in fetched.elements] == \
+        [rowids[3], rowids[1], rowids[2]]
+    assert [i['position'] for i in fetched.elements] == [1, 2, 3]
+    assert fetched.get_element(rowids[2])['Data']['x'] == 'service'
+    report.delete()
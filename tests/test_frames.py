@@ -0,0 +1,35 @@
+import io
+
+import pandas as pd
+
+from datasmoothie import frames
+from datasmoothie import synthetic
+
+
+def test_read_survey_data():
+    meta = synthetic.generate_meta(singles=4, delimited_sets=2, ints=1,
+                                   floats=1)
+    data = synthetic.generate_data(meta, rows=500)
+    csv = data.to_csv(index=False)
+    frame = frames.read_survey_data(csv, meta)
+    assert frame['q1'].dtype == 'category'
+    assert frame['n1'].dtype == 'Int8'
+    assert frame['f1'].dtype == 'float64'
+    assert frame['m1'].dtype == 'category'
+    assert frame['q1'].astype(float).equals(data['q1'])
+    plain = pd.read_csv(io.StringIO(csv))
+    assert frame.memory_usage(deep=True).sum() < \
+        plain.memory_usage(deep=True).sum() / 2
+
+
+def test_delimited_set_formats():
+    column = pd.Series(['1;3;', None, '2;', '3;7;'], name='m1')
+    codes = [1, 2, 3]
+    bits = frames.convert_delimited_set(column, codes, 'bits')
+    assert bits.tolist() == [5, 0, 2, 12]
+    unpacked = frames.unpack_bits(bits, [1, 2, 3, 7])
+    assert unpacked['m1_7'].tolist() == [False, False, False, True]
+    sparse = frames.convert_delimited_set(column, codes, 'sparse')
+    assert list(sparse.columns) == ['m1_1', 'm1_2', 'm1_3', 'm1_7']
+    assert sparse['m1_3'].sparse.to_dense().tolist() == [True, False, False,
+                                                         True]
@@ -0,0 +1,48 @@
+from datasmoothie import instrumentation
+from datasmoothie.instrumentation import Histogram
+from datasmoothie.instrumentation import MetricsAggregator
+
+
+def test_record_nested_calls():
+    events = []
+    with instrumentation.record([events.append], 'POST',
+                                'datasource/12', 'tables') as outer:
+        with instrumentation.record([events.append], 'POST',
+                                    'datasource/12', 'tables') as inner:
+            with inner.phase('network'):
+                pass
+    assert inner is outer
+    assert len(events) == 1
+    assert events[0].resource == 'datasource'
+    assert set(events[0].timings) == {'network', 'total'}
+
+
+def test_record_without_hooks():
+    with instrumentation.record([], 'GET', 'datasource') as event:
+        with event.phase('network'):
+            event.status_code = 200
+    assert event is instrumentation.NULL_EVENT
+    assert not event
+
+
+def test_histogram():
+    histogram = Histogram()
+    for value in [0.002, 0.003, 0.2, 4.0]:
+        histogram.observe(value)
+    assert histogram.count == 4
+    assert histogram.quantile(0.5) == 0.005
+    assert histogram.quantile(1.0) == 4.0
+
+
+def test_metrics_aggregator():
+    metrics = MetricsAggregator()
+    event = instrumentation.RequestEvent('POST', 'datasource/1', 'tables')
+    event.status_code = 200
+    event.retries = 2
+    event.add_timing('total', 0.1)
+    metrics(event)
+    metrics(event)
+    assert metrics.counters('datasource', 'tables')['retries'] == 4
+    summary = metrics.summary()['datasource/tables']
+    assert summary['statuses'] == {200: 2}
+    assert summary['phases']['total']['count'] == 2
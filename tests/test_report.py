@@ -1,8 +1,13 @@
+import concurrent.futures
 import json
+import random
 import time
 
+import pytest
+
 from datasmoothie import Client
 from datasmoothie import Report
+from datasmoothie.transport import FakeTransport
 
 
 
@@ -93,3 +98,108 @@ def test_add_multiple_charts(token):
                      charts_per_row=3)
     report = client.get_report(report._pk)
     assert len(report.elements) == original_length + 8
+
+
+def test_add_chart_from_threads(token):
+    client = Client(api_key=token, host="localhost:8030/api2", ssl=False)
+    datasource_pk = client.list_datasources()['results'][0]['pk']
+    datasource = client.get_datasource(datasource_pk)
+    report = client.create_report('shared report')
+    before = report.elements
+    meta = report.meta
+    variables = ['price', 'quality', 'overall', 'service'] * 4
+    with concurrent.futures.ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda x: report.add_chart(datasource_pk, x,
+                                                 update_server=False,
+                                                 datasource=datasource),
+                      variables))
+    assert len(report.elements) == len(before) + len(variables)
+    positions = [element['position'] for element in report.elements]
+    assert sorted(positions) == list(range(1, len(positions) + 1))
+    assert len(before) == 0
+    report.update_meta_element('title', 'renamed')
+    assert report.meta['title'] == 'renamed'
+    assert meta['title'] == 'shared report'
+    report.delete()
+
+
+def test_add_chart_with_title_needs_no_meta(token, fake_server):
+    if fake_server is None:
+        pytest.skip("needs the fake server")
+    client = Client(api_key=token, host="localhost:8030/api2", ssl=False)
+    datasource_pk = client.list_datasources()['results'][0]['pk']
+    report = client.create_report('titled charts')
+    element = report.add_chart(datasource_pk, 'price', y='gender',
+                               title='Price', validate=False)
+    assert element['Data']['chartOptions']['title'] == 'Price'
+    assert not [path for method, path in fake_server.requests
+                if method == 'GET' and
+                path.endswith(('/meta', '/meta_data'))]
+    report.delete()
+
+
+def test_add_chart_from_threads_updates_server(token, fake_server):
+    if fake_server is None:
+        pytest.skip("needs the fake server")
+
+    def latency(method, path):
+        # requests overtake each other
+        return random.uniform(0, 0.01) if method == 'PUT' else 0
+
+    client = Client(api_key=token, host="localhost:8030/api2", ssl=False,
+                    transport=FakeTransport(fake_server, latency=latency))
+    datasource_pk = client.list_datasources()['results'][0]['pk']
+    datasource = client.get_datasource(datasource_pk)
+    report = client.create_report('shared report')
+    variables = ['price', 'quality', 'overall', 'service'] * 4
+    with concurrent.futures.ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda x: report.add_chart(datasource_pk, x,
+                                                 datasource=datasource),
+                      variables))
+    on_server = client.get_report(report._pk).elements
+    assert [i['rowid'] for i in on_server] == \
+        [i['rowid'] for i in report.elements]
+    assert len(on_server) == len(variables)
+    report.delete()
+
+
+
+def test_update_meta_from_threads(token, fake_server):
+    if fake_server is None:
+        pytest.skip("needs the fake server")
+
+    def latency(method, path):
+        # requests overtake each other
+        return random.uniform(0, 0.01) if method == 'PUT' else 0
+
+    client = Client(api_key=token, host="localhost:8030/api2", ssl=False,
+                    transport=FakeTransport(fake_server, latency=latency))
+    report = client.create_report('shared meta')
+    changes = [(key, '{} {}'.format(key, i))
+               for i in range(8) for key in ('title', 'subtitle')]
+    with concurrent.futures.ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda change: report.update_meta_element(*change),
+                      changes))
+    on_server = client.get_report(report._pk).meta
+    assert report.meta['title'].startswith('title ')
+    assert report.meta['subtitle'].startswith('subtitle ')
+    for key in ('title', 'subtitle'):
+        assert on_server[key] == report.meta[key]
+    report.delete()
+
+def test_add_charts_loads_only_their_variables(token, fake_server):
+    if fake_server is None:
+        pytest.skip("needs the fake server")
+    client = Client(api_key=token, host="localhost:8030/api2", ssl=False)
+    datasource_pk = client.list_datasources()['results'][0]['pk']
+    datasource = client.get_datasource(datasource_pk)
+    report = client.create_report('partial meta')
+    report.add_chart(datasource_pk, 'price', y='gender', title='Price',
+                     filter='agecat > 2', datasource=datasource)
+    assert set(datasource.meta_for([])['columns']) == \
+        {'price', 'gender', 'agecat'}
+    report.add_charts(datasource_pk, x_y_pairs=[('quality', '@')])
+    element = report.elements[-1]
+    assert element['Data']['chartOptions']['title'] == \
+        datasource.text('quality')
+    report.delete()
@@ -0,0 +1,47 @@
+import time
+
+import pytest
+
+from datasmoothie.retry import CircuitBreaker
+from datasmoothie.retry import CircuitOpenError
+from datasmoothie.retry import RateLimiter
+from datasmoothie.retry import RetryPolicy
+from datasmoothie.retry import parse_retry_after
+
+
+def test_retry_policy():
+    policy = RetryPolicy(total=2)
+    assert policy.should_retry(0, 503)
+    assert policy.should_retry(0, 429, idempotent=False)
+    assert not policy.should_retry(0, 503, idempotent=False)
+    assert not policy.should_retry(0, 404)
+    assert not policy.should_retry(2, 503)
+    assert policy.get_backoff(0, retry_after=100) == policy.max_backoff
+    assert 0 <= policy.get_backoff(3) <= policy.backoff_factor * 8
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('2') == 2.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+
+
+def test_rate_limiter():
+    limiter = RateLimiter(rate=50, burst=1)
+    start = time.monotonic()
+    for i in range(6):
+        limiter.acquire()
+    assert time.monotonic() - start >= 0.09
+
+
+def test_circuit_breaker():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    breaker.before_request()
+    breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+    time.sleep(0.06)
+    breaker.before_request()
+    breaker.record_success()
+    assert not breaker.is_open
@@ -0,0 +1,60 @@
+import concurrent.futures
+import time
+
+import pytest
+
+from datasmoothie import Client
+from datasmoothie.singleflight import SingleFlight
+from datasmoothie.testing import FakeServer
+from datasmoothie.transport import FakeTransport
+
+
+def _run_together(function, count=8):
+    with concurrent.futures.ThreadPoolExecutor(count) as pool:
+        futures = [pool.submit(function) for i in range(count)]
+        concurrent.futures.wait(futures)
+    return futures
+
+
+def test_single_flight_shares_results_and_errors():
+    flight = SingleFlight()
+    calls = []
+
+    def slow(value):
+        calls.append(value)
+        time.sleep(0.05)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    futures = _run_together(lambda: flight.do('key', lambda: slow(42)))
+    assert len(calls) == 1
+    assert sorted(future.result()[1] for future in futures) == \
+        [False] + [True] * 7
+    assert {future.result()[0] for future in futures} == {42}
+    error = ValueError("failed")
+    futures = _run_together(lambda: flight.do('key', lambda: slow(error)))
+    assert len(calls) == 2
+    for future in futures:
+        with pytest.raises(ValueError):
+            future.result()
+    assert flight.in_flight() == 0
+
+
+def test_client_coalesces_identical_requests():
+    server = FakeServer.from_fixtures('tests/fixtures/sample_meta.json',
+                                      'tests/fixtures/sample_data.csv',
+                                      api_keys=['token'])
+    client = Client(api_key='token', host="localhost:8030/api2", ssl=False,
+                    transport=FakeTransport(server, latency=0.05))
+    futures = _run_together(lambda: client.get_request('datasource/1',
+                                                       'meta'))
+    metas = [future.result() for future in futures]
+    assert server.requests.count(('GET', 'datasource/1/meta')) == 1
+    assert all(meta == metas[0] for meta in metas)
+    assert metas[0] is not metas[1]
+    payload = {'stub': ['price'], 'banner': ['gender'], 'views': ['counts']}
+    futures = _run_together(lambda: client.post_request(
+        'datasource/1', 'tables', data=payload))
+    assert server.requests.count(('POST', 'datasource/1/tables')) == 1
+    assert all(future.result().status_code == 200 for future in futures)
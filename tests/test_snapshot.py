@@ -0,0 +1,68 @@
+import pytest
+
+from datasmoothie import Client
+from datasmoothie import snapshot
+from datasmoothie.testing import FakeServer
+from datasmoothie.transport import FakeTransport
+
+pytestmark = pytest.mark.skipif(snapshot.pyarrow is None,
+                                reason="pyarrow is not installed")
+
+
+@pytest.fixture
+def server():
+    return FakeServer.from_fixtures('tests/fixtures/sample_meta.json',
+                                    'tests/fixtures/sample_data.csv',
+                                    api_keys=['token'])
+
+
+def _client(server, directory):
+    return Client(api_key='token', host="localhost:8030/api2", ssl=False,
+                  transport=FakeTransport(server),
+                  snapshot_store=snapshot.SnapshotStore(str(directory)))
+
+
+def _downloads(server):
+    return [path for method, path in server.requests
+            if method == 'GET' and path.endswith('/meta_data')]
+
+
+def test_snapshot_is_reused(server, tmp_path):
+    primary_key = list(server.datasources)[0]
+    first = _client(server, tmp_path).get_datasource(primary_key)
+    frame = first.get_dataframe()
+    assert len(_downloads(server)) == 1
+    second = _client(server, tmp_path).get_datasource(primary_key)
+    loaded = second.get_dataframe()
+    assert len(_downloads(server)) == 1
+    assert loaded['gender'].dtype == 'category'
+    assert loaded.shape == frame.shape
+    assert second.survey_meta == first.survey_meta
+    bits = second.get_dataframe(delimited_sets='bits')
+    assert bits.shape == frame.shape
+
+
+def test_snapshot_is_refreshed(server, tmp_path):
+    primary_key = list(server.datasources)[0]
+    datasource = _client(server, tmp_path).get_datasource(primary_key)
+    frame = datasource.get_dataframe()
+    data = frame.head(10).to_csv(index=False)
+    # changed by a client that doesn't share the snapshots
+    other = Client(api_key='token', host="localhost:8030/api2", ssl=False,
+                   transport=FakeTransport(server))
+    other.get_datasource(primary_key).update_meta_and_data(
+        datasource.survey_meta, data)
+    datasource = _client(server, tmp_path).get_datasource(primary_key)
+    assert len(datasource.get_dataframe()) == 10
+    assert len(_downloads(server)) == 2
+
+
+def test_upload_is_saved_as_snapshot(server, tmp_path):
+    primary_key = list(server.datasources)[0]
+    datasource = _client(server, tmp_path).get_datasource(primary_key)
+    meta = datasource.survey_meta
+    data = datasource.get_dataframe().head(10).to_csv(index=False)
+    datasource.update_meta_and_data(meta, data)
+    datasource = _client(server, tmp_path).get_datasource(primary_key)
+    assert len(datasource.get_dataframe()) == 10
+    assert len(_downloads(server)) == 1
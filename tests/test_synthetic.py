@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+
+from datasmoothie import synthetic
+
+
+def test_generate_meta():
+    meta = synthetic.generate_meta(singles=10, delimited_sets=2, ints=1,
+                                   floats=1, languages=3)
+    assert len(meta['columns']) == 15
+    assert len(meta['sets']['data file']['items']) == 15
+    assert set(meta['columns']['q1']['text']) == {'en-GB', 'de-DE', 'fr-FR'}
+    assert meta['columns']['m1']['type'] == 'delimited set'
+
+
+def test_generate_data_matches_meta():
+    meta = synthetic.generate_meta(singles=5, delimited_sets=2)
+    data = synthetic.generate_data(meta, rows=250, chunk_size=100)
+    assert list(data.columns) == list(meta['columns'])
+    assert data['id'].is_unique
+    codes = {i['value'] for i in meta['columns']['q1']['values']}
+    assert set(data['q1'].dropna()) <= codes
+    answers = data['m1'].dropna().str.split(';').explode()
+    codes = {str(i['value']) for i in meta['columns']['m1']['values']}
+    assert set(answers[answers != '']) <= codes
+
+
+def test_write_data(tmp_path):
+    meta = synthetic.generate_meta(singles=3, delimited_sets=1)
+    path = str(tmp_path / 'data.csv')
+    synthetic.write_data(meta, path, rows=30, chunk_size=7)
+    assert len(pd.read_csv(path)) == 30
+    if synthetic.pyarrow is None:
+        pytest.skip("pyarrow is not installed")
+    path = str(tmp_path / 'data.parquet')
+    synthetic.write_data(meta, path, rows=30, chunk_size=7)
+    assert len(pd.read_parquet(path)) == 30
@@ -0,0 +1,114 @@
+import time
+
+import pytest
+import requests
+
+from datasmoothie import Client
+from datasmoothie import deadline
+from datasmoothie.retry import CircuitBreaker
+from datasmoothie.retry import CircuitOpenError
+from datasmoothie.retry import RateLimiter
+from datasmoothie.retry import RetryPolicy
+from datasmoothie.testing import FakeServer
+from datasmoothie.transport import FakeTransport
+
+
+def test_fake_transport_routes():
+    server = FakeServer()
+    server.add_report('first')
+    transport = FakeTransport(server)
+    resp = transport.request('GET', 'http://localhost/api2/report/')
+    assert resp.status_code == 200
+    assert resp.json()['count'] == 1
+    resp = transport.request('GET', 'http://localhost/api2/unknown/')
+    assert resp.status_code == 404
+
+
+def test_fake_transport_latency_timeout():
+    transport = FakeTransport(FakeServer(), latency=0.05)
+    with pytest.raises(requests.exceptions.Timeout):
+        transport.request('GET', 'http://localhost/api2/report/',
+                          timeout=0.01)
+
+
+def test_fake_server_pagination():
+    server = FakeServer(page_size=2)
+    for i in range(5):
+        server.add_report('report {}'.format(i))
+    client = Client(api_key='', transport=FakeTransport(server))
+    reports = client.list_reports()
+    assert reports['count'] == 5
+    assert len(reports['results']) == 2
+    assert 'page=2' in reports['next']
+
+
+def test_fake_server_recorded_responses():
+    server = FakeServer(responses={('GET', 'report/7'): (503, {})})
+    client = Client(api_key='', transport=FakeTransport(server),
+                    retry=RetryPolicy(total=1, backoff_factor=0))
+    assert client.get_report_meta(7) == {}
+    assert server.requests == [('GET', 'report/7'), ('GET', 'report/7')]
+
+
+class BrokenTransport(FakeTransport):
+    """Fails every request with an error other than a timeout."""
+
+    def request(self, *args, **kwargs):
+        raise requests.exceptions.ChunkedEncodingError("Connection broken.")
+
+
+def test_circuit_breaker_trial_is_released():
+    server = FakeServer()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    client = Client(api_key='', transport=FakeTransport(server),
+                    circuit_breaker=breaker)
+    time.sleep(0.02)
+    # a deadline that has passed stops the request before the trial
+    with deadline.within(0.001):
+        time.sleep(0.01)
+        with pytest.raises(deadline.DeadlineExceeded):
+            client.list_reports()
+    assert client.list_reports()['count'] == 0
+    assert not breaker.is_open
+
+    broken = Client(api_key='', transport=BrokenTransport(server),
+                    circuit_breaker=breaker, retry=RetryPolicy(total=0))
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        broken.list_reports()
+    with pytest.raises(CircuitOpenError):
+        client.list_reports()
+    time.sleep(0.02)
+    # the failed request counted as a failed trial, so another is let through
+    assert client.list_reports()['count'] == 0
+
+
+class SlowFirstTransport(FakeTransport):
+    """Answers the first request late, and records the closed responses."""
+
+    def __init__(self, server):
+        super().__init__(server)
+        self.sent = 0
+        self.closed = []
+
+    def request(self, *args, **kwargs):
+        self.sent += 1
+        if self.sent == 1:
+            time.sleep(0.1)
+        response = super().request(*args, **kwargs)
+        close = response.close
+        response.close = lambda: (self.closed.append(response), close())
+        return response
+
+
+def test_hedged_request():
+    transport = SlowFirstTransport(FakeServer())
+    limiter = RateLimiter(rate=0.01, burst=2)
+    client = Client(api_key='', transport=transport, hedge_after=0.01,
+                    rate_limiter=limiter)
+    assert client.list_reports()['count'] == 0
+    assert transport.sent == 2
+    # the request and its copy each took a token
+    assert limiter._tokens < 1
+    time.sleep(0.15)
+    assert len(transport.closed) == 1
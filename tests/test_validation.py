@@ -0,0 +1,74 @@
+import pytest
+
+from datasmoothie import Client
+from datasmoothie import validation
+
+
+def test_check_tables(dataset_meta):
+    with pytest.warns(UserWarning, match="Unknown view 'net_1'"):
+        problems = validation.check_tables(
+            dataset_meta, [['price', 'pirce'], ['pirce']], [['gender', '@'],
+                                                            ['agecatt']],
+            ['counts', 'net_1'])
+    assert problems == [
+        "Unknown variable 'pirce' in stub.",
+        "Unknown variable 'agecatt' in banner."]
+    assert validation.check_tables(dataset_meta, [['price']], [['@']],
+                                   ['cbase', 'c%']) == []
+
+
+def test_check_charts(dataset_meta):
+    assert validation.check_charts(
+        dataset_meta, [('price', 'gender')], filter='(gender == 1) & '
+        '(agecat > 2)', user_filters=['gender']) == []
+    problems = validation.check_charts(
+        dataset_meta, [('price', 'gendr')], filter=['gender == ', 'x == 1'],
+        user_filters=['nope'], comparison_variables=['agecat'])
+    assert problems == ["Unknown variable 'gendr' in y.",
+                        "Can't parse the filter 'gender == '.",
+                        "Unknown variable 'x' in filter 'x == 1'.",
+                        "Unknown variable 'nope' in user_filters."]
+    with pytest.raises(ValueError) as error:
+        validation.raise_problems(problems)
+    assert error.value.problems == problems
+
+
+def test_get_tables_fails_before_sending(token, fake_server):
+    client = Client(api_key=token, host="localhost:8030/api2", ssl=False)
+    primary_key = client.list_datasources()['results'][0]['pk']
+    datasource = client.get_datasource(primary_key)
+    with pytest.raises(validation.ValidationError) as error, \
+            pytest.warns(UserWarning, match="cpct"):
+        datasource.get_table_set([['price'], ['qualty']], [['gender']],
+                                 ['counts', 'cpct'])
+    assert len(error.value.problems) == 1
+    if fake_server is not None:
+        assert not [path for method, path in fake_server.requests
+                    if path.endswith('tables')]
+
+
+def test_add_charts_fails_before_changing_report(token):
+    client = Client(api_key=token, host="localhost:8030/api2", ssl=False)
+    datasource_id = client.list_datasources()['results'][0]['pk']
+    report = client.get_report(client.list_reports()['results'][0]['pk'])
+    elements = len(report.elements)
+    with pytest.raises(validation.ValidationError):
+        report.add_charts(datasource_id, x_y_pairs=[('price', 'gender'),
+                                                    ('quality', 'sex')])
+    with pytest.raises(validation.ValidationError):
+        report.add_chart(datasource_id, 'qualty')
+    assert len(client.get_report(report._pk).elements) == elements
+
+
+def test_validation_can_be_turned_off(token):
+    client = Client(api_key=token, host="localhost:8030/api2", ssl=False)
+    datasource = client.get_datasource(
+        client.list_datasources()['results'][0]['pk'])
+    with pytest.warns(UserWarning):
+        tables = datasource.get_table_set([['price']], [['gender']],
+                                          ['counts', 'cpct'])
+    assert len(tables) == 1
+    tables = list(datasource.iter_table_set([['price']], [['gender']],
+                                            ['counts', 'cpct'],
+                                            validate=False))
+    assert len(tables) == 1
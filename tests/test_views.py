@@ -0,0 +1,59 @@
+import pandas as pd
+import pytest
+
+from datasmoothie import Client
+from datasmoothie import views
+from datasmoothie.testing import Tabulator
+
+STUB = ['price', 'quality']
+BANNERS = [['gender'], ['gender', 'agecat']]
+
+
+@pytest.mark.parametrize('banner', BANNERS)
+def test_column_percentages(dataset_meta, dataset_data, banner):
+    tabulator = Tabulator(dataset_meta, dataset_data)
+    derived = views.column_percentages(
+        tabulator.view(STUB, banner, 'counts'),
+        tabulator.view(STUB, banner, 'cbase'))
+    pd.testing.assert_frame_equal(derived, tabulator.view(STUB, banner, 'c%'))
+
+
+@pytest.mark.parametrize('banner', BANNERS)
+def test_row_percentages(dataset_meta, dataset_data, banner):
+    tabulator = Tabulator(dataset_meta, dataset_data)
+    derived = views.row_percentages(tabulator.view(STUB, banner, 'counts'))
+    pd.testing.assert_frame_equal(derived, tabulator.view(STUB, banner, 'r%'))
+
+
+@pytest.mark.parametrize('banner', BANNERS)
+def test_get_tables_derives_the_server_views(token, banner):
+    client = Client(api_key=token, host="localhost:8030/api2", ssl=False)
+    datasource = client.get_datasource(
+        client.list_datasources()['results'][0]['pk'])
+    requested = ['c%', 'r%']
+    derived = datasource.get_tables(STUB, banner, requested)
+    fetched = datasource.get_tables(STUB, banner, requested, derive=False)
+    assert list(derived) == requested
+    for view in requested:
+        pd.testing.assert_frame_equal(derived[view], fetched[view],
+                                      check_dtype=False)
+
+
+def test_plan_views():
+    assert views.plan_views(['c%']) == (['counts', 'cbase'], ['c%'])
+    # base views that were asked for are kept, in order, and not repeated
+    assert views.plan_views(['cbase', 'counts', 'c%', 'r%', 'mean']) == \
+        (['cbase', 'counts', 'mean'], ['c%', 'r%'])
+    assert views.plan_views(['r%', 'c%'], derivable=['c%']) == \
+        (['r%', 'counts', 'cbase'], ['c%'])
+    assert views.plan_views(['c%', 'stddev'], derivable=[]) == \
+        (['c%', 'stddev'], [])
+
+
+def test_derive_views_skips_missing_sources():
+    counts = pd.DataFrame([[1, 3]], columns=pd.MultiIndex.from_tuples(
+        [('gender', 1), ('gender', 2)]),
+        index=pd.MultiIndex.from_tuples([('price', 1)]))
+    results = views.derive_views({'counts': counts}, ['c%', 'r%'])
+    assert set(results) == {'counts', 'r%'}
+    assert results['r%'].values.tolist() == [[25.0, 75.0]]
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from datasmoothie import Client
+from datasmoothie import decoding
+from datasmoothie import wire
+
+
+def test_encode_and_decode_tables():
+    counts = pd.DataFrame([[1, 2], [3, 4]],
+                          index=pd.MultiIndex.from_tuples([('q1', 1),
+                                                           ('q1', 2)]),
+                          columns=pd.MultiIndex.from_tuples([('gender', 0),
+                                                             ('gender', 1)]))
+    mean = pd.DataFrame([[1.5, np.nan]],
+                        index=pd.MultiIndex.from_tuples([('q1', 'mean')]),
+                        columns=counts.columns)
+    sig_diff = pd.DataFrame([[[2], [-1]], [[], []]],
+                            index=counts.index, columns=counts.columns)
+    results = wire.decode_tables(wire.encode_tables(
+        {'counts': counts, 'mean': mean, 'sig_diff': sig_diff}))
+    assert list(results) == ['counts', 'mean', 'sig_diff']
+    pd.testing.assert_frame_equal(results['counts'], counts)
+    pd.testing.assert_frame_equal(results['mean'], mean)
+    pd.testing.assert_frame_equal(results['sig_diff'], sig_diff)
+    # the values point into the received bytes but can still be changed
+    results['counts'].iloc[0, 0] = 10
+    assert results['counts'].iloc[0, 0] == 10
+
+
+def test_get_tables_in_arrow(token, fake_server):
+    client = Client(api_key=token, host="localhost:8030/api2", ssl=False)
+    json_client = Client(api_key=token, host="localhost:8030/api2",
+                         ssl=False, binary=False)
+    primary_key = client.list_datasources()['results'][0]['pk']
+    datasource = client.get_datasource(primary_key)
+    json_datasource = json_client.get_datasource(primary_key)
+    arguments = (['price', 'quality'], ['gender', 'agecat'],
+                 ['cbase', 'counts', 'c%', 'mean'])
+    tables = datasource.get_tables(*arguments)
+    expected = json_datasource.get_tables(*arguments)
+    assert list(tables) == list(expected)
+    for view in expected:
+        pd.testing.assert_frame_equal(tables[view], expected[view])
+    pd.testing.assert_frame_equal(
+        datasource.get_sig_diff(['price'], ['gender']),
+        json_datasource.get_sig_diff(['price'], ['gender']))
+    pd.testing.assert_frame_equal(
+        datasource.get_crosstab(['price'], ['gender']),
+        json_datasource.get_crosstab(['price'], ['gender']))
+
+
+def test_falls_back_to_json(token, fake_server):
+    if fake_server is None:
+        pytest.skip("needs the fake server")
+    fake_server.arrow = False
+    client = Client(api_key=token, host="localhost:8030/api2", ssl=False)
+    primary_key = client.list_datasources()['results'][0]['pk']
+    datasource = client.get_datasource(primary_key)
+    content = client.post_request('datasource/{}'.format(primary_key),
+                                  'tables', {'stub': ['price'],
+                                             'banner': ['gender'],
+                                             'views': ['counts']}).content
+    table = datasource.get_table(['price'], ['gender'], 'counts')
+    pd.testing.assert_frame_equal(table,
+                                  decoding.decode_tables(content)['counts'])